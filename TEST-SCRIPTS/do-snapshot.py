@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+DO Snapshot - Local, Indexed Copy of DO Conversation Storage
+
+Crawls DO storage once with the same list-keys + /api/conversation traversal
+as find-latest-do-message.py and writes every message into a local SQLite
+file indexed by timestamp, username, entity and sessionId. Debugging
+questions then run against the snapshot in milliseconds instead of as a
+full remote crawl.
+
+Usage:
+    python3 do-snapshot.py export                      # crawl DO into the snapshot
+    python3 do-snapshot.py latest [N]                  # newest N messages (default 10)
+    python3 do-snapshot.py missing-session             # messages with botParams but no sessionId
+    python3 do-snapshot.py per-entity-hour             # message counts per entity per hour
+    python3 do-snapshot.py sql "SELECT username, COUNT(*) FROM messages GROUP BY 1"
+
+Options:
+    --db PATH           Snapshot file (default: TEST-SCRIPTS/.do-state/snapshot.sqlite)
+    --api-base URL      DO worker to crawl (default: production worker)
+    --concurrency N     Conversations fetched in parallel during export (default: 8)
+    --retries N         Retries per request on 429/5xx (default: 4)
+    --limit N           Row cap for query output (default: 50)
+
+Tables:
+    messages(id, timestamp, username, color, message_type, entity, session_id,
+             has_bot_params, text, payload)   -- payload is the full message JSON
+    message_keys(conv_key, message_id)        -- a message can sit in several keys
+    conversations(conv_key, message_count, max_timestamp)
+    snapshot(taken_at, api_base, conversations, messages)
+"""
+
+import importlib.util
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+FIND_LATEST_SCRIPT = Path(__file__).resolve().parent / 'find-latest-do-message.py'
+
+def load_find_latest_module():
+    """Import find-latest-do-message.py (hyphenated, so not importable by name)"""
+    spec = importlib.util.spec_from_file_location('find_latest_do_message', FIND_LATEST_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+do = load_find_latest_module()
+get_option = do.get_option
+
+DEFAULT_DB = Path(__file__).resolve().parent / '.do-state' / 'snapshot.sqlite'
+
+SCHEMA = """
+CREATE TABLE messages (
+    id TEXT PRIMARY KEY,
+    timestamp INTEGER NOT NULL,
+    username TEXT,
+    color TEXT,
+    message_type TEXT,
+    entity TEXT,
+    session_id TEXT,
+    has_bot_params INTEGER NOT NULL,
+    text TEXT,
+    payload TEXT NOT NULL
+);
+CREATE TABLE message_keys (
+    conv_key TEXT NOT NULL,
+    message_id TEXT NOT NULL,
+    PRIMARY KEY (conv_key, message_id)
+);
+CREATE TABLE conversations (
+    conv_key TEXT PRIMARY KEY,
+    message_count INTEGER NOT NULL,
+    max_timestamp INTEGER NOT NULL
+);
+CREATE TABLE snapshot (
+    taken_at INTEGER NOT NULL,
+    api_base TEXT NOT NULL,
+    conversations INTEGER NOT NULL,
+    messages INTEGER NOT NULL
+);
+"""
+
+# Built after the bulk insert - cheaper than maintaining them row by row
+INDEXES = """
+CREATE INDEX idx_messages_timestamp ON messages(timestamp);
+CREATE INDEX idx_messages_username ON messages(username, timestamp);
+CREATE INDEX idx_messages_entity ON messages(entity, timestamp);
+CREATE INDEX idx_messages_session ON messages(session_id);
+CREATE INDEX idx_message_keys_message ON message_keys(message_id);
+"""
+
+QUERIES = {
+    'latest': """
+        SELECT timestamp, id, username, entity, session_id, substr(text, 1, 60) AS text
+        FROM messages ORDER BY timestamp DESC LIMIT ?
+    """,
+    'missing-session': """
+        SELECT timestamp, id, username, entity, substr(text, 1, 60) AS text
+        FROM messages WHERE has_bot_params = 1 AND session_id IS NULL
+        ORDER BY timestamp DESC LIMIT ?
+    """,
+    'per-entity-hour': """
+        SELECT strftime('%Y-%m-%d %H:00', timestamp / 1000, 'unixepoch', 'localtime') AS hour,
+               COALESCE(entity, '(none)') AS entity, COUNT(*) AS messages
+        FROM messages GROUP BY hour, entity ORDER BY hour DESC, messages DESC LIMIT ?
+    """,
+}
+
+def message_row(msg):
+    bp = msg.get('botParams')
+    return (
+        msg['id'],
+        msg['timestamp'],
+        msg.get('username'),
+        msg.get('color'),
+        msg.get('message-type'),
+        bp.get('entity') if bp else None,
+        bp.get('sessionId') if bp else None,
+        1 if bp is not None else 0,
+        msg.get('text'),
+        json.dumps(msg),
+    )
+
+def export_snapshot(db_path, concurrency, retries):
+    """Crawl every conv:/godmode: key into a fresh snapshot, swapped in atomically"""
+    session = do.make_session(concurrency)
+    started = time.time()
+
+    all_keys = do.get_json(session, f"{do.API_BASE}/api/admin/list-keys", retries=retries).get('keys', [])
+    keys = [k for k in all_keys if k.startswith('conv:')] + [k for k in all_keys if k.startswith('godmode:')]
+    print(f"📋 {len(keys)} conversation keys ({len(all_keys)} total)")
+
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = db_path.with_suffix('.tmp')
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    conn = sqlite3.connect(tmp_path)
+    conn.execute('PRAGMA journal_mode = OFF')
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.executescript(SCHEMA)
+
+    task = lambda key: [message_row(m) for m in
+                        do.fetch_conversation(session, key, retries, limit=do.FULL_CONVERSATION_LIMIT)]
+    done = 0
+    for _, key, rows in do.iter_conversations(keys, concurrency, task):
+        conn.executemany('INSERT OR IGNORE INTO messages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        conn.executemany('INSERT OR IGNORE INTO message_keys VALUES (?, ?)',
+                         ((key, row[0]) for row in rows))
+        conn.execute('INSERT INTO conversations VALUES (?, ?, ?)',
+                     (key, len(rows), max((row[1] for row in rows), default=0)))
+        done += 1
+        if done % 500 == 0:
+            print(f"   ... {done}/{len(keys)} conversations")
+
+    conn.executescript(INDEXES)
+    conversations, = conn.execute('SELECT COUNT(*) FROM conversations').fetchone()
+    messages, = conn.execute('SELECT COUNT(*) FROM messages').fetchone()
+    conn.execute('INSERT INTO snapshot VALUES (?, ?, ?, ?)',
+                 (int(started * 1000), do.API_BASE, conversations, messages))
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, db_path)
+
+    print(f"✅ Snapshot: {messages} messages from {conversations} conversations "
+          f"in {time.time() - started:.1f}s → {db_path}")
+
+def run_query(db_path, sql, params=()):
+    if not db_path.exists():
+        print(f"❌ No snapshot at {db_path} - run 'export' first")
+        sys.exit(1)
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    taken_at, api_base = conn.execute('SELECT taken_at, api_base FROM snapshot').fetchone()
+    started = time.perf_counter()
+    cursor = conn.execute(sql, params)
+    rows = cursor.fetchall()
+    elapsed = (time.perf_counter() - started) * 1000
+    columns = [c[0] for c in cursor.description or []]
+    conn.close()
+
+    taken = datetime.fromtimestamp(taken_at / 1000).strftime('%I:%M %p %B %d, %Y')
+    print(f"Snapshot of {api_base} taken {taken}")
+    print("=" * 80)
+    if columns:
+        widths = [max([len(c)] + [len(str(r[i])) for r in rows]) for i, c in enumerate(columns)]
+        print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+        print("  ".join("-" * w for w in widths))
+        for row in rows:
+            print("  ".join(str(v).ljust(w) for v, w in zip(row, widths)))
+    print("=" * 80)
+    print(f"{len(rows)} rows in {elapsed:.1f}ms")
+
+VALUE_OPTIONS = ('--db', '--api-base', '--concurrency', '--retries', '--limit')
+
+def positional_args():
+    """argv minus flags and the values of '--flag value' options"""
+    args = []
+    skip = False
+    for arg in sys.argv[1:]:
+        if skip:
+            skip = False
+        elif arg in VALUE_OPTIONS:
+            skip = True
+        elif not arg.startswith('--'):
+            args.append(arg)
+    return args
+
+def main():
+    args = positional_args()
+    command = args[0] if args else None
+    db_path = Path(get_option('--db', DEFAULT_DB))
+    do.API_BASE = get_option('--api-base', do.API_BASE)
+    limit = int(get_option('--limit', 50))
+
+    if command == 'export':
+        export_snapshot(db_path,
+                        int(get_option('--concurrency', do.DEFAULT_CONCURRENCY)),
+                        int(get_option('--retries', do.DEFAULT_RETRIES)))
+    elif command == 'latest':
+        run_query(db_path, QUERIES['latest'], (int(args[1]) if len(args) > 1 else 10,))
+    elif command in QUERIES:
+        run_query(db_path, QUERIES[command], (limit,))
+    elif command == 'sql' and len(args) > 1:
+        run_query(db_path, args[1])
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+"""
+DO Stand-in Server - Offline Replacement for saywhatwant-do-worker
+
+A local, stdlib-only HTTP server that implements the slice of the DO worker
+API the Python tooling talks to, with the same semantics as
+workers/durable-objects/MessageQueue.js:
+
+    GET  /api/admin/list-keys       conv:/godmode: conversation keys
+    GET  /api/conversation          ?humanUsername&humanColor&aiUsername&aiColor&limit
+    GET  /api/comments              ?after|since= (DO shape), ?limit= adds KV-style 'comments'
+    POST /api/comments              idempotent on id, human+entity → pending queue
+    GET  /api/queue/pending         ?limit=
+    POST /api/queue/claim-next      {workerId} - priority desc, then oldest first
+    POST /api/queue/complete        {messageId}
+    GET  /api/admin/stats
+    POST /api/admin/purge           recent cache + pending queue (conversations are kept)
+
+Like the deployed worker, /api/comments only sees the newest 50K messages;
+/api/conversation sees everything (the per-conversation storage the scripts
+were written against). Conversation responses carry an ETag and honour
+If-None-Match.
+
+Usage:
+    python3 do-standin-server.py
+    python3 do-standin-server.py --messages 1000000 --conversations 20000 --seed 7
+    python3 do-standin-server.py --latency-ms 40 --jitter-ms 20 --error-rate 0.02
+
+    python3 find-latest-do-message.py --api-base http://127.0.0.1:8788
+
+Options:
+    --host HOST            Bind address (default: 127.0.0.1)
+    --port N               Port (default: 8788)
+    --messages N           Synthetic messages to seed (default: 10000)
+    --conversations N      Conversations they are spread over (default: 500)
+    --entities N           Distinct bot entities (default: 12)
+    --godmode-share F      Fraction of conversations that are god-mode sessions (default: 0.05)
+    --missing-session F    Fraction of human messages seeded without sessionId (default: 0.02)
+    --days N               Spread seeded timestamps over the last N days (default: 7)
+    --seed N               RNG seed - same seed, same data, same injected faults (default: 1)
+    --latency-ms N         Added latency per request (default: 0)
+    --jitter-ms N          Uniform +/- jitter on that latency (default: 0)
+    --error-rate F         Fraction of requests answered with --error-status (default: 0)
+    --error-status N       Status for injected errors (default: 503; 429 adds Retry-After: 1)
+"""
+
+import bisect
+import json
+import random
+import string
+import sys
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+MAX_CACHE_SIZE = 50000          # MessageQueue.js: recentMessages cap
+DEFAULT_CONVERSATION_LIMIT = 100
+VERSION = "1.0.1"
+
+def get_option(name, default=None):
+    """Read a value option from argv, accepting both '--name value' and '--name=value'"""
+    for i, arg in enumerate(sys.argv):
+        if arg == name and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+        if arg.startswith(name + '='):
+            return arg.split('=', 1)[1]
+    return default
+
+def generate_id(rng):
+    return ''.join(rng.choice(string.ascii_lowercase + string.digits) for _ in range(10))
+
+def conversation_key(human_username, human_color, ai_username, ai_color, entity=None, session_id=None):
+    if session_id and entity == 'god-mode':
+        return f"godmode:{human_username}:{human_color}:{ai_username}:{ai_color}:{session_id}"
+    return f"conv:{human_username}:{human_color}:{ai_username}:{ai_color}"
+
+class Stored:
+    """
+    One message. Seeded messages stay as pre-encoded JSON bytes (roughly a
+    third of the memory of a dict) and are only decoded if something mutates
+    them; posted messages are kept as dicts.
+    """
+
+    __slots__ = ('timestamp', 'seq', 'id', 'data')
+
+    def __init__(self, timestamp, seq, msg_id, data):
+        self.timestamp = timestamp
+        self.seq = seq
+        self.id = msg_id
+        self.data = data
+
+    def __lt__(self, other):
+        return (self.timestamp, self.seq) < (other.timestamp, other.seq)
+
+    def as_dict(self):
+        if isinstance(self.data, bytes):
+            self.data = json.loads(self.data)
+        return self.data
+
+    def as_json(self):
+        return self.data if isinstance(self.data, bytes) else json.dumps(self.data).encode()
+
+class MessageStore:
+    """In-memory DO state, guarded by one lock like the single-threaded DO"""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.recent = deque()               # oldest → newest, capped at MAX_CACHE_SIZE
+        self.recent_ids = {}                # id → Stored, for everything in self.recent
+        self.by_pair = defaultdict(list)    # (username, color) → [Stored] sorted by time
+        self.keys = {}                      # conversation keys, insertion ordered
+        self.pending = []
+        self.global_score = 0
+
+    def _add(self, stored, username, color):
+        """Add to the recent cache and the conversation index (caller holds the lock)"""
+        self.recent.append(stored)
+        self.recent_ids[stored.id] = stored
+        if len(self.recent) > MAX_CACHE_SIZE:
+            evicted = self.recent.popleft()
+            self.recent_ids.pop(evicted.id, None)
+
+        bucket = self.by_pair[(username, color)]
+        if not bucket or not stored < bucket[-1]:
+            bucket.append(stored)
+        else:
+            bisect.insort(bucket, stored)
+
+    def _register_key(self, msg):
+        """Conversation keys come from human messages (an AI message's humanUsername is its own)"""
+        bp = msg.get('botParams') or {}
+        ais = bp.get('ais')
+        if msg.get('message-type') == 'AI' or not ais or ':' not in ais:
+            return
+        ai_username, ai_color = ais.split(':', 1)
+        key = conversation_key(msg.get('username'), msg.get('color'), ai_username, ai_color,
+                               bp.get('entity'), bp.get('sessionId'))
+        self.keys.setdefault(key, None)
+
+    # ------------------------------------------------------------------
+    # Seeding
+    # ------------------------------------------------------------------
+
+    def seed(self, messages, conversations, entities, godmode_share, missing_session, days):
+        rng = self.rng
+        now = int(time.time() * 1000)
+        start = now - int(days * 86_400_000)
+        words = ('the', 'signal', 'is', 'quiet', 'tonight', 'what', 'do', 'you', 'see',
+                 'remember', 'water', 'light', 'again', 'why', 'not', 'here', 'now')
+
+        entity_names = [f"entity-{i:02d}" for i in range(entities)]
+        ai_names = {e: (''.join(p.title() for p in e.split('-')), f"{rng.randint(0, 255):03d}{rng.randint(0, 255):03d}080")
+                    for e in entity_names}
+        ai_names['god-mode'] = ('GodMode', '171181104')
+
+        convs = []
+        for c in range(conversations):
+            entity = 'god-mode' if rng.random() < godmode_share else rng.choice(entity_names)
+            human = (f"Human{c}", f"{rng.randint(0, 255):03d}{rng.randint(0, 255):03d}{rng.randint(0, 255):03d}")
+            session_id = f"{start + c}-{generate_id(rng)[:7]}"
+            convs.append((entity, human, ai_names[entity], session_id))
+
+        # Timestamps ascend globally (never past now), so every per-pair bucket
+        # is appended in order and posted messages always sort after the seed
+        span = now - start
+        step = max(1, span // max(1, messages))
+        ts = start
+        for n in range(messages):
+            entity, (hu, hc), (au, ac), session_id = convs[rng.randrange(conversations)]
+            ts = max(ts + 1, start + span * (n + 1) // messages - rng.randint(0, step // 2))
+            is_human = n % 2 == 0
+            text = ' '.join(rng.choice(words) for _ in range(rng.randint(4, 30)))
+            msg = {
+                'id': generate_id(rng),
+                'timestamp': ts,
+                'text': text,
+                'username': hu if is_human else au,
+                'color': hc if is_human else ac,
+                'domain': 'saywhatwant.app',
+                'message-type': 'human' if is_human else 'AI',
+                'replyTo': None,
+                'context': None,
+                'eqScore': 0,
+            }
+            if is_human:
+                msg['botParams'] = {
+                    'status': 'complete',
+                    'priority': 5,
+                    'entity': entity,
+                    'ais': f"{au}:{ac}",
+                    'humanUsername': hu,
+                    'humanColor': hc,
+                    'claimedBy': 'seed',
+                    'claimedAt': ts,
+                    'completedAt': ts,
+                }
+                if rng.random() >= missing_session:
+                    msg['botParams']['sessionId'] = session_id
+                self._register_key(msg)
+
+            self.seq += 1
+            stored = Stored(ts, self.seq, msg['id'], json.dumps(msg).encode())
+            self._add(stored, msg['username'], msg['color'])
+
+            if (n + 1) % 100_000 == 0:
+                print(f"   ... seeded {n + 1:,} messages")
+
+    # ------------------------------------------------------------------
+    # Endpoints (each returns (status, payload))
+    # ------------------------------------------------------------------
+
+    def list_keys(self):
+        with self.lock:
+            keys = list(self.keys)
+            return 200, {'keys': keys, 'count': len(keys), 'messageCount': len(self.recent)}
+
+    def conversation(self, q):
+        limit = int(q.get('limit', DEFAULT_CONVERSATION_LIMIT))
+        with self.lock:
+            human = self.by_pair.get((q.get('humanUsername'), q.get('humanColor')), [])
+            ai = self.by_pair.get((q.get('aiUsername'), q.get('aiColor')), [])
+            # Only the tail of each bucket can make the last `limit`
+            merged = sorted(human[-limit:] + ai[-limit:]) if human is not ai else list(human[-limit:])
+            result = merged[-limit:] if limit > 0 else []
+            body = b'[' + b','.join(s.as_json() for s in result) + b']'
+        return 200, body
+
+    def get_messages(self, q):
+        after = int(q.get('after') or q.get('since') or 0)
+        with self.lock:
+            # recent is time ordered: walk back from the newest until we pass `after`
+            found = []
+            for stored in reversed(self.recent):
+                if stored.timestamp <= after:
+                    break
+                found.append(stored)
+            parts = [s.as_json() for s in found]
+            score = self.global_score
+
+        body = b'{"messages":[' + b','.join(parts) + b'],"version":"' + VERSION.encode() + \
+               b'","globalScore":' + str(score).encode()
+        if 'limit' in q:
+            # sww-comments KV API shape, as read by test/test-model-loading.py
+            body += b',"comments":[' + b','.join(parts[:int(q['limit'])]) + b']'
+        return 200, body + b'}'
+
+    def post_message(self, body):
+        with self.lock:
+            msg_id = body.get('id') or generate_id(self.rng)
+            existing = self.recent_ids.get(msg_id)
+            if existing:
+                return 200, {'id': msg_id, 'timestamp': existing.timestamp, 'status': 'duplicate'}
+
+            timestamp = body.get('timestamp') or int(time.time() * 1000)
+            message_type = body.get('message-type') or body.get('messageType') or 'human'
+            bp_in = body.get('botParams') or {}
+            entity = bp_in.get('entity')
+
+            msg = {
+                'id': msg_id,
+                'timestamp': timestamp,
+                'text': body.get('text'),
+                'username': body.get('username'),
+                'color': body.get('color'),
+                'domain': body.get('domain') or 'saywhatwant.app',
+                'message-type': message_type,
+                'replyTo': body.get('replyTo') or None,
+                'context': body.get('context') or None,
+                'eqScore': body.get('eqScore') or 0,
+            }
+            if entity:
+                msg['botParams'] = {
+                    'status': 'pending' if message_type == 'human' else 'complete',
+                    'priority': bp_in.get('priority') or body.get('priority') or 5,
+                    'entity': entity,
+                    'ais': bp_in.get('ais') or None,
+                    'sessionId': bp_in.get('sessionId') or None,
+                    # MessageQueue.js always stamps the poster here, even on AI messages
+                    'humanUsername': body.get('username'),
+                    'humanColor': body.get('color'),
+                    'claimedBy': None,
+                    'claimedAt': None,
+                    'completedAt': timestamp if message_type == 'AI' else None,
+                }
+
+            self.seq += 1
+            stored = Stored(timestamp, self.seq, msg_id, msg)
+            self._add(stored, msg['username'], msg['color'])
+            self._register_key(msg)
+
+            if message_type == 'human' and entity:
+                self.pending.append(msg)
+
+        return 200, {'id': msg_id, 'timestamp': timestamp, 'status': 'success'}
+
+    def _sort_pending(self):
+        self.pending.sort(key=lambda m: (-(m['botParams'].get('priority') or 5), m['timestamp']))
+
+    def get_pending(self, q):
+        limit = int(q.get('limit', 999999))
+        with self.lock:
+            self._sort_pending()
+            return 200, {'pending': self.pending[:limit], 'platformOnly': [],
+                         'kvStats': {'reads': 0, 'writes': 0}}
+
+    def claim_next(self, body):
+        worker_id = body.get('workerId')
+        if not worker_id:
+            return 400, {'success': False, 'message': None, 'error': 'workerId required'}
+
+        with self.lock:
+            self.pending = [m for m in self.pending if m['botParams']['status'] == 'pending']
+            if not self.pending:
+                return 200, {'success': False, 'message': None, 'reason': 'no_pending_messages',
+                             'totalPending': 0, 'remainingPending': 0}
+
+            self._sort_pending()
+            total = len(self.pending)
+            msg = self.pending.pop(0)
+            msg['botParams']['status'] = 'processing'
+            msg['botParams']['claimedBy'] = worker_id
+            msg['botParams']['claimedAt'] = int(time.time() * 1000)
+            return 200, {'success': True, 'message': msg, 'totalPending': total,
+                         'remainingPending': len(self.pending)}
+
+    def complete(self, body):
+        with self.lock:
+            stored = self.recent_ids.get(body.get('messageId'))
+            if not stored:
+                return 404, {'success': False, 'error': 'Message not found in memory'}
+            msg = stored.as_dict()
+            if msg.get('botParams'):
+                msg['botParams']['status'] = 'complete'
+                msg['botParams']['completedAt'] = int(time.time() * 1000)
+        return 200, {'success': True}
+
+    def stats(self):
+        with self.lock:
+            return 200, {'mode': 'memory-only', 'recentMessages': len(self.recent),
+                         'pendingQueue': len(self.pending), 'maxCacheSize': MAX_CACHE_SIZE,
+                         'conversations': len(self.keys), 'storageReads': 0, 'storageWrites': 0,
+                         'globalScore': self.global_score}
+
+    def purge(self):
+        """Like MessageQueue.purgeMemory: drop the recent cache and queue, keep conversations"""
+        with self.lock:
+            count = len(self.recent) + len(self.pending)
+            self.recent.clear()
+            self.recent_ids.clear()
+            self.pending = []
+        return 200, {'success': True, 'message': f"Purged {count} messages from memory"}
+
+class FaultInjector:
+    """Seeded latency and error injection so client measurements are reproducible"""
+
+    def __init__(self, seed, latency_ms=0, jitter_ms=0, error_rate=0.0, error_status=503):
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+    def draw(self):
+        """(delay_seconds, inject_error) for the next request"""
+        with self.lock:
+            jitter = self.rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+            fail = self.error_rate > 0 and self.rng.random() < self.error_rate
+        return max(0.0, (self.latency_ms + jitter) / 1000), fail
+
+def make_handler(store, faults):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out as separate writes; without this, Nagle plus
+        # delayed ACK adds ~40ms to every keep-alive response
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def send_json(self, status, payload, extra_headers=None):
+            body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            for name, value in (extra_headers or {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def read_json(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            return json.loads(self.rfile.read(length) or b'{}') if length else {}
+
+        def inject(self):
+            delay, fail = faults.draw()
+            if delay:
+                time.sleep(delay)
+            if fail:
+                headers = {'Retry-After': '1'} if faults.error_status == 429 else None
+                self.send_json(faults.error_status, {'error': 'injected failure'}, headers)
+            return fail
+
+        def do_OPTIONS(self):
+            self.send_response(204)
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Access-Control-Allow-Methods', 'GET, POST, PATCH, OPTIONS')
+            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            q = {k: v[0] for k, v in parse_qs(url.query).items()}
+            if self.inject():
+                return
+
+            if url.path == '/api/admin/list-keys':
+                self.send_json(*store.list_keys())
+            elif url.path == '/api/conversation':
+                status, body = store.conversation(q)
+                etag = f'W/"{zlib.crc32(body):08x}-{len(body)}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                else:
+                    self.send_json(status, body, {'ETag': etag})
+            elif url.path == '/api/comments':
+                self.send_json(*store.get_messages(q))
+            elif url.path == '/api/queue/pending':
+                self.send_json(*store.get_pending(q))
+            elif url.path == '/api/admin/stats':
+                self.send_json(*store.stats())
+            else:
+                self.send_json(404, {'error': 'Not found'})
+
+        def do_POST(self):
+            path = urlparse(self.path).path
+            try:
+                body = self.read_json()
+            except ValueError as e:
+                self.send_json(500, {'error': str(e)})
+                return
+            if self.inject():
+                return
+
+            if path == '/api/comments':
+                self.send_json(*store.post_message(body))
+            elif path == '/api/queue/claim-next':
+                self.send_json(*store.claim_next(body))
+            elif path == '/api/queue/complete':
+                self.send_json(*store.complete(body))
+            elif path == '/api/admin/purge':
+                self.send_json(*store.purge())
+            else:
+                self.send_json(404, {'error': 'Not found'})
+
+    return Handler
+
+def make_server(host='127.0.0.1', port=8788, messages=10000, conversations=500, entities=12,
+                godmode_share=0.05, missing_session=0.02, days=7, seed=1,
+                latency_ms=0, jitter_ms=0, error_rate=0.0, error_status=503):
+    """Build a seeded stand-in server; call serve_forever() (or run it in a thread)"""
+    store = MessageStore(random.Random(seed))
+    if messages:
+        store.seed(messages, max(1, conversations), max(1, entities), godmode_share, missing_session, days)
+    faults = FaultInjector(seed, latency_ms, jitter_ms, error_rate, error_status)
+    server = ThreadingHTTPServer((host, port), make_handler(store, faults))
+    server.daemon_threads = True
+    server.store = store
+    return server
+
+def main():
+    host = get_option('--host', '127.0.0.1')
+    port = int(get_option('--port', 8788))
+    messages = int(get_option('--messages', 10000))
+
+    print("=" * 80)
+    print("DO STAND-IN SERVER")
+    print("=" * 80)
+    print(f"\n🌱 Seeding {messages:,} messages...")
+
+    started = time.time()
+    server = make_server(
+        host=host,
+        port=port,
+        messages=messages,
+        conversations=int(get_option('--conversations', 500)),
+        entities=int(get_option('--entities', 12)),
+        godmode_share=float(get_option('--godmode-share', 0.05)),
+        missing_session=float(get_option('--missing-session', 0.02)),
+        days=float(get_option('--days', 7)),
+        seed=int(get_option('--seed', 1)),
+        latency_ms=float(get_option('--latency-ms', 0)),
+        jitter_ms=float(get_option('--jitter-ms', 0)),
+        error_rate=float(get_option('--error-rate', 0)),
+        error_status=int(get_option('--error-status', 503)),
+    )
+    _, stats = server.store.stats()
+    print(f"✅ Seeded in {time.time() - started:.1f}s: {len(server.store.keys):,} conversation keys, "
+          f"{stats['recentMessages']:,} messages in the recent cache")
+    print(f"\n🚀 Listening on http://{host}:{port}  (Ctrl+C to stop)")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+
+if __name__ == "__main__":
+    main()
@@ -7,86 +7,612 @@ regardless of which conversation key it's in.
 
 Usage:
     python3 find-latest-do-message.py
+    python3 find-latest-do-message.py --concurrency 16
+    python3 find-latest-do-message.py --concurrency 1     # one request at a time
+
+Options:
+    --concurrency N   Conversations fetched in parallel over one pooled session (default: 8)
+    --retries N       Retries per request on 429/5xx, with exponential backoff (default: 4)
+    --api-base URL    DO worker to query, e.g. a local do-standin-server.py (default: production)
+    --fields a,b      Only keep these message fields (timestamp and id are always kept);
+                      e.g. --fields timestamp,id never decodes text or context
+
+Conversation bodies are parsed incrementally as they stream in, one message
+at a time, so memory stays flat however long a conversation grows.
+
+Watermarks:
+    Per-conversation watermarks (newest timestamp, message count, ETag, newest
+    message) are kept in TEST-SCRIPTS/.do-state/watermarks.json. On repeat runs
+    a known conversation costs one limit=1 probe (a 304 when the server sends
+    ETags) and is only downloaded again when its newest message moved.
+
+    --since-last-run      Ask /api/comments?after= who has posted since the last
+                          run and skip every other known conversation outright,
+                          so the scan costs time proportional to recent activity
+    --watermarks PATH     Use a different watermark file
+    --reset-watermarks    Start from empty watermarks (full fetch, then re-save)
+    --no-watermarks       Fetch every conversation in full and persist nothing
+
+Top-K:
+    --top K               Report the newest K messages instead of just one
+    --by GROUP            Newest K per group: entity, prefix (conv/godmode) or username
+    --payloads            Also print each returned message's full JSON
+
+    Memory stays O(K) per group however many conversations exist: each group
+    keeps a bounded min-heap. Without --by (or with --by prefix) only the newest
+    K of each conversation are requested (limit=K); --by entity and --by
+    username read every conversation in full, so groups that only appear in
+    older messages still rank. Every returned message gets the
+    sessionId/botParams check, and the totals are printed as counts.
 """
 
 import requests
+import heapq
 import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from pathlib import Path
+from requests.adapters import HTTPAdapter
 
 API_BASE = "https://saywhatwant-do-worker.bootloaders.workers.dev"
 
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RETRIES = 4
+FULL_CONVERSATION_LIMIT = 999999    # /api/conversation returns only the newest 100 unless asked for more
+BACKOFF_BASE = 0.5      # seconds, doubled on every retry
+BACKOFF_MAX = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+WATERMARK_FILE = Path(__file__).resolve().parent / '.do-state' / 'watermarks.json'
+DO_RECENT_CACHE_SIZE = 50000    # MessageQueue MAX_CACHE_SIZE: /api/comments?after= can't see further back
+CLOCK_SKEW_MS = 60_000          # slack between this machine's clock and DO timestamps
+STREAM_CHUNK_SIZE = 64 * 1024
+
+def get_option(name, default=None):
+    """Read a value option from argv, accepting both '--name value' and '--name=value'"""
+    for i, arg in enumerate(sys.argv):
+        if arg == name and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+        if arg.startswith(name + '='):
+            return arg.split('=', 1)[1]
+    return default
+
+def make_session(concurrency):
+    """One keep-alive session whose connection pool can serve every worker at once"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, concurrency))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def get_response(session, url, params=None, headers=None, retries=DEFAULT_RETRIES, stream=False):
+    """GET with backoff on 429/5xx (honouring Retry-After when sent); 304 is returned as-is"""
+    for attempt in range(retries + 1):
+        response = session.get(url, params=params, headers=headers, stream=stream)
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            break
+        response.close()
+
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            delay = min(BACKOFF_MAX, float(retry_after))
+        time.sleep(delay)
+
+    if response.status_code != 304:
+        response.raise_for_status()
+    return response
+
+def get_json(session, url, params=None, retries=DEFAULT_RETRIES):
+    return get_response(session, url, params=params, retries=retries).json()
+
+def conversation_params(key):
+    """Split a conv:/godmode: key into /api/conversation query params (None if malformed)"""
+    parts = key.split(':')
+    min_parts = 6 if key.startswith('godmode:') else 5
+    if len(parts) < min_parts:
+        return None
+
+    return {
+        'humanUsername': parts[1],
+        'humanColor': parts[2],
+        'aiUsername': parts[3],
+        'aiColor': parts[4],
+    }
+
+class JsonArrayStream:
+    """
+    Incremental parser for a top-level JSON array of objects.
+
+    feed() takes body chunks of any size and returns the elements completed
+    so far, so only one message is ever held in memory. Given `fields`, only
+    those top-level keys of each object are copied out of the byte stream;
+    everything else (text, context, ...) is skipped without being decoded.
+    String contents and structure are located with bytes.find and a regex
+    scan, so the per-byte work stays in C.
+    """
+
+    STRUCTURAL = re.compile(rb'[][{}",:]')
+
+    def __init__(self, fields=None):
+        self.fields = {f.encode() for f in fields} if fields else None
+        self.depth = 0              # open containers, the top-level array included
+        self.in_string = False
+        self.escape = False
+        self.current = bytearray()  # bytes kept for the element being parsed
+        self.keep = False           # whether bytes at this point are being kept
+        self.filtering = False      # element is an object being reduced to `fields`
+        self.expect_key = False
+        self.key = None             # bytearray while a top-level key is being read
+
+    def _put(self, data):
+        if self.key is not None:
+            self.key += data
+        elif self.keep:
+            self.current += data
+
+    def feed(self, data):
+        done = []
+        pos, end = 0, len(data)
+
+        while pos < end:
+            if self.in_string:
+                if self.escape:
+                    self._put(data[pos:pos + 1])
+                    self.escape = False
+                    pos += 1
+                    continue
+                # memchr-speed scans: the closing quote, or an escape before it
+                quote = data.find(b'"', pos)
+                backslash = data.find(b'\\', pos, end if quote < 0 else quote)
+                stop = backslash if backslash >= 0 else quote
+                if stop < 0:
+                    self._put(data[pos:])
+                    break
+                self._put(data[pos:stop])
+                pos = stop + 1
+                if stop == backslash:
+                    self._put(b'\\')
+                    self.escape = True
+                elif self.key is not None:
+                    self.in_string = False
+                else:
+                    self._put(b'"')
+                    self.in_string = False
+                continue
+
+            m = self.STRUCTURAL.search(data, pos)
+            if not m:
+                if self.depth >= 2:
+                    self._put(data[pos:])
+                break
+            if self.depth >= 2:
+                self._put(data[pos:m.start()])
+            pos = m.end()
+            c = m.group()
+
+            if c in (b'[', b'{'):
+                if self.depth == 1:
+                    self.current = bytearray(c)
+                    self.filtering = self.fields is not None and c == b'{'
+                    self.keep = not self.filtering
+                    self.expect_key = self.filtering
+                elif self.depth >= 2:
+                    self._put(c)
+                self.depth += 1
+            elif c in (b']', b'}'):
+                self.depth -= 1
+                if self.depth == 1:
+                    if self.filtering:
+                        if self.current.endswith(b','):
+                            del self.current[-1]
+                        self.current += b'}'
+                    else:
+                        self.current += c
+                    done.append(json.loads(self.current))
+                    self.current = bytearray()
+                    self.keep = False
+                    self.filtering = False
+                elif self.depth >= 2:
+                    self._put(c)
+            elif c == b'"':
+                self.in_string = True
+                if self.filtering and self.depth == 2 and self.expect_key:
+                    self.key = bytearray()
+                else:
+                    self._put(c)
+            elif self.filtering and self.depth == 2 and c == b':':
+                self.keep = bytes(self.key) in self.fields
+                if self.keep:
+                    self.current += b'"' + self.key + b'":'
+                self.key = None
+                self.expect_key = False
+            elif self.filtering and self.depth == 2 and c == b',':
+                if self.keep:
+                    self.current += b','
+                self.keep = False
+                self.expect_key = True
+            elif self.depth >= 2:
+                self._put(c)
+
+        return done
+
+def fetch_conversation(session, key, retries, limit=None, fields=None):
+    """
+    Yield a conversation's messages one at a time, parsed straight off the
+    HTTP body. Memory stays flat however long the conversation is; with
+    `fields` the messages only carry those keys.
+    """
+    params = conversation_params(key)
+    if limit:
+        params['limit'] = limit
+
+    response = get_response(session, f"{API_BASE}/api/conversation", params=params,
+                            retries=retries, stream=True)
+    parser = JsonArrayStream(fields)
+    with response:
+        for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+            yield from parser.feed(chunk)
+
+def summarize_conversation(messages, etag=None):
+    """Reduce a conversation to its watermark: newest message, its timestamp, and the count"""
+    latest = None
+    max_timestamp = 0
+    count = 0
+    for msg in messages or []:
+        count += 1
+        if msg['timestamp'] > max_timestamp:
+            max_timestamp = msg['timestamp']
+            latest = msg
+
+    return {
+        'max_timestamp': max_timestamp,
+        'count': count,
+        'etag': etag,
+        'latest': latest,
+    }
+
+class WatermarkStore:
+    """
+    Per-conversation watermarks persisted between runs.
+
+    Each conv:/godmode: key maps to the newest timestamp and message count seen
+    last time, the ETag of the last revalidation probe, and the newest message
+    itself, so an unchanged conversation never has to be downloaded again.
+    """
+
+    def __init__(self, path, api_base, fields=None):
+        self.path = Path(path)
+        self.api_base = api_base
+        self.fields = fields
+        self.marks = {}
+        self.global_max = 0
+        self.last_run_started = 0
+
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text())
+                # Newest messages saved under a different --fields are a different shape
+                if data.get('apiBase') == api_base and data.get('fields') == fields:
+                    self.marks = data.get('keys', {})
+                    self.global_max = data.get('globalMax', 0)
+                    self.last_run_started = data.get('lastRunStarted', 0)
+            except (OSError, ValueError):
+                pass
+
+    def get(self, key):
+        return self.marks.get(key)
+
+    def put(self, key, entry):
+        self.marks[key] = entry
+
+    def prune(self, live_keys):
+        """Forget conversations that no longer exist in DO storage"""
+        live = set(live_keys)
+        for key in [k for k in self.marks if k not in live]:
+            del self.marks[key]
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        tmp.write_text(json.dumps({
+            'apiBase': self.api_base,
+            'fields': self.fields,
+            'globalMax': self.global_max,
+            'lastRunStarted': self.last_run_started,
+            'keys': self.marks,
+        }))
+        os.replace(tmp, self.path)
+
+def scan_conversation(session, key, mark, retries, fields=None):
+    """
+    Return (status, watermark) for one conversation.
+
+    Known conversations are revalidated with a limit=1 probe (conditional on the
+    stored ETag when there is one); only when the newest message moved is the
+    whole conversation downloaded again - all of it, not the newest 100
+    /api/conversation returns by default, so the stored count is exact.
+    """
+    def fetch_all():
+        return fetch_conversation(session, key, retries, limit=FULL_CONVERSATION_LIMIT, fields=fields)
+
+    if mark is None:
+        return 'new', summarize_conversation(fetch_all())
+
+    headers = {'If-None-Match': mark['etag']} if mark.get('etag') else None
+    params = {**conversation_params(key), 'limit': 1}
+    response = get_response(session, f"{API_BASE}/api/conversation", params=params, headers=headers, retries=retries)
+    if response.status_code == 304:
+        return 'unchanged', mark
+
+    probe = response.json() or []
+    etag = response.headers.get('ETag')
+    newest = max((m['timestamp'] for m in probe), default=0)
+    if newest <= mark['max_timestamp'] and bool(probe) == bool(mark['count']):
+        return 'unchanged', {**mark, 'etag': etag}
+
+    return 'changed', summarize_conversation(fetch_all(), etag)
+
+def find_active_keys(session, keys, since, retries):
+    """
+    Keys with a participant who posted after `since`, from the DO's recent
+    message cache. Returns None when the cache can't vouch for the whole window.
+    """
+    data = get_json(session, f"{API_BASE}/api/comments", params={'after': since}, retries=retries)
+    messages = data.get('messages', []) if isinstance(data, dict) else data
+    if len(messages) >= DO_RECENT_CACHE_SIZE:
+        return None
+
+    posters = {(m.get('username'), m.get('color')) for m in messages}
+    active = set()
+    for key in keys:
+        params = conversation_params(key)
+        if ((params['humanUsername'], params['humanColor']) in posters or
+                (params['aiUsername'], params['aiColor']) in posters):
+            active.add(key)
+    return active
+
+def iter_conversations(keys, concurrency, task):
+    """
+    Yield (index, key, task(key)) as each conversation is processed.
+
+    Results come back in completion order, not key order; index is the key's
+    position so callers can break ties exactly as a sequential scan would.
+    """
+    keys = [(i, k) for i, k in enumerate(keys) if conversation_params(k)]
+
+    if concurrency <= 1:
+        for index, key in keys:
+            yield index, key, task(key)
+        return
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(task, key): (index, key) for index, key in keys}
+        for future in as_completed(futures):
+            index, key = futures[future]
+            yield index, key, future.result()
+
+GROUPERS = {
+    'entity': lambda key, msg: (msg.get('botParams') or {}).get('entity') or '(none)',
+    'prefix': lambda key, msg: key.split(':', 1)[0],
+    'username': lambda key, msg: msg.get('username') or '(none)',
+}
+
+class TopK:
+    """
+    The K newest messages seen so far, held in a bounded min-heap.
+
+    Ordering matches the single-message scan: newer timestamp first, then
+    earlier key, then earlier position within the conversation. A message
+    listed under several keys is only counted once.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self.heap = []
+        self.ids = set()
+
+    def offer(self, msg, key, index, position):
+        if msg['id'] in self.ids:
+            return
+        entry = (msg['timestamp'], -index, -position, key, msg)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry[:3] > self.heap[0][:3]:
+            evicted = heapq.heapreplace(self.heap, entry)
+            self.ids.discard(evicted[4]['id'])
+        else:
+            return
+        self.ids.add(msg['id'])
+
+    def newest_first(self):
+        """[(key, msg), ...] newest first"""
+        return [(e[3], e[4]) for e in sorted(self.heap, key=lambda e: e[:3], reverse=True)]
+
+def find_top_k(session, keys, k, group_by, concurrency, retries, fields=None):
+    """Stream every conversation through per-group TopK heaps: {group: [(key, msg), ...]}"""
+    grouper = GROUPERS.get(group_by, lambda key, msg: None)
+    # Grouping by a key-level field can't be starved by other groups' messages;
+    # per-message groups need the whole conversation, not the server's newest 100
+    limit = k if group_by in (None, 'prefix') else FULL_CONVERSATION_LIMIT
+
+    def task(key):
+        # Reduce inside the worker so a conversation is never held whole
+        local = {}
+        for position, msg in enumerate(fetch_conversation(session, key, retries, limit=limit, fields=fields)):
+            group = grouper(key, msg)
+            if group not in local:
+                local[group] = TopK(k)
+            local[group].offer(msg, key, 0, position)
+        return local
+
+    groups = {}
+    for index, key, local in iter_conversations(keys, concurrency, task):
+        for group, top in local.items():
+            if group not in groups:
+                groups[group] = TopK(k)
+            for _, _, neg_position, _, msg in top.heap:
+                groups[group].offer(msg, key, index, -neg_position)
+
+    return {group: top.newest_first() for group, top in groups.items()}
+
+def print_top_k(results, k, group_by, show_payloads):
+    print("\n" + "=" * 80)
+    print(f"NEWEST {k} MESSAGE(S)" + (f" PER {group_by.upper()}" if group_by else ""))
+    print("=" * 80)
+
+    present = missing = no_bot_params = 0
+    ordered = sorted(results.items(), key=lambda g: g[1][0][1]['timestamp'], reverse=True)
+    for group, entries in ordered:
+        if group_by:
+            print(f"\n[{group}] {len(entries)} message(s)")
+
+        for key, msg in entries:
+            dt = datetime.fromtimestamp(msg['timestamp'] / 1000)
+            bp = msg.get('botParams')
+            if bp is None:
+                no_bot_params += 1
+                status = "❌ No botParams"
+            elif 'sessionId' in bp:
+                present += 1
+                status = f"✅ sessionId {bp['sessionId']}"
+            else:
+                missing += 1
+                status = "❌ sessionId MISSING"
+
+            print(f"\n  {msg['timestamp']}  {dt.strftime('%I:%M %p %B %d, %Y')}  {key}")
+            print(f"    ID: {msg['id']}  Username: {msg.get('username')}  {status}")
+            print(f"    Text: {(msg.get('text') or '')[:100]}...")
+            if show_payloads:
+                print(json.dumps(msg, indent=2))
+
+    total = present + missing + no_bot_params
+    print(f"\n{'=' * 80}")
+    print("SESSIONID REPORT:")
+    print("=" * 80)
+    if total:
+        print(f"  Messages checked:  {total}")
+        print(f"  ✅ sessionId present:  {present}")
+        print(f"  ❌ sessionId missing:  {missing}")
+        print(f"  ❌ No botParams:       {no_bot_params}")
+    else:
+        print("\n❌ No messages found in any conversation!")
+
+    print("\n" + "=" * 80)
+
 def main():
+    global API_BASE
+    API_BASE = get_option('--api-base', API_BASE).rstrip('/')
+    concurrency = int(get_option('--concurrency', DEFAULT_CONCURRENCY))
+    retries = int(get_option('--retries', DEFAULT_RETRIES))
+    use_watermarks = '--no-watermarks' not in sys.argv
+    since_last_run = '--since-last-run' in sys.argv
+    top_k = max(1, int(get_option('--top', 1)))
+    group_by = get_option('--by')
+    if group_by and group_by not in GROUPERS:
+        print(f"❌ --by must be one of: {', '.join(GROUPERS)}")
+        sys.exit(1)
+
+    fields = get_option('--fields')
+    if fields:
+        # The reduction itself always needs timestamp and id (and the grouping field)
+        fields = {f.strip() for f in fields.split(',') if f.strip()} | {'timestamp', 'id'}
+        fields |= {'entity': {'botParams'}, 'username': {'username'}}.get(group_by, set())
+        fields = sorted(fields)
+    session = make_session(concurrency)
+    run_started = int(time.time() * 1000)
+
+    store = None
+    if use_watermarks:
+        store = WatermarkStore(get_option('--watermarks', WATERMARK_FILE), API_BASE, fields)
+        if '--reset-watermarks' in sys.argv:
+            store.marks, store.global_max = {}, 0
+
     print("=" * 80)
     print("FINDING LATEST MESSAGE IN DO STORAGE")
     print("=" * 80)
-    
+
     # Step 1: Get ALL conversation keys
     print("\n1. Listing ALL DO keys...")
-    keys_response = requests.get(f"{API_BASE}/api/admin/list-keys")
-    all_keys = keys_response.json().get('keys', [])
-    
+    all_keys = get_json(session, f"{API_BASE}/api/admin/list-keys", retries=retries).get('keys', [])
+
     conv_keys = [k for k in all_keys if k.startswith('conv:')]
     godmode_keys = [k for k in all_keys if k.startswith('godmode:')]
-    
+
     print(f"   Total keys: {len(all_keys)}")
     print(f"   conv: keys: {len(conv_keys)}")
     print(f"   godmode: keys: {len(godmode_keys)}")
-    
+
     # Step 2: Query each conversation key and find latest message
     print("\n2. Searching ALL conversations for newest message...")
-    
+
+    if godmode_keys:
+        print(f"\n   Found {len(godmode_keys)} godmode: keys to check...")
+
+    keys = conv_keys + godmode_keys
+
+    if top_k > 1 or group_by:
+        results = find_top_k(session, keys, top_k, group_by, concurrency, retries, fields)
+        print_top_k(results, top_k, group_by, '--payloads' in sys.argv)
+        return
+
+    active_keys = None
+    if store and since_last_run and store.marks:
+        since = min(store.global_max, store.last_run_started - CLOCK_SKEW_MS)
+        active_keys = find_active_keys(session, [k for k in keys if conversation_params(k)], since, retries)
+        if active_keys is None:
+            print("\n   ⚠️  Too much activity since last run for the recent cache - revalidating everything")
+
+    def task(key):
+        if store is None:
+            return 'new', summarize_conversation(fetch_conversation(session, key, retries, fields=fields))
+        mark = store.get(key)
+        if active_keys is not None and mark is not None and key not in active_keys:
+            return 'skipped', mark
+        return scan_conversation(session, key, mark, retries, fields)
+
+    # Streaming reduction: keep only the running newest message. On equal
+    # timestamps the earliest key (conv: before godmode:) wins, as it did
+    # when keys were scanned one after another.
     latest_message = None
     latest_timestamp = 0
+    latest_index = None
     source_key = None
-    
-    # Check conv: keys
-    for key in conv_keys:
-        # Parse key to get conversation params
-        parts = key.split(':')
-        if len(parts) >= 5:
-            human_user, human_color, ai_user, ai_color = parts[1], parts[2], parts[3], parts[4]
-            
-            # Query this conversation
-            conv_url = f"{API_BASE}/api/conversation?humanUsername={human_user}&humanColor={human_color}&aiUsername={ai_user}&aiColor={ai_color}"
-            conv_response = requests.get(conv_url)
-            messages = conv_response.json()
-            
-            # Find latest in this conversation
-            if messages:
-                for msg in messages:
-                    if msg['timestamp'] > latest_timestamp:
-                        latest_timestamp = msg['timestamp']
-                        latest_message = msg
-                        source_key = key
-    
-    # Check godmode: keys (if any exist)
-    if godmode_keys:
-        print(f"\n   Found {len(godmode_keys)} godmode: keys to check...")
-        for key in godmode_keys:
-            parts = key.split(':')
-            if len(parts) >= 6:
-                human_user, human_color, ai_user, ai_color = parts[1], parts[2], parts[3], parts[4]
-                
-                conv_url = f"{API_BASE}/api/conversation?humanUsername={human_user}&humanColor={human_color}&aiUsername={ai_user}&aiColor={ai_color}"
-                conv_response = requests.get(conv_url)
-                messages = conv_response.json()
-                
-                if messages:
-                    for msg in messages:
-                        if msg['timestamp'] > latest_timestamp:
-                            latest_timestamp = msg['timestamp']
-                            latest_message = msg
-                            source_key = key
-    
+    statuses = {'new': 0, 'changed': 0, 'unchanged': 0, 'skipped': 0}
+
+    for index, key, (status, mark) in iter_conversations(keys, concurrency, task):
+        statuses[status] += 1
+        if store:
+            store.put(key, mark)
+
+        ts = mark['max_timestamp']
+        if mark['latest'] and (ts > latest_timestamp or (ts == latest_timestamp and latest_index is not None and index < latest_index)):
+            latest_timestamp = ts
+            latest_message = mark['latest']
+            latest_index = index
+            source_key = key
+
+    if store:
+        store.prune(keys)
+        store.global_max = latest_timestamp
+        store.last_run_started = run_started
+        store.save()
+        print(f"\n   Watermarks: {statuses['new']} new, {statuses['changed']} changed, "
+              f"{statuses['unchanged']} unchanged, {statuses['skipped']} skipped")
+
     # Step 3: Display result
     print("\n" + "=" * 80)
     print("LATEST MESSAGE FOUND")
     print("=" * 80)
-    
+
     if latest_message:
         # Convert timestamp to readable date
         dt = datetime.fromtimestamp(latest_timestamp / 1000)
-        
+
         print(f"\nTimestamp: {latest_timestamp}")
         print(f"Date: {dt.strftime('%I:%M %p %B %d, %Y')}")
         print(f"Source Key: {source_key}")
@@ -94,33 +620,32 @@ def main():
         print("FULL MESSAGE PAYLOAD:")
         print("=" * 80)
         print(json.dumps(latest_message, indent=2))
-        
+
         # Highlight key fields
         print(f"\n{'=' * 80}")
         print("KEY FIELDS:")
         print("=" * 80)
         print(f"  ID: {latest_message['id']}")
-        print(f"  Username: {latest_message['username']}")
-        print(f"  Text: {latest_message['text'][:100]}...")
-        
+        print(f"  Username: {latest_message.get('username')}")
+        print(f"  Text: {latest_message.get('text', '')[:100]}...")
+
         if 'botParams' in latest_message:
             bp = latest_message['botParams']
             print(f"\n  botParams:")
             for key, value in bp.items():
                 print(f"    {key}: {value}")
-            
+
             if 'sessionId' in bp:
                 print(f"\n  ✅ sessionId PRESENT: {bp['sessionId']}")
             else:
                 print(f"\n  ❌ sessionId MISSING")
         else:
             print(f"\n  ❌ No botParams")
-            
+
     else:
         print("\n❌ No messages found in any conversation!")
-    
+
     print("\n" + "=" * 80)
 
 if __name__ == "__main__":
     main()
-
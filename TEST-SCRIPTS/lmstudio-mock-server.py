@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+"""
+LM Studio Mock Server - Offline Replacement for an LM Studio Host
+
+A local, stdlib-only HTTP server that behaves like the LM Studio server the
+bot and the test scripts talk to, with a configurable load and generation
+model, so the loading race can be reproduced without the box on 10.0.0.100:
+
+    GET  /api/v0/models             every model, state not-loaded | loading | loaded
+    GET  /api/v0/models/{id}
+    GET  /v1/models                 OpenAI-style list
+    POST /v1/chat/completions       streaming (SSE) and non-streaming
+    POST /api/v0/chat/completions   same, plus LM Studio's stats/model_info/runtime blocks
+    POST /api/v1/models/load        {model} - blocks until loaded
+    POST /api/v1/models/unload      {instance_id} (or {model}, or {} for all)
+    GET  /mock/stats                loads, evictions, JIT loads, dropped requests
+
+Load and generation model:
+    - A model's size is --params-b billion parameters × bytes per parameter
+      of its quantization (f32 4, f16 2, q8_0 ~1.06, q4_k_m ~0.6)
+    - Loading takes --load-base-s + size × --load-s-per-gb seconds (± --load-jitter)
+    - Loaded models share --memory-gb and at most --max-loaded slots; loading
+      one that does not fit evicts the least recently used idle models
+    - A request for an unloaded model loads it on demand (JIT) unless --no-jit;
+      with --drop-during-load, requests that arrive while the model is still
+      loading fail instead of waiting for it
+    - Time to first token is prompt tokens / --prompt-tokens-per-s; tokens then
+      follow at --tokens-per-s for a q8_0 model, scaled by size
+      (generation is memory-bandwidth bound, so f32 is ~4x slower)
+    - Each model generates for at most --parallel requests at a time; the rest queue
+    - With --idle-ttl, JIT-loaded models unload after that many idle seconds
+
+Usage:
+    python3 lmstudio-mock-server.py
+    python3 lmstudio-mock-server.py --memory-gb 8 --load-s-per-gb 3 --drop-during-load
+
+    python3 ../test/test-lmstudio-direct.py --lmstudio-host 127.0.0.1:1234
+    python3 ../test/test-model-loading.py --lmstudio-host 127.0.0.1:1234 --api-url ...
+
+    # No PM2 bot or DO worker at all: the in-process DO stand-in plus
+    # test-queue-load.py's simulated bot, which generates through this mock
+    python3 ../test/test-model-loading.py --lmstudio-host 127.0.0.1:1234 --offline --runs 1 --pause 0
+
+Options:
+    --host HOST              Bind address (default: 127.0.0.1)
+    --port N                 Port (default: 1234)
+    --models a@f32,b@q8_0    Model ids served (default: dystopian-survival-guide and two
+                             tsc- entities, each as f32, f16 and q8_0)
+    --params-b F             Parameters per model, billions (default: 1.0)
+    --memory-gb F            Memory shared by loaded models (default: 16)
+    --max-loaded N           Resident model slots, 0 = memory limit only (default: 0)
+    --load-base-s F          Fixed part of a load (default: 1.0)
+    --load-s-per-gb F        Per-GB part of a load (default: 1.5)
+    --load-jitter F          Uniform +/- fraction on load time (default: 0.1)
+    --tokens-per-s F         Generation speed of a q8_0 model (default: 60)
+    --prompt-tokens-per-s F  Prompt processing speed (default: 1500)
+    --completion-tokens N    Tokens per reply, capped by max_tokens (default: 120)
+    --parallel N             Concurrent generations per model (default: 1)
+    --no-jit                 Reject requests for models that are not loaded
+    --drop-during-load       Fail requests that arrive while their model is loading
+    --idle-ttl S             Auto-unload JIT-loaded models after S idle seconds (default: off)
+    --seed N                 RNG seed for load jitter and reply text (default: 1)
+"""
+
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+DEFAULT_MODELS = [f"{name}@{quant}"
+                  for name in ('dystopian-survival-guide', 'tsc-the-odyssey-by-homer', 'tsc-ulysses-by-james-joyce')
+                  for quant in ('f32', 'f16', 'q8_0')]
+
+BYTES_PER_PARAM = {'f32': 4.0, 'f16': 2.0, 'bf16': 2.0, 'q8_0': 1.06, 'q6_k': 0.82,
+                   'q5_k_m': 0.71, 'q4_k_m': 0.6, 'q4_0': 0.56}
+
+WORDS = ("water shelter fire signal ration filter ridge north wind cache rope knife "
+         "silence dusk patrol radio scavenge boots map trust move quietly keep low").split()
+
+def get_option(name, default=None):
+    """Read a value option from argv, accepting both '--name value' and '--name=value'"""
+    for i, arg in enumerate(sys.argv):
+        if arg == name and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+        if arg.startswith(name + '='):
+            return arg.split('=', 1)[1]
+    return default
+
+class MockModel:
+    def __init__(self, model_id, params_b, parallel):
+        self.id = model_id
+        self.name, _, quant = model_id.partition('@')
+        self.quantization = quant or 'q8_0'
+        self.size_gb = params_b * BYTES_PER_PARAM.get(self.quantization.lower(), 1.0)
+        self.state = 'not-loaded'
+        self.instance_id = None
+        self.jit = False
+        self.last_used = 0.0
+        self.active = 0                     # requests generating or queued on this model
+        self.loaded = threading.Event()     # set when a load finishes (either way)
+        self.cancel = threading.Event()     # set by unload to abort a load in progress
+        self.slots = threading.Semaphore(parallel)
+
+    def as_dict(self):
+        info = {
+            'id': self.id,
+            'object': 'model',
+            'type': 'llm',
+            'publisher': 'mock',
+            'arch': 'llama',
+            'compatibility_type': 'gguf',
+            'quantization': self.quantization.upper(),
+            'state': self.state,
+            'max_context_length': 4096,
+        }
+        if self.state == 'loaded':
+            info['loaded_context_length'] = 4096
+        return info
+
+class ModelHost:
+    """Loaded-model bookkeeping: memory, slots, LRU eviction, JIT, idle TTL"""
+
+    def __init__(self, rng, model_ids, params_b=1.0, memory_gb=16.0, max_loaded=0,
+                 load_base_s=1.0, load_s_per_gb=1.5, load_jitter=0.1, tokens_per_s=60.0,
+                 prompt_tokens_per_s=1500.0, completion_tokens=120, parallel=1,
+                 jit=True, drop_during_load=False, idle_ttl=0):
+        self.rng = rng
+        self.lock = threading.Lock()
+        self.models = {m: MockModel(m, params_b, parallel) for m in model_ids}
+        self.memory_gb = memory_gb
+        self.max_loaded = max_loaded
+        self.load_base_s = load_base_s
+        self.load_s_per_gb = load_s_per_gb
+        self.load_jitter = load_jitter
+        self.tokens_per_s = tokens_per_s
+        self.prompt_tokens_per_s = prompt_tokens_per_s
+        self.completion_tokens = completion_tokens
+        self.jit = jit
+        self.drop_during_load = drop_during_load
+        self.idle_ttl = idle_ttl
+        self.counters = {'loads': 0, 'jitLoads': 0, 'unloads': 0, 'evictions': 0, 'ttlUnloads': 0,
+                         'requests': 0, 'dropped': 0, 'rejected': 0, 'aborted': 0}
+        if idle_ttl:
+            threading.Thread(target=self._expire_idle, daemon=True).start()
+
+    # ---- bookkeeping (callers hold self.lock) ----
+
+    def _resident(self):
+        return [m for m in self.models.values() if m.state in ('loading', 'loaded')]
+
+    def _make_room(self, model):
+        """Evict LRU idle models until `model` fits; False if it never can"""
+        while True:
+            resident = self._resident()
+            used = sum(m.size_gb for m in resident)
+            fits_memory = used + model.size_gb <= self.memory_gb
+            fits_slots = not self.max_loaded or len(resident) < self.max_loaded
+            if fits_memory and fits_slots:
+                return True
+            idle = [m for m in resident if m.state == 'loaded' and m.active == 0]
+            if not idle:
+                return False
+            victim = min(idle, key=lambda m: m.last_used)
+            self._unload(victim)
+            self.counters['evictions'] += 1
+
+    def _unload(self, model):
+        if model.state == 'loading':
+            model.cancel.set()
+        model.state = 'not-loaded'
+        model.instance_id = None
+        model.jit = False
+        model.loaded.set()
+        self.counters['unloads'] += 1
+
+    def load_seconds(self, model):
+        base = self.load_base_s + model.size_gb * self.load_s_per_gb
+        with self.lock:
+            jitter = self.rng.uniform(-self.load_jitter, self.load_jitter) if self.load_jitter else 0
+        return max(0.0, base * (1 + jitter))
+
+    # ---- operations ----
+
+    def load(self, model_id, jit=False):
+        """Load (or wait for an in-progress load); returns (status, payload)"""
+        model = self.models.get(model_id)
+        if not model:
+            return 404, {'error': f"Model '{model_id}' not found"}
+
+        with self.lock:
+            if model.state == 'loaded':
+                model.last_used = time.time()
+                return 200, self._load_result(model, 0.0)
+            owner = model.state == 'not-loaded'
+            if owner:
+                if not self._make_room(model):
+                    self.counters['rejected'] += 1
+                    return 507, {'error': f"Not enough memory to load '{model_id}' "
+                                          f"({model.size_gb:.1f}GB, {self.memory_gb:g}GB total, all resident models busy)"}
+                model.state = 'loading'
+                model.jit = jit
+                model.loaded.clear()
+                model.cancel.clear()
+                self.counters['loads'] += 1
+                if jit:
+                    self.counters['jitLoads'] += 1
+
+        started = time.time()
+        if owner:
+            cancelled = model.cancel.wait(self.load_seconds(model))
+            with self.lock:
+                if not cancelled and model.state == 'loading':
+                    model.state = 'loaded'
+                    model.instance_id = model.id
+                    model.last_used = time.time()
+                model.loaded.set()
+        else:
+            model.loaded.wait()
+
+        with self.lock:
+            if model.state != 'loaded':
+                return 500, {'error': f"Model '{model_id}' was unloaded while loading"}
+            return 200, self._load_result(model, time.time() - started)
+
+    def _load_result(self, model, seconds):
+        return {'type': 'llm', 'instance_id': model.instance_id, 'status': 'loaded',
+                'load_time_seconds': round(seconds, 3)}
+
+    def unload(self, model_id=None):
+        with self.lock:
+            targets = [self.models[model_id]] if model_id in self.models else (
+                [] if model_id else self._resident())
+            if model_id and not targets:
+                return 404, {'error': f"Model '{model_id}' not found"}
+            for model in targets:
+                if model.state != 'not-loaded':
+                    self._unload(model)
+        return 200, {'unloaded': [m.id for m in targets]}
+
+    def _expire_idle(self):
+        while True:
+            time.sleep(min(1.0, self.idle_ttl / 2))
+            now = time.time()
+            with self.lock:
+                for model in self.models.values():
+                    if model.state == 'loaded' and model.jit and model.active == 0 \
+                            and now - model.last_used > self.idle_ttl:
+                        self._unload(model)
+                        self.counters['ttlUnloads'] += 1
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def list_models(self):
+        with self.lock:
+            return [m.as_dict() for m in self.models.values()]
+
+    def get_model(self, model_id):
+        with self.lock:
+            model = self.models.get(model_id)
+            return (200, model.as_dict()) if model else (404, {'error': f"Model '{model_id}' not found"})
+
+    def stats(self):
+        with self.lock:
+            resident = self._resident()
+            return dict(self.counters,
+                        memoryUsedGb=round(sum(m.size_gb for m in resident), 2),
+                        memoryGb=self.memory_gb,
+                        resident={m.id: m.state for m in resident})
+
+    def acquire(self, model_id):
+        """
+        Get a model ready to generate: JIT-load it if needed, then take one of
+        its generation slots. Returns (model, None) or (None, (status, payload)).
+        """
+        model = self.models.get(model_id)
+        if not model:
+            return None, (404, {'error': f"Model '{model_id}' not found"})
+        with self.lock:
+            self.counters['requests'] += 1
+            if model.state == 'loading' and self.drop_during_load:
+                self.counters['dropped'] += 1
+                return None, (503, {'error': f"Model '{model_id}' is loading"})
+            if model.state == 'not-loaded' and not self.jit:
+                self.counters['rejected'] += 1
+                return None, (404, {'error': f"Model '{model_id}' is not loaded (JIT loading disabled)"})
+            model.active += 1
+
+        if model.state != 'loaded':
+            status, payload = self.load(model_id, jit=True)
+            if status != 200:
+                with self.lock:
+                    model.active -= 1
+                return None, (status, payload)
+        model.slots.acquire()
+        return model, None
+
+    def release(self, model):
+        model.slots.release()
+        with self.lock:
+            model.active -= 1
+            model.last_used = time.time()
+
+    def token_interval(self, model):
+        """Seconds per generated token - --tokens-per-s scaled by size relative to q8_0"""
+        bytes_per_param = BYTES_PER_PARAM.get(model.quantization.lower(), 1.0)
+        return bytes_per_param / (BYTES_PER_PARAM['q8_0'] * self.tokens_per_s)
+
+    def reply_words(self, count):
+        with self.lock:
+            return [self.rng.choice(WORDS) for _ in range(count)]
+
+def prompt_tokens(messages):
+    """Rough token count: ~4 characters per token"""
+    return max(1, sum(len(str(m.get('content', ''))) for m in messages) // 4)
+
+def make_handler(host):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out as separate writes; without this, Nagle plus
+        # delayed ACK adds ~40ms to every keep-alive response
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def read_json(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            return json.loads(self.rfile.read(length) or b'{}') if length else {}
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path == '/api/v0/models':
+                self.send_json(200, {'object': 'list', 'data': host.list_models()})
+            elif path.startswith('/api/v0/models/'):
+                self.send_json(*host.get_model(unquote(path[len('/api/v0/models/'):])))
+            elif path == '/v1/models':
+                self.send_json(200, {'object': 'list', 'data': [
+                    {'id': m['id'], 'object': 'model', 'owned_by': 'organization_owner'}
+                    for m in host.list_models()]})
+            elif path == '/mock/stats':
+                self.send_json(200, host.stats())
+            else:
+                self.send_json(404, {'error': 'Not found'})
+
+        def do_POST(self):
+            path = urlparse(self.path).path
+            try:
+                body = self.read_json()
+            except ValueError as e:
+                self.send_json(400, {'error': f"Invalid JSON: {e}"})
+                return
+
+            if path in ('/v1/chat/completions', '/api/v0/chat/completions'):
+                self.chat(body, rest_api=path.startswith('/api/v0'))
+            elif path == '/api/v1/models/load':
+                self.send_json(*host.load(body.get('model')))
+            elif path == '/api/v1/models/unload':
+                self.send_json(*host.unload(body.get('instance_id') or body.get('model')))
+            else:
+                self.send_json(404, {'error': 'Not found'})
+
+        def chat(self, body, rest_api):
+            messages = body.get('messages') or []
+            model, error = host.acquire(body.get('model'))
+            if error:
+                self.send_json(*error)
+                return
+            try:
+                if body.get('stream'):
+                    self.stream_reply(model, body, messages)
+                else:
+                    self.full_reply(model, body, messages, rest_api)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                host.release(model)
+
+        def plan(self, model, body, messages):
+            n_prompt = prompt_tokens(messages)
+            max_tokens = body.get('max_tokens')
+            n_completion = host.completion_tokens
+            if isinstance(max_tokens, int) and max_tokens > 0:
+                n_completion = min(n_completion, max_tokens)
+            finish = 'length' if n_completion < host.completion_tokens else 'stop'
+            return n_prompt, n_completion, finish, n_prompt / host.prompt_tokens_per_s
+
+        def full_reply(self, model, body, messages, rest_api):
+            n_prompt, n_completion, finish, ttft = self.plan(model, body, messages)
+            interval = host.token_interval(model)
+            time.sleep(ttft)
+            generated = 0
+            started = time.time()
+            while generated < n_completion and model.state == 'loaded':
+                time.sleep(interval)
+                generated += 1
+            if generated < n_completion:
+                host.count('aborted')
+                self.send_json(500, {'error': f"Model '{model.id}' was unloaded during generation"})
+                return
+            generation_time = time.time() - started
+
+            result = {
+                'id': f"chatcmpl-{uuid.uuid4().hex[:20]}",
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': model.id,
+                'choices': [{'index': 0, 'logprobs': None, 'finish_reason': finish,
+                             'message': {'role': 'assistant',
+                                         'content': ' '.join(host.reply_words(n_completion))}}],
+                'usage': {'prompt_tokens': n_prompt, 'completion_tokens': n_completion,
+                          'total_tokens': n_prompt + n_completion},
+                'system_fingerprint': model.id,
+            }
+            if rest_api:
+                result['stats'] = {
+                    'tokens_per_second': round(n_completion / generation_time, 3) if generation_time else None,
+                    'time_to_first_token': round(ttft, 3),
+                    'generation_time': round(generation_time, 3),
+                    'stop_reason': 'eosFound' if finish == 'stop' else 'maxPredictedTokensReached',
+                }
+                result['model_info'] = {'arch': 'llama', 'quant': model.quantization.upper(),
+                                        'format': 'gguf', 'context_length': 4096}
+                result['runtime'] = {'name': 'mock-llama.cpp', 'version': '1.0.0',
+                                     'supported_formats': ['gguf']}
+            self.send_json(200, result)
+
+        def write_chunk(self, data):
+            payload = f"data: {data}\n\n".encode()
+            self.wfile.write(f"{len(payload):x}\r\n".encode() + payload + b"\r\n")
+            self.wfile.flush()
+
+        def stream_reply(self, model, body, messages):
+            n_prompt, n_completion, finish, ttft = self.plan(model, body, messages)
+            interval = host.token_interval(model)
+            chunk_id = f"chatcmpl-{uuid.uuid4().hex[:20]}"
+
+            def chunk(delta, finish_reason=None, usage=None):
+                data = {'id': chunk_id, 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                        'model': model.id, 'system_fingerprint': model.id,
+                        'choices': [] if usage else [{'index': 0, 'delta': delta, 'logprobs': None,
+                                                      'finish_reason': finish_reason}]}
+                if usage:
+                    data['usage'] = usage
+                self.write_chunk(json.dumps(data))
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+
+            time.sleep(ttft)
+            chunk({'role': 'assistant', 'content': ''})
+            words = host.reply_words(n_completion)
+            for i, word in enumerate(words):
+                if model.state != 'loaded':
+                    # Like a model unloaded mid-generation: the stream just ends, no [DONE]
+                    host.count('aborted')
+                    self.wfile.write(b"0\r\n\r\n")
+                    return
+                chunk({'content': word if i == 0 else ' ' + word})
+                time.sleep(interval)
+            chunk({}, finish_reason=finish)
+            if (body.get('stream_options') or {}).get('include_usage'):
+                chunk(None, usage={'prompt_tokens': n_prompt, 'completion_tokens': n_completion,
+                                   'total_tokens': n_prompt + n_completion})
+            self.write_chunk('[DONE]')
+            self.wfile.write(b"0\r\n\r\n")
+
+    return Handler
+
+def make_server(host='127.0.0.1', port=1234, models=None, params_b=1.0, memory_gb=16.0, max_loaded=0,
+                load_base_s=1.0, load_s_per_gb=1.5, load_jitter=0.1, tokens_per_s=60.0,
+                prompt_tokens_per_s=1500.0, completion_tokens=120, parallel=1, jit=True,
+                drop_during_load=False, idle_ttl=0, seed=1):
+    """Build a mock LM Studio server; call serve_forever() (or run it in a thread)"""
+    model_host = ModelHost(random.Random(seed), models or DEFAULT_MODELS, params_b=params_b,
+                           memory_gb=memory_gb, max_loaded=max_loaded, load_base_s=load_base_s,
+                           load_s_per_gb=load_s_per_gb, load_jitter=load_jitter,
+                           tokens_per_s=tokens_per_s, prompt_tokens_per_s=prompt_tokens_per_s,
+                           completion_tokens=completion_tokens, parallel=max(1, parallel), jit=jit,
+                           drop_during_load=drop_during_load, idle_ttl=idle_ttl)
+    server = ThreadingHTTPServer((host, port), make_handler(model_host))
+    server.daemon_threads = True
+    server.model_host = model_host
+    return server
+
+def main():
+    host = get_option('--host', '127.0.0.1')
+    port = int(get_option('--port', 1234))
+    models = get_option('--models')
+
+    server = make_server(
+        host=host,
+        port=port,
+        models=models.split(',') if models else None,
+        params_b=float(get_option('--params-b', 1.0)),
+        memory_gb=float(get_option('--memory-gb', 16)),
+        max_loaded=int(get_option('--max-loaded', 0)),
+        load_base_s=float(get_option('--load-base-s', 1.0)),
+        load_s_per_gb=float(get_option('--load-s-per-gb', 1.5)),
+        load_jitter=float(get_option('--load-jitter', 0.1)),
+        tokens_per_s=float(get_option('--tokens-per-s', 60)),
+        prompt_tokens_per_s=float(get_option('--prompt-tokens-per-s', 1500)),
+        completion_tokens=int(get_option('--completion-tokens', 120)),
+        parallel=int(get_option('--parallel', 1)),
+        jit='--no-jit' not in sys.argv,
+        drop_during_load='--drop-during-load' in sys.argv,
+        idle_ttl=float(get_option('--idle-ttl', 0)),
+        seed=int(get_option('--seed', 1)),
+    )
+    model_host = server.model_host
+
+    print("=" * 80)
+    print("LM STUDIO MOCK SERVER")
+    print("=" * 80)
+    print(f"\n🧠 {len(model_host.models)} models, {model_host.memory_gb:g}GB memory"
+          f"{f', {model_host.max_loaded} slots' if model_host.max_loaded else ''}, "
+          f"JIT {'on' if model_host.jit else 'off'}"
+          f"{', dropping requests during load' if model_host.drop_during_load else ''}")
+    for model in model_host.models.values():
+        print(f"   {model.id:<44} {model.size_gb:5.1f}GB  load ~{model_host.load_base_s + model.size_gb * model_host.load_s_per_gb:.1f}s"
+              f"  {1 / model_host.token_interval(model):.0f} tok/s")
+    print(f"\n🚀 Listening on http://{host}:{port}  (Ctrl+C to stop)")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+
+if __name__ == "__main__":
+    main()
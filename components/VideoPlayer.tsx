@@ -88,6 +88,11 @@ const VideoPlayer: React.FC<VideoPlayerProps> = ({ toggleVideo, userColor, userC
       // Process video URLs based on source type
       const processedVideos = manifest.videos.map(video => {
         const processedVideo = { ...video };
+        // Compact manifests omit per-entry urls; rebuild them from publicUrl
+        if (!video.url) {
+          video = { ...video, url: `${manifest.publicUrl || videoSource.baseUrl}/${video.key}` };
+          processedVideo.url = video.url;
+        }
         // For local videos, the manifest already contains the full path
         // For R2, we might need to prepend the base URL if not already included
         if (videoSource.type === 'r2') {
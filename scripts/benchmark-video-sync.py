@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Video Sync Benchmark
+====================
+
+Reproducible benchmark for the stages of scripts/sync-videos-to-r2.py:
+scan, compare (hash + ETag diff), upload and manifest publish.
+
+Runs against a local S3-compatible stand-in, never the live sww-videos bucket
+unless --endpoint-url points there explicitly. With moto installed and no
+--endpoint-url, an in-process moto server is started automatically.
+
+(The miniflare R2 state under .wrangler/ is only reachable through a Worker
+binding, not the S3 API, so it can't stand in for boto3.)
+
+Usage:
+    pip3 install boto3 tqdm 'moto[server]'
+    python3 scripts/benchmark-video-sync.py
+    python3 scripts/benchmark-video-sync.py --small 500 --large 3 --large-size 256 --jobs 8
+    python3 scripts/benchmark-video-sync.py --endpoint-url http://127.0.0.1:5000 --json bench.json
+
+Options:
+    --small N            Number of small background videos (default 200)
+    --small-size KB      Size of each small video (default 256)
+    --large N            Number of large intro videos (default 2)
+    --large-size MB      Size of each large video (default 48)
+    --dirs N             Spread small files over N nested folders (default 8)
+    --manifest-size N    Background entries in the synthetic base manifest (default 950)
+    --jobs N             Concurrent uploads (default 4)
+    --part-size MB       Multipart part size (default 16)
+    --seed N             RNG seed for file contents (default 1)
+    --endpoint-url URL   S3 endpoint to benchmark against
+    --json PATH          Also write results as JSON
+    --keep               Keep the generated dataset and state directory
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import random
+import logging
+import shutil
+import tempfile
+import contextlib
+import importlib.util
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+SYNC_SCRIPT = Path(__file__).parent / 'sync-videos-to-r2.py'
+
+def load_sync_module():
+    """Import sync-videos-to-r2.py (hyphenated, so not importable by name)"""
+    spec = importlib.util.spec_from_file_location('sync_videos_to_r2', SYNC_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+sync = load_sync_module()
+Colors = sync.Colors
+print_color = sync.print_color
+get_option = sync.get_option
+format_size = sync.format_size
+MB = sync.MB
+
+def generate_dataset(root: Path, small: int, small_size: int, large: int, large_size: int,
+                     dirs: int, seed: int) -> Dict[str, int]:
+    """
+    Write a synthetic videos-to-upload tree.
+
+    Small files are sww-* backgrounds spread over nested folders; large files
+    are entity intros at the root. Contents come from a seeded RNG so every
+    run hashes and uploads identical bytes.
+
+    Returns:
+        {filename: size}
+    """
+    rng = random.Random(seed)
+    files = {}
+    for i in range(small):
+        folder = root / f"batch-{i % dirs:02d}" / "staging"
+        folder.mkdir(parents=True, exist_ok=True)
+        name = f"sww-bench{i:05d}.mp4"
+        (folder / name).write_bytes(rng.randbytes(small_size))
+        files[name] = small_size
+    for i in range(large):
+        name = f"bench-entity-{i}.mov"
+        with open(root / name, 'wb') as f:
+            remaining = large_size
+            while remaining:
+                chunk = min(remaining, 8 * MB)
+                f.write(rng.randbytes(chunk))
+                remaining -= chunk
+        files[name] = large_size
+    return files
+
+def synthetic_manifest(public_url: str, backgrounds: int, intros: int = 30) -> Dict:
+    """Manifest shaped like public/r2-video-manifest.json with the given entry counts"""
+    videos = [sync.make_manifest_entry(f"bench-intro-{i}.mov", public_url) for i in range(intros)]
+    videos += [sync.make_manifest_entry(f"sww-base{i:05d}.mp4", public_url) for i in range(backgrounds)]
+    return {
+        'version': '2.1.0',
+        'generated': '2025-01-01T00:00:00.000Z',
+        'source': 'r2',
+        'publicUrl': public_url,
+        'totalVideos': len(videos),
+        'videos': videos
+    }
+
+class RequestCounter:
+    """Counts S3 API calls per operation via botocore's event system"""
+
+    def __init__(self, s3_client):
+        self.counts = Counter()
+        s3_client.meta.events.register('before-call.s3', self._count)
+
+    def _count(self, model, **kwargs):
+        self.counts[model.name] += 1
+
+    def snapshot(self) -> Counter:
+        return Counter(self.counts)
+
+def run_stage(results: List[Dict], counter: RequestCounter, name: str, func, bytes_moved: int = 0, items: int = 0):
+    """Time one stage, recording wall time, throughput and S3 requests issued"""
+    before = counter.snapshot()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        value = func()
+    elapsed = time.perf_counter() - start
+    requests_made = counter.snapshot() - before
+    results.append({
+        'stage': name,
+        'seconds': round(elapsed, 4),
+        'items': items,
+        'bytes': bytes_moved,
+        'mb_per_s': round(bytes_moved / MB / elapsed, 2) if bytes_moved and elapsed else None,
+        'requests': sum(requests_made.values()),
+        'requests_by_op': dict(requests_made)
+    })
+    return value
+
+def start_moto():
+    """Start an in-process moto S3 server; returns (server, endpoint_url)"""
+    try:
+        from moto.server import ThreadedMotoServer
+    except ImportError:
+        print_color("❌ No --endpoint-url given and moto is not installed:", Colors.RED)
+        print_color("   pip install 'moto[server]'", Colors.RED)
+        sys.exit(1)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    return server, f"http://{host}:{port}"
+
+def ensure_bucket(s3_client, bucket: str):
+    """
+    Create the benchmark bucket if needed. The sync client uses region 'auto'
+    (R2's), which S3 stand-ins reject for CreateBucket, so this one call goes
+    through a us-east-1 client (R2 treats us-east-1 as an alias for auto).
+    """
+    try:
+        s3_client.head_bucket(Bucket=bucket)
+    except sync.ClientError:
+        sync.boto3.client(
+            's3',
+            endpoint_url=sync.R2_CONFIG['endpoint_url'],
+            aws_access_key_id=sync.R2_CONFIG['access_key_id'],
+            aws_secret_access_key=sync.R2_CONFIG['secret_access_key'],
+            region_name='us-east-1'
+        ).create_bucket(Bucket=bucket)
+
+def print_results(results: List[Dict]):
+    print_color("\n═══ Results ═══", Colors.CYAN + Colors.BOLD)
+    print_color(f"   {'stage':<28}{'time':>10}{'items':>8}{'data':>10}{'MB/s':>9}{'reqs':>7}  requests", Colors.BOLD)
+    for r in results:
+        ops = ', '.join(f"{op}={n}" for op, n in sorted(r['requests_by_op'].items()))
+        print(f"   {r['stage']:<28}{r['seconds']:>9.3f}s{r['items']:>8}"
+              f"{format_size(r['bytes']) if r['bytes'] else '-':>10}"
+              f"{r['mb_per_s'] if r['mb_per_s'] is not None else '-':>9}{r['requests']:>7}  {ops}")
+
+def main():
+    try:
+        small = int(get_option('--small', '200'))
+        small_size = int(get_option('--small-size', '256')) * 1024
+        large = int(get_option('--large', '2'))
+        large_size = int(get_option('--large-size', '48')) * MB
+        dirs = max(1, int(get_option('--dirs', '8')))
+        manifest_size = int(get_option('--manifest-size', '950'))
+        jobs = max(1, int(get_option('--jobs', '4')))
+        part_size = max(5, int(get_option('--part-size', '16'))) * MB
+        seed = int(get_option('--seed', '1'))
+    except ValueError:
+        print_color("❌ Numeric options must be integers", Colors.RED)
+        return 1
+    endpoint_url = get_option('--endpoint-url')
+    json_path = get_option('--json')
+    keep = '--keep' in sys.argv
+
+    server = None
+    if not endpoint_url:
+        server, endpoint_url = start_moto()
+        sync.R2_CONFIG['access_key_id'] = 'benchmark'
+        sync.R2_CONFIG['secret_access_key'] = 'benchmark'
+    sync.R2_CONFIG['endpoint_url'] = endpoint_url
+    sync.R2_CONFIG['bucket_name'] = os.environ.get('R2_BUCKET_NAME', 'sww-videos-bench')
+    sync.TRANSFER_CONFIG['part_size'] = part_size
+    bucket = sync.R2_CONFIG['bucket_name']
+    public_url = sync.R2_CONFIG['public_url']
+
+    work_dir = Path(tempfile.mkdtemp(prefix='sww-sync-bench-'))
+    videos_dir = work_dir / 'videos-to-upload'
+    state_dir = videos_dir / '.sync-state'
+
+    print_color("\n═══════════════════════════════════════════════════════════════", Colors.CYAN)
+    print_color("            Video Sync Benchmark                                ", Colors.CYAN + Colors.BOLD)
+    print_color("═══════════════════════════════════════════════════════════════", Colors.CYAN)
+    print_color(f"Endpoint:   {endpoint_url}{' (in-process moto)' if server else ''}", Colors.GREEN)
+    print_color(f"Bucket:     {bucket}", Colors.GREEN)
+    print_color(f"Dataset:    {small} × {format_size(small_size)} in {dirs} folders + {large} × {format_size(large_size)}", Colors.GREEN)
+    print_color(f"Upload:     {jobs} jobs, {part_size // MB}MB parts", Colors.GREEN)
+
+    results = []
+    try:
+        print_color("\n📁 Generating dataset...", Colors.CYAN)
+        videos_dir.mkdir(parents=True)
+        files = generate_dataset(videos_dir, small, small_size, large, large_size, dirs, seed)
+        total_bytes = sum(files.values())
+        print_color(f"   {len(files)} files, {format_size(total_bytes)}", Colors.GREEN)
+
+        s3_client = sync.get_s3_client(max_pool_connections=max(10, jobs * sync.TRANSFER_CONFIG['part_concurrency']))
+        ensure_bucket(s3_client, bucket)
+        counter = RequestCounter(s3_client)
+
+        print_color("\n⏱  Running stages...", Colors.CYAN)
+
+        # Scan: cold (no index), then warm (index hit for every folder)
+        def scan():
+            index = sync.ScanIndex(state_dir / 'scan-index.sqlite')
+            try:
+                return sync.scan_local_videos(videos_dir, index)
+            finally:
+                index.close()
+        local, paths = run_stage(results, counter, 'scan (cold)', scan, items=len(files))
+        run_stage(results, counter, 'scan (indexed)', scan, items=len(files))
+
+        # Compare before upload: remote is empty, so this is listing cost only
+        remote = run_stage(results, counter, 'list remote (empty)', lambda: sync.list_r2_videos(s3_client, bucket))
+        to_upload, _ = sync.compare_files(local, remote)
+
+        # Hash: cold, then cached
+        hash_cache = sync.HashCache(state_dir / 'hash-cache.json')
+        hashes = run_stage(results, counter, 'hash (cold)', lambda: sync.hash_local_videos(videos_dir, paths, hash_cache),
+                           bytes_moved=total_bytes, items=len(paths))
+        run_stage(results, counter, 'hash (cached)', lambda: sync.hash_local_videos(videos_dir, paths, hash_cache),
+                  items=len(paths))
+        checksums = {f: h['sha256'] for f, h in hashes.items()}
+
+        # Upload
+        journal = sync.UploadJournal(state_dir / 'upload-journal.json')
+        uploaded, failed = run_stage(
+            results, counter, f'upload ({jobs} jobs)',
+            lambda: sync.upload_files_concurrently(s3_client, bucket, paths, to_upload, jobs,
+                                                   journal=journal, checksums=checksums),
+            bytes_moved=sum(size for _, size in to_upload), items=len(to_upload)
+        )
+        if failed:
+            print_color(f"   ⚠️  {len(failed)} upload(s) failed", Colors.YELLOW)
+
+        # Compare after upload: everything should be synced, via ETags only
+        remote = run_stage(results, counter, 'list remote (populated)', lambda: sync.list_r2_videos(s3_client, bucket),
+                           items=len(files))
+        remote_cache = sync.RemoteStateCache(state_dir / 'remote-state.json', endpoint_url, sync.DEFAULT_LISTING_TTL)
+        run_stage(results, counter, 'remote state (cold)',
+                  lambda: sync.fetch_remote_state(s3_client, bucket, list(local), remote_cache), items=len(local))
+        run_stage(results, counter, 'remote state (cached)',
+                  lambda: sync.fetch_remote_state(s3_client, bucket, list(local), remote_cache), items=len(local))
+        same_size = {f: paths[f] for f, s in local.items() if f in remote and remote[f]['size'] == s}
+        hashes = sync.hash_local_videos(videos_dir, same_size, hash_cache)
+        pending, synced = run_stage(results, counter, 'compare (content)',
+                                    lambda: sync.compare_files(local, remote, hashes, s3_client, bucket),
+                                    items=len(local))
+        if pending:
+            print_color(f"   ⚠️  {len(pending)} file(s) still differ after upload", Colors.YELLOW)
+
+        # Manifest: in-memory update, then a plain and a conditional publish
+        base = synthetic_manifest(public_url, manifest_size)
+        manifest = run_stage(results, counter, 'manifest update',
+                             lambda: sync.update_manifest(json.loads(json.dumps(base)), uploaded, public_url),
+                             items=len(uploaded))
+        manifest_path = work_dir / 'video-manifest.json'
+        sync.save_manifest(manifest, manifest_path)
+        run_stage(results, counter, 'publish (full PUT)',
+                  lambda: sync.upload_manifest_to_r2(s3_client, bucket, manifest_path),
+                  bytes_moved=manifest_path.stat().st_size, items=1)
+        extra = [f"sww-late{i:03d}.mp4" for i in range(10)]
+        run_stage(results, counter, 'publish (If-Match + delta)',
+                  lambda: sync.publish_manifest_delta(s3_client, bucket, manifest, extra, public_url),
+                  items=len(extra))
+        index, shards = sync.build_sharded_manifest(manifest, sync.DEFAULT_SHARD_SIZE)
+        run_stage(results, counter, 'publish (sharded, cold)',
+                  lambda: sync.upload_sharded_manifest(s3_client, bucket, index, shards),
+                  bytes_moved=sum(len(b) for b in shards.values()), items=len(shards))
+        with contextlib.redirect_stdout(io.StringIO()):
+            grown = sync.update_manifest(json.loads(json.dumps(manifest)), extra, public_url)
+        index2, shards2 = sync.build_sharded_manifest(grown, sync.DEFAULT_SHARD_SIZE)
+        run_stage(results, counter, 'publish (sharded, +10)',
+                  lambda: sync.upload_sharded_manifest(s3_client, bucket, index2, shards2),
+                  items=len(shards2))
+
+        print_results(results)
+
+        if json_path:
+            with open(json_path, 'w') as f:
+                json.dump({
+                    'endpoint': endpoint_url,
+                    'dataset': {'small': small, 'smallSize': small_size, 'large': large,
+                                'largeSize': large_size, 'dirs': dirs, 'seed': seed},
+                    'jobs': jobs,
+                    'partSize': part_size,
+                    'results': results
+                }, f, indent=2)
+            print_color(f"\n   ✅ Saved: {json_path}", Colors.GREEN)
+    finally:
+        if keep:
+            print_color(f"\n   Kept dataset: {work_dir}", Colors.YELLOW)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        if server:
+            server.stop()
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
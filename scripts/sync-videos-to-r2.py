@@ -15,6 +15,77 @@ Usage:
     python3 scripts/sync-videos-to-r2.py           # Normal sync
     python3 scripts/sync-videos-to-r2.py --dry-run # Preview only
     python3 scripts/sync-videos-to-r2.py --force   # Re-upload all
+    python3 scripts/sync-videos-to-r2.py --jobs 8  # Upload 8 files at once
+    python3 scripts/sync-videos-to-r2.py --endpoint-url http://127.0.0.1:5000  # Local S3 stand-in
+
+Multipart Tuning (large intro videos):
+    --part-size MB          Multipart part size (default 64)
+    --part-concurrency N    Parts uploaded in parallel per file (default 4)
+    --max-bandwidth MB      Throttle uploads to MB/s across all workers
+    --abort-stale-hours H   Abort orphaned multipart uploads older than H hours (default 24)
+
+Resumable Uploads:
+    Files at or above the part size are uploaded as resumable multipart uploads.
+    Finished parts are journaled in videos-to-upload/.sync-state/, so a rerun
+    after a failure sends only the missing parts. Parts are streamed from
+    disk, not buffered in memory.
+
+Local Scan:
+    videos-to-upload/ is scanned recursively (hidden folders are skipped), so
+    staging sub-folders work. The object key is still the bare filename.
+    --scan-workers N   Parallel directory listings/stats (default 16)
+    --rescan           Ignore the scan index and stat every file
+
+    Directory listings are indexed in videos-to-upload/.sync-state/scan-index.sqlite.
+    A folder whose mtime is unchanged is served from the index without touching
+    its files. Replacing a file (new name or rename-over) updates the folder
+    mtime; editing a file in place does not, so use --rescan after that.
+
+Change Detection:
+    A file is re-uploaded when its content differs from R2, not just its size.
+    Local MD5/SHA-256 digests are cached in videos-to-upload/.sync-state/ keyed
+    by (path, mtime, size) and compared against the remote ETag (plain or
+    multipart) or the sha256 metadata this script stores on every upload.
+
+Remote State:
+    Only the keys present locally are looked up in R2. Results are cached in
+    videos-to-upload/.sync-state/remote-state.json for --listing-ttl seconds
+    (default 600); uncached keys are checked with concurrent HEAD requests,
+    or with one prefix-scoped listing when many share the sww- prefix.
+    --listing-ttl S       Cache lifetime, 0 to always re-check
+    --remote-workers N    Concurrent HEAD requests (default 16)
+    --full-listing        Old behaviour: list the entire bucket
+
+Manifest Output:
+    --manifest-format pretty|compact   pretty (default) is the indented form
+                                       committed to git; compact drops
+                                       indentation and per-entry 'url' fields
+                                       (clients rebuild them from publicUrl)
+    --precompress gz,br                Also write .gz / .br siblings
+    --manifest-encoding gzip|br        Upload that sibling to R2 with the
+                                       matching Content-Encoding (default: none)
+
+Sharded Manifest:
+    --sharded          Also publish manifest/index.json plus fixed-size
+                       background shards (manifest/backgrounds-NNNN.<hash>.json)
+    --shard-size N     Background entries per shard (default 250)
+
+    The index is tiny (intros keyed by entityId, shard list, counts) so clients
+    can start playing after one small fetch. Shard names carry a content hash:
+    adding backgrounds only changes the last shard, and only changed shards
+    are uploaded. Local copies live in public/video-manifest/.
+
+Delta Publishing:
+    --delta              Publish video-manifest.json with a conditional PUT
+                         (If-Match on the ETag we read). If another sync won
+                         the race, re-read, re-merge our uploads and retry.
+                         Each publish bumps manifestVersion and writes an
+                         append-only manifest-delta-<version>.json listing the
+                         entries it added.
+    --publish-retries N  Conditional PUT attempts before giving up (default 5)
+
+    A client holding version v fetches manifest-delta-(v+1).json, (v+2), ...
+    until a 404, and falls back to the full manifest if a delta is missing.
 
 Video Naming Convention:
     - Entity intros: [entity-id].mov (e.g., "the-eternal.mov")
@@ -26,12 +97,21 @@ After running, don't forget to:
 See docs/223-VIDEO-SYNC-R2-TROUBLESHOOTING.md for detailed documentation.
 """
 
+import io
 import os
+import gzip
+import mmap
+import shutil
+import sqlite3
+import hashlib
 import sys
 import json
+import time
+import threading
 from pathlib import Path
-from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from datetime import datetime, timezone, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from typing import Dict, Iterator, List, Tuple, Optional
 
 # =============================================================================
 # DEPENDENCIES
@@ -39,7 +119,9 @@ from typing import Dict, List, Tuple, Optional
 # =============================================================================
 try:
     import boto3
+    from botocore.config import Config
     from botocore.exceptions import ClientError
+    from boto3.s3.transfer import TransferConfig
     from tqdm import tqdm
 except ImportError as e:
     print("❌ Missing required dependencies:")
@@ -47,17 +129,40 @@ except ImportError as e:
     print(f"   Error: {e}")
     sys.exit(1)
 
+# Optional: only needed for --manifest-encoding br / --precompress br
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 # =============================================================================
 # CLOUDFLARE R2 CONFIGURATION
-# These credentials are for the sww-videos bucket
+# These credentials are for the sww-videos bucket.
+# Every value can be overridden from the environment (same names as .env.r2,
+# plus R2_ENDPOINT_URL) or --endpoint-url, e.g. to point at a local
+# S3-compatible stand-in such as `moto_server -p 5000`:
+#   R2_ENDPOINT_URL=http://127.0.0.1:5000 python3 scripts/sync-videos-to-r2.py
 # =============================================================================
 R2_CONFIG = {
-    'account_id': '85eadfbdf07c02e77aa5dc3b46beb0f9',
-    'access_key_id': '655dc0505696e129391b3a2756dc902a',
-    'secret_access_key': '789522e4838381732bdc6f51d316f33d3cc97a0bbf8cb8118f8bdb55d4a88365',
-    'bucket_name': 'sww-videos',
-    'public_url': 'https://pub-56b43531787b4783b546dd45f31651a7.r2.dev',  # Public CDN URL
-    'endpoint_url': 'https://85eadfbdf07c02e77aa5dc3b46beb0f9.r2.cloudflarestorage.com'  # S3 API endpoint
+    'account_id': os.environ.get('R2_ACCOUNT_ID', '85eadfbdf07c02e77aa5dc3b46beb0f9'),
+    'access_key_id': os.environ.get('R2_ACCESS_KEY_ID', '655dc0505696e129391b3a2756dc902a'),
+    'secret_access_key': os.environ.get('R2_SECRET_ACCESS_KEY', '789522e4838381732bdc6f51d316f33d3cc97a0bbf8cb8118f8bdb55d4a88365'),
+    'bucket_name': os.environ.get('R2_BUCKET_NAME', 'sww-videos'),
+    'public_url': os.environ.get('R2_PUBLIC_URL', 'https://pub-56b43531787b4783b546dd45f31651a7.r2.dev'),  # Public CDN URL
+    'endpoint_url': os.environ.get('R2_ENDPOINT_URL', 'https://85eadfbdf07c02e77aa5dc3b46beb0f9.r2.cloudflarestorage.com')  # S3 API endpoint
+}
+
+# =============================================================================
+# TRANSFER CONFIGURATION
+# Defaults for multipart uploads; overridden from the command line in main()
+# =============================================================================
+MB = 1024 * 1024
+
+TRANSFER_CONFIG = {
+    'part_size': 64 * MB,          # Multipart chunk size (R2 minimum is 5MB)
+    'part_concurrency': 4,         # Parts in flight per file
+    'max_bandwidth': None,         # Bytes/sec across all uploads, None = unlimited
+    'abort_stale_hours': 24,       # Orphaned multipart uploads older than this are aborted
 }
 
 # Console colors
@@ -72,6 +177,15 @@ class Colors:
 def print_color(text: str, color: str = ''):
     print(f"{color}{text}{Colors.END}")
 
+def get_option(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Read a value option from argv, accepting both '--name value' and '--name=value'"""
+    for i, arg in enumerate(sys.argv):
+        if arg == name and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+        if arg.startswith(name + '='):
+            return arg.split('=', 1)[1]
+    return default
+
 def format_size(size_bytes: int) -> str:
     """Format bytes to human readable"""
     if size_bytes == 0:
@@ -82,13 +196,20 @@ def format_size(size_bytes: int) -> str:
         size_bytes /= 1024
     return f"{size_bytes:.1f}TB"
 
-def get_s3_client():
+def get_s3_client(max_pool_connections: int = 10):
     """
     Create S3 client for Cloudflare R2.
     
     Cloudflare R2 is S3-compatible, so we use boto3's S3 client.
     The key difference is the endpoint_url which points to R2.
     
+    boto3 clients are thread-safe, so a single client is shared by all upload
+    workers. The connection pool must be at least as large as the number of
+    concurrent requests or urllib3 will discard and reopen connections.
+    
+    Args:
+        max_pool_connections: Size of the HTTP connection pool
+    
     Returns:
         boto3 S3 client or None if connection fails
     """
@@ -100,44 +221,552 @@ def get_s3_client():
         return session.client(
             's3',
             endpoint_url=R2_CONFIG['endpoint_url'],
-            region_name='auto'  # R2 uses 'auto' for region
+            region_name='auto',  # R2 uses 'auto' for region
+            config=Config(
+                max_pool_connections=max_pool_connections,
+                retries={'max_attempts': 5, 'mode': 'adaptive'}
+            )
         )
     except Exception as e:
         print_color(f"❌ Error creating S3 client: {e}", Colors.RED)
         return None
 
-def scan_local_videos(folder: Path) -> Dict[str, int]:
-    """Scan local folder for video files, return {filename: size}"""
+VIDEO_EXTENSIONS = {'.mp4', '.mov', '.webm', '.m4v'}
+STAT_BATCH_SIZE = 256
+
+class ScanIndex:
+    """
+    SQLite record of the last scan: every directory's mtime, its video files
+    (size, mtime) and its sub-directories.
+    
+    Only the main thread touches the connection; scan workers just list and
+    stat. All writes of a scan land in one transaction, so an interrupted
+    scan leaves the previous index intact.
+    """
+    
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path))
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS dirs (
+                path TEXT PRIMARY KEY,
+                parent TEXT,
+                mtime_ns INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS dirs_parent ON dirs(parent);
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                dir TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS files_dir ON files(dir);
+        ''')
+    
+    def dir_mtime(self, path: str) -> Optional[int]:
+        row = self.db.execute('SELECT mtime_ns FROM dirs WHERE path = ?', (path,)).fetchone()
+        return row[0] if row else None
+    
+    def cached_listing(self, path: str) -> Tuple[List[Tuple[str, int]], List[str]]:
+        """([(file_path, size)], [subdir_path]) as recorded for an unchanged directory"""
+        files = self.db.execute('SELECT path, size FROM files WHERE dir = ?', (path,)).fetchall()
+        subdirs = [r[0] for r in self.db.execute('SELECT path FROM dirs WHERE parent = ?', (path,))]
+        return files, subdirs
+    
+    def replace_dir(self, path: str, parent: Optional[str], mtime_ns: int, subdirs: List[str]):
+        """Record a re-listed directory, forgetting its old files and vanished sub-trees"""
+        self.db.execute('INSERT OR REPLACE INTO dirs (path, parent, mtime_ns) VALUES (?, ?, ?)',
+                        (path, parent, mtime_ns))
+        self.db.execute('DELETE FROM files WHERE dir = ?', (path,))
+        known = [r[0] for r in self.db.execute('SELECT path FROM dirs WHERE parent = ?', (path,))]
+        for gone in set(known) - set(subdirs):
+            self.drop_dir(gone)
+    
+    def drop_dir(self, path: str):
+        """Forget a directory, its sub-tree and their files"""
+        prefix = path.rstrip(os.sep) + os.sep
+        self.db.execute('DELETE FROM dirs WHERE path = ? OR substr(path, 1, ?) = ?', (path, len(prefix), prefix))
+        self.db.execute('DELETE FROM files WHERE dir = ? OR substr(dir, 1, ?) = ?', (path, len(prefix), prefix))
+    
+    def add_files(self, directory: str, files: List[Tuple[str, int, int]]):
+        self.db.executemany('INSERT OR REPLACE INTO files (path, dir, size, mtime_ns) VALUES (?, ?, ?, ?)',
+                            [(path, directory, size, mtime_ns) for path, size, mtime_ns in files])
+    
+    def commit(self):
+        self.db.commit()
+    
+    def close(self):
+        self.db.close()
+
+def _list_dir(path: str, known_mtime: Optional[int]):
+    """
+    Worker: stat a directory and, only if it changed, list it.
+    
+    Returns:
+        (path, mtime_ns, None, None) when unchanged,
+        (path, None, [], []) when it was removed or replaced since it was seen, else
+        (path, mtime_ns, [video file paths], [sub-directory paths])
+    """
+    files, subdirs = [], []
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+        if mtime_ns == known_mtime:
+            return path, mtime_ns, None, None
+        
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.name.startswith('.'):
+                    continue  # .sync-state, .DS_Store, editor temp files
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif os.path.splitext(entry.name)[1].lower() in VIDEO_EXTENSIONS:
+                    files.append(entry.path)
+    except (FileNotFoundError, NotADirectoryError):
+        return path, None, [], []
+    return path, mtime_ns, files, subdirs
+
+def _stat_files(paths: List[str]) -> List[Tuple[str, int, int]]:
+    """Worker: stat a batch of files, skipping ones deleted since listing"""
+    results = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        if not os.path.isfile(path):
+            continue
+        results.append((path, st.st_size, st.st_mtime_ns))
+    return results
+
+def scan_video_tree(root: Path, index: Optional[ScanIndex] = None,
+                    workers: int = 16, rescan: bool = False) -> Iterator[Tuple[Path, int]]:
+    """
+    Recursively scan `root` for videos, yielding (path, size) as results arrive.
+    
+    Directory listings and file stats run on a thread pool, which is what
+    makes this fast on network storage where each stat is a round trip.
+    With an index, directories whose mtime matches the last scan are replayed
+    from SQLite and only their sub-directories are re-stat'ed.
+    """
+    root_str = str(root)
+    
+    def known_mtime(path: str) -> Optional[int]:
+        return None if rescan or index is None else index.dir_mtime(path)
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(_list_dir, root_str, known_mtime(root_str)): ('list', None)}
+        
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, directory = pending.pop(future)
+                
+                if kind == 'stat':
+                    stats = future.result()
+                    if index is not None:
+                        index.add_files(directory, stats)
+                    for path, size, _ in stats:
+                        yield Path(path), size
+                    continue
+                
+                path, mtime_ns, files, subdirs = future.result()
+                if mtime_ns is None:
+                    # Deleted or swapped for a file between listing its parent and now
+                    if index is not None:
+                        index.drop_dir(path)
+                    continue
+                if files is None:
+                    cached_files, subdirs = index.cached_listing(path)
+                    for file_path, size in cached_files:
+                        yield Path(file_path), size
+                else:
+                    if index is not None:
+                        parent = None if path == root_str else os.path.dirname(path)
+                        index.replace_dir(path, parent, mtime_ns, subdirs)
+                    for i in range(0, len(files), STAT_BATCH_SIZE):
+                        batch = files[i:i + STAT_BATCH_SIZE]
+                        pending[executor.submit(_stat_files, batch)] = ('stat', path)
+                
+                for subdir in subdirs:
+                    pending[executor.submit(_list_dir, subdir, known_mtime(subdir))] = ('list', None)
+    
+    if index is not None:
+        index.commit()
+
+def scan_local_videos(folder: Path, index: Optional[ScanIndex] = None,
+                      workers: int = 16, rescan: bool = False) -> Tuple[Dict[str, int], Dict[str, Path]]:
+    """
+    Scan local folder tree for video files.
+    
+    The R2 key is the bare filename, so the same name in two staging folders
+    is a conflict. The scan finishes in whatever order its threads do, so the
+    winner is picked afterwards: the lexicographically smallest path relative
+    to `folder`, and the others are reported. Results are ordered by filename
+    so every run sees the same files in the same order.
+    
+    Returns:
+        ({filename: size}, {filename: local path})
+    """
+    found = {}
+    for file_path, size in scan_video_tree(folder, index, workers, rescan):
+        found.setdefault(file_path.name, []).append((file_path.relative_to(folder).as_posix(), file_path, size))
+    
     videos = {}
-    extensions = {'.mp4', '.mov', '.webm', '.m4v'}
+    paths = {}
+    for name in sorted(found):
+        candidates = sorted(found[name])
+        _, file_path, size = candidates[0]
+        for _, duplicate, _ in candidates[1:]:
+            print_color(f"   ⚠️  Duplicate filename, skipping {duplicate} (using {file_path})", Colors.YELLOW)
+        videos[name] = size
+        paths[name] = file_path
     
-    for file_path in folder.iterdir():
-        if file_path.is_file() and file_path.suffix.lower() in extensions:
-            videos[file_path.name] = file_path.stat().st_size
+    return videos, paths
+
+HASH_READ_SIZE = 1 * MB
+
+# Part sizes whose multipart ETags are precomputed while hashing: boto3's
+# default chunk size (older uploads) plus whatever --part-size is in use.
+DEFAULT_BOTO_PART_SIZE = 8 * MB
+
+def hash_file(file_path: Path, part_sizes: List[int]) -> Dict:
+    """
+    Hash a file in a single streaming pass over a memory map.
     
-    return videos
+    Produces the whole-file MD5 (= ETag of a single-part upload), SHA-256
+    (stored as object metadata on upload) and, for every part size the file
+    is large enough to be split by, the S3 multipart ETag
+    md5(md5(part1) + md5(part2) + ...)-N.
+    
+    Part sizes must be multiples of HASH_READ_SIZE so part boundaries fall on
+    read boundaries.
+    """
+    md5 = hashlib.md5()
+    sha256 = hashlib.sha256()
+    size = file_path.stat().st_size
+    split_sizes = [ps for ps in sorted(set(part_sizes)) if size >= ps]
+    parts = {ps: {'digests': [], 'current': hashlib.md5(), 'filled': 0} for ps in split_sizes}
+    
+    if size:
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                for offset in range(0, size, HASH_READ_SIZE):
+                    chunk = view[offset:offset + HASH_READ_SIZE]
+                    md5.update(chunk)
+                    sha256.update(chunk)
+                    for ps, state in parts.items():
+                        state['current'].update(chunk)
+                        state['filled'] += len(chunk)
+                        if state['filled'] == ps:
+                            state['digests'].append(state['current'].digest())
+                            state['current'] = hashlib.md5()
+                            state['filled'] = 0
+                    chunk.release()
+            finally:
+                view.release()
+    
+    multipart = {}
+    for ps, state in parts.items():
+        if state['filled']:
+            state['digests'].append(state['current'].digest())
+        combined = hashlib.md5(b''.join(state['digests'])).hexdigest()
+        multipart[str(ps)] = f"{combined}-{len(state['digests'])}"
+    
+    return {'md5': md5.hexdigest(), 'sha256': sha256.hexdigest(), 'multipart': multipart}
+
+class HashCache:
+    """
+    Persistent digests of local videos, keyed by path and validated by
+    (mtime, size) so an unchanged file is never hashed twice.
+    
+    Layout (JSON): {"the-eternal.mov": {"mtime": 1.0, "size": 123,
+                    "md5": "...", "sha256": "...", "multipart": {"8388608": "...-3"}}}
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.dirty = False
+        try:
+            with open(path, 'r') as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+    
+    def part_sizes(self) -> List[int]:
+        return [DEFAULT_BOTO_PART_SIZE, TRANSFER_CONFIG['part_size']]
+    
+    def lookup(self, key: str, file_path: Path) -> Optional[Dict]:
+        """Cached digests if the file is unchanged and covers the current part sizes"""
+        st = file_path.stat()
+        entry = self.entries.get(key)
+        if not entry or entry['mtime'] != st.st_mtime or entry['size'] != st.st_size:
+            return None
+        needed = {str(ps) for ps in self.part_sizes() if st.st_size >= ps}
+        if not needed.issubset(entry['multipart']):
+            return None
+        return entry
+    
+    def get(self, key: str, file_path: Path) -> Dict:
+        entry = self.lookup(key, file_path)
+        if entry is None:
+            st = file_path.stat()
+            entry = {'mtime': st.st_mtime, 'size': st.st_size, **hash_file(file_path, self.part_sizes())}
+            self.entries[key] = entry
+            self.dirty = True
+        return entry
+    
+    def save(self):
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
 
-def list_r2_videos(s3_client, bucket: str) -> Dict[str, int]:
-    """List all videos in R2 bucket, return {filename: size}"""
+def hash_local_videos(folder: Path, paths: Dict[str, Path], cache: HashCache) -> Dict[str, Dict]:
+    """
+    Digest every listed file, hashing only those missing from the cache.
+    
+    Args:
+        folder: Scan root; cache entries are keyed by path relative to it
+        paths: {filename: local path} for the files to digest
+    
+    Returns:
+        {filename: digests}
+    """
+    hashes = {}
+    pending = []
+    for filename, file_path in paths.items():
+        cache_key = file_path.relative_to(folder).as_posix()
+        entry = cache.lookup(cache_key, file_path)
+        if entry is not None:
+            hashes[filename] = entry
+        else:
+            pending.append((filename, cache_key, file_path))
+    
+    if pending:
+        total = sum(file_path.stat().st_size for _, _, file_path in pending)
+        with tqdm(total=total, unit='B', unit_scale=True, desc=f"Hashing {len(pending)} file(s)") as pbar:
+            for filename, cache_key, file_path in pending:
+                hashes[filename] = cache.get(cache_key, file_path)
+                pbar.update(hashes[filename]['size'])
+        cache.save()
+    
+    return hashes
+
+def list_r2_videos(s3_client, bucket: str, prefix: str = '', raise_errors: bool = False) -> Dict[str, Dict]:
+    """
+    List videos in R2 bucket (optionally under a prefix), return {filename: {'size': int, 'etag': str}}
+    
+    Errors are reported and whatever was listed so far is returned, unless
+    raise_errors is set - then a failed listing raises instead of passing
+    for a bucket that lacks the rest.
+    """
     videos = {}
     
     try:
         paginator = s3_client.get_paginator('list_objects_v2')
-        for page in paginator.paginate(Bucket=bucket):
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
             if 'Contents' in page:
                 for obj in page['Contents']:
                     key = obj['Key']
                     # Only video files
                     if key.endswith(('.mp4', '.mov', '.webm', '.m4v')):
-                        videos[key] = obj.get('Size', 0)
+                        videos[key] = {
+                            'size': obj.get('Size', 0),
+                            'etag': obj.get('ETag', '').strip('"')
+                        }
     except Exception as e:
+        if raise_errors:
+            raise
         print_color(f"❌ Error listing R2 bucket: {e}", Colors.RED)
     
     return videos
 
-def compare_files(local: Dict[str, int], remote: Dict[str, int]) -> Tuple[List, List]:
+DEFAULT_LISTING_TTL = 600
+DEFAULT_REMOTE_WORKERS = 16
+
+# Above this many uncached sww- keys, one scoped LIST (1000 keys/page) beats
+# one HEAD per key
+SCOPED_LIST_THRESHOLD = 200
+BACKGROUND_PREFIX = 'sww-'
+
+class RemoteStateCache:
+    """
+    Per-key cache of remote object state ({size, etag, sha256?, checked}).
+    
+    Scoped to endpoint + bucket so a benchmark against a local stand-in never
+    pollutes the real bucket's cache. Missing objects are not cached, since
+    another machine may upload them at any time.
+    """
+    
+    def __init__(self, path: Path, scope: str, ttl: float):
+        self.path = path
+        self.scope = scope
+        self.ttl = ttl
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            self.entries = data.get(scope, {})
+            self.others = {k: v for k, v in data.items() if k != scope}
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+            self.others = {}
+    
+    def fresh(self, key: str) -> Optional[Dict]:
+        entry = self.entries.get(key)
+        if entry and time.time() - entry['checked'] < self.ttl:
+            return entry
+        return None
+    
+    def put(self, key: str, state: Dict):
+        self.entries[key] = {**state, 'checked': time.time()}
+    
+    def forget(self, keys: List[str]):
+        for key in keys:
+            self.entries.pop(key, None)
+    
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({**self.others, self.scope: self.entries}, f)
+        os.replace(tmp_path, self.path)
+
+def head_r2_video(s3_client, bucket: str, key: str) -> Optional[Dict]:
+    """HEAD one object; returns {size, etag, sha256?} or None if it doesn't exist"""
+    try:
+        response = s3_client.head_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        if e.response.get('ResponseMetadata', {}).get('HTTPStatusCode') == 404:
+            return None
+        raise
+    state = {'size': response.get('ContentLength', 0), 'etag': response.get('ETag', '').strip('"')}
+    sha256 = response.get('Metadata', {}).get('sha256')
+    if sha256:
+        state['sha256'] = sha256
+    return state
+
+def fetch_remote_state(s3_client, bucket: str, keys: List[str], cache: Optional[RemoteStateCache] = None,
+                       workers: int = DEFAULT_REMOTE_WORKERS) -> Tuple[Dict[str, Dict], Dict[str, int]]:
+    """
+    Remote state for exactly the given keys, at O(len(keys)) cost.
+    
+    Fresh cache entries are used as-is. Uncached sww- keys are resolved with
+    one prefix-scoped listing when there are many of them; the rest get
+    concurrent HEAD requests over the shared client (as do the sww- keys if
+    the listing fails part-way). A HEAD that fails with
+    anything but 404 (403, 5xx, throttling) is reported and its key left out
+    of the result and the cache, so it is uploaded now and checked again on
+    the next run instead of aborting the sync.
+    
+    Returns:
+        ({key: {size, etag, sha256?}} for keys that exist, {source: count})
+    """
+    remote = {}
+    stats = {'cached': 0, 'listed': 0, 'head': 0, 'errors': 0}
+    pending = []
+    for key in keys:
+        entry = cache.fresh(key) if cache else None
+        if entry:
+            remote[key] = {k: v for k, v in entry.items() if k != 'checked'}
+            stats['cached'] += 1
+        else:
+            pending.append(key)
+    
+    backgrounds = [k for k in pending if k.startswith(BACKGROUND_PREFIX)]
+    if len(backgrounds) > SCOPED_LIST_THRESHOLD:
+        try:
+            listed = list_r2_videos(s3_client, bucket, prefix=BACKGROUND_PREFIX, raise_errors=True)
+        except Exception as e:
+            # An incomplete listing would make every unlisted key look missing
+            print_color(f"   ⚠️  Listing {BACKGROUND_PREFIX}* failed ({e}) - checking {len(backgrounds)} keys with HEAD", Colors.YELLOW)
+            listed = None
+        if listed is not None:
+            wanted = set(backgrounds)
+            for key, state in listed.items():
+                if key in wanted:
+                    remote[key] = state
+                    stats['listed'] += 1
+                if cache:
+                    cache.put(key, state)
+            pending = [k for k in pending if not k.startswith(BACKGROUND_PREFIX)]
+    
+    def head(key: str) -> Tuple[Optional[Dict], Optional[Exception]]:
+        try:
+            return head_r2_video(s3_client, bucket, key), None
+        except Exception as e:
+            return None, e
+    
+    if pending:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for key, (state, error) in zip(pending, executor.map(head, pending)):
+                stats['head'] += 1
+                if error is not None:
+                    stats['errors'] += 1
+                    print_color(f"   ⚠️  Could not check {key} in R2 ({error}) - will upload it", Colors.YELLOW)
+                elif state is not None:
+                    remote[key] = state
+                    if cache:
+                        cache.put(key, state)
+    
+    if cache:
+        cache.save()
+    return remote, stats
+
+def get_remote_sha256(s3_client, bucket: str, key: str) -> Optional[str]:
+    """Read the sha256 metadata stored by upload_file(), if any"""
+    try:
+        return s3_client.head_object(Bucket=bucket, Key=key).get('Metadata', {}).get('sha256')
+    except ClientError:
+        return None
+
+def contents_match(local_hash: Dict, remote: Dict, s3_client=None, bucket: str = None, key: str = None) -> Optional[bool]:
+    """
+    Decide whether a local file's content equals the remote object.
+    
+    Checks, cheapest first: plain ETag vs MD5, multipart ETag vs the
+    precomputed multipart digests, then the sha256 object metadata (already
+    known if the state came from a HEAD, otherwise one HEAD now).
+    
+    Returns:
+        True/False, or None if the remote object carries nothing comparable
+        (multipart upload with an unknown part size and no metadata)
+    """
+    etag = remote['etag']
+    if '-' not in etag:
+        return etag == local_hash['md5']
+    
+    part_count = etag.rsplit('-', 1)[1]
+    for candidate in local_hash['multipart'].values():
+        if candidate.rsplit('-', 1)[1] == part_count:
+            if candidate == etag:
+                return True
+    
+    remote_sha256 = remote.get('sha256')
+    if remote_sha256 is None and s3_client is not None:
+        remote_sha256 = get_remote_sha256(s3_client, bucket, key)
+    if remote_sha256:
+        return remote_sha256 == local_hash['sha256']
+    
+    # A same-count candidate that differed means the content changed
+    if any(c.rsplit('-', 1)[1] == part_count for c in local_hash['multipart'].values()):
+        return False
+    return None
+
+def compare_files(local: Dict[str, int], remote: Dict[str, Dict],
+                  hashes: Optional[Dict[str, Dict]] = None,
+                  s3_client=None, bucket: str = None) -> Tuple[List, List]:
     """
     Compare local vs remote files.
+    
+    Size is checked first; equal-size files are then compared by content
+    using `hashes` (from hash_local_videos). Without hashes, or when the remote
+    object can't be verified, equal size is treated as synced.
+    
     Returns: (files_to_upload, files_already_synced)
     """
     to_upload = []
@@ -147,33 +776,401 @@ def compare_files(local: Dict[str, int], remote: Dict[str, int]) -> Tuple[List,
         if filename not in remote:
             # New file
             to_upload.append((filename, local_size))
-        elif local_size != remote[filename]:
+        elif local_size != remote[filename]['size']:
             # Size changed - re-upload
             to_upload.append((filename, local_size))
+        elif hashes and filename in hashes and contents_match(
+                hashes[filename], remote[filename], s3_client, bucket, filename) is False:
+            # Same size, different content (e.g. re-encoded) - re-upload
+            to_upload.append((filename, local_size))
         else:
             # Already synced
             already_synced.append(filename)
     
     return to_upload, already_synced
 
-def upload_file(s3_client, bucket: str, local_path: Path, key: str, file_size: int) -> bool:
-    """Upload a file to R2 with progress bar"""
+class BandwidthLimiter:
+    """
+    Token bucket shared by every upload thread so --max-bandwidth is a global
+    cap rather than a per-file one.
+    """
+    
+    def __init__(self, bytes_per_second: int):
+        self.rate = bytes_per_second
+        self.allowance = float(bytes_per_second)
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def consume(self, amount: int):
+        with self.lock:
+            now = time.monotonic()
+            self.allowance = min(self.rate, self.allowance + (now - self.last) * self.rate)
+            self.last = now
+            self.allowance -= amount
+            wait = -self.allowance / self.rate if self.allowance < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+class FileSlice(io.RawIOBase):
+    """
+    Read-only, seekable view of `length` bytes of a file starting at `offset`.
+    
+    Multipart parts are streamed from disk through one of these rather than
+    read into memory, so peak RAM does not grow with part_size ×
+    part_concurrency × --jobs.
+    """
+    
+    def __init__(self, path: Path, offset: int, length: int):
+        super().__init__()
+        self.file = open(path, 'rb')
+        self.offset = offset
+        self.length = length
+        self.pos = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def tell(self) -> int:
+        return self.pos
+    
+    def seek(self, pos: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.pos, io.SEEK_END: self.length}[whence]
+        self.pos = max(0, base + pos)
+        return self.pos
+    
+    def readinto(self, buffer) -> int:
+        n = min(len(buffer), self.length - self.pos)
+        if n <= 0:
+            return 0
+        self.file.seek(self.offset + self.pos)
+        got = self.file.readinto(memoryview(buffer)[:n])
+        self.pos += got
+        return got
+    
+    def close(self) -> None:
+        self.file.close()
+        super().close()
+
+class ThrottledPart:
+    """
+    Request body wrapper that paces reads of a seekable stream through a
+    BandwidthLimiter.
+    
+    botocore seeks back and reads the body again for checksums and retries;
+    only bytes past the furthest point already read are charged, so each
+    byte costs tokens once however often it is re-read.
+    """
+    
+    def __init__(self, body, limiter: BandwidthLimiter):
+        self.body = body
+        self.limiter = limiter
+        self.charged = 0
+    
+    def read(self, size: int = -1) -> bytes:
+        start = self.body.tell()
+        chunk = self.body.read(size)
+        end = start + len(chunk)
+        if end > self.charged:
+            self.limiter.consume(end - max(start, self.charged))
+            self.charged = end
+        return chunk
+    
+    def seek(self, pos: int, whence: int = io.SEEK_SET) -> int:
+        return self.body.seek(pos, whence)
+    
+    def tell(self) -> int:
+        return self.body.tell()
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def readable(self) -> bool:
+        return True
+
+class UploadJournal:
+    """
+    Local record of in-progress multipart uploads, used to resume after failure.
+    
+    Layout (JSON, keyed by object key):
+        {"the-eternal.mov": {"uploadId": "...", "size": 123, "mtime": 1.0,
+                             "partSize": 67108864, "parts": {"1": "\"etag\""}}}
+    
+    An entry only resumes if size, mtime and part size still match the local
+    file; otherwise the old upload is aborted and a new one started. The file is
+    rewritten atomically after every finished part, so a crash loses at most the
+    parts that were in flight.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path, 'r') as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+    
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp_path, self.path)
+    
+    def get(self, key: str) -> Optional[Dict]:
+        with self.lock:
+            entry = self.entries.get(key)
+            return json.loads(json.dumps(entry)) if entry else None
+    
+    def start(self, key: str, upload_id: str, size: int, mtime: float, part_size: int):
+        with self.lock:
+            self.entries[key] = {
+                'uploadId': upload_id,
+                'size': size,
+                'mtime': mtime,
+                'partSize': part_size,
+                'parts': {}
+            }
+            self._save()
+    
+    def record_part(self, key: str, part_number: int, etag: str):
+        with self.lock:
+            self.entries[key]['parts'][str(part_number)] = etag
+            self._save()
+    
+    def finish(self, key: str):
+        with self.lock:
+            if self.entries.pop(key, None) is not None:
+                self._save()
+    
+    def upload_ids(self) -> set:
+        with self.lock:
+            return {e['uploadId'] for e in self.entries.values()}
+
+def build_transfer_config() -> TransferConfig:
+    """
+    TransferConfig for the non-resumable path without a shared limiter.
+    
+    boto3's max_bandwidth caps each transfer on its own, so it is only a
+    fallback here; upload_file() routes small files through the shared
+    BandwidthLimiter whenever one is given.
+    """
+    kwargs = {
+        'multipart_threshold': TRANSFER_CONFIG['part_size'],
+        'multipart_chunksize': TRANSFER_CONFIG['part_size'],
+        'max_concurrency': TRANSFER_CONFIG['part_concurrency'],
+    }
+    if TRANSFER_CONFIG['max_bandwidth']:
+        kwargs['max_bandwidth'] = TRANSFER_CONFIG['max_bandwidth']
+    return TransferConfig(**kwargs)
+
+def get_remote_parts(s3_client, bucket: str, key: str, upload_id: str) -> Optional[Dict[int, str]]:
+    """
+    Ask R2 which parts of a multipart upload it already holds.
+    
+    Returns:
+        {part_number: etag}, or None if the upload no longer exists
+    """
+    parts = {}
+    try:
+        paginator = s3_client.get_paginator('list_parts')
+        for page in paginator.paginate(Bucket=bucket, Key=key, UploadId=upload_id):
+            for part in page.get('Parts', []):
+                parts[part['PartNumber']] = part['ETag']
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'NoSuchUpload':
+            return None
+        raise
+    return parts
+
+def resumable_upload(s3_client, bucket: str, local_path: Path, key: str, file_size: int,
+                     journal: UploadJournal, limiter: Optional[BandwidthLimiter], callback,
+                     sha256: Optional[str] = None) -> None:
+    """
+    Multipart upload that can pick up where a previous run stopped.
+    
+    Parts already acknowledged by R2 (per list_parts, with the journal as a
+    fallback) are skipped and reported to `callback` straight away so progress
+    bars start at the resumed offset.
+    """
+    part_size = TRANSFER_CONFIG['part_size']
+    mtime = local_path.stat().st_mtime
+    total_parts = max(1, -(-file_size // part_size))
+    
+    done = {}
+    entry = journal.get(key)
+    if entry and (entry['size'], entry['mtime'], entry['partSize']) == (file_size, mtime, part_size):
+        remote = get_remote_parts(s3_client, bucket, key, entry['uploadId'])
+        if remote is not None:
+            upload_id = entry['uploadId']
+            journaled = {int(n): etag for n, etag in entry['parts'].items()}
+            done = {n: etag for n, etag in remote.items() if journaled.get(n, etag) == etag}
+            tqdm.write(f"{Colors.YELLOW}   ↻ Resuming {key}: {len(done)}/{total_parts} parts already uploaded{Colors.END}")
+        else:
+            entry = None
+    elif entry:
+        # Local file changed since the interrupted upload - its parts are useless
+        try:
+            s3_client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=entry['uploadId'])
+        except ClientError:
+            pass
+        entry = None
+    
+    if not entry:
+        content_type = 'video/quicktime' if key.lower().endswith('.mov') else 'video/mp4'
+        upload_id = s3_client.create_multipart_upload(
+            Bucket=bucket, Key=key, ContentType=content_type,
+            Metadata={'sha256': sha256} if sha256 else {}
+        )['UploadId']
+        journal.start(key, upload_id, file_size, mtime, part_size)
+    
+    for part_number in done:
+        callback(min(part_size, file_size - (part_number - 1) * part_size))
+    
+    def send_part(part_number: int) -> Tuple[int, str]:
+        offset = (part_number - 1) * part_size
+        length = min(part_size, file_size - offset)
+        with FileSlice(local_path, offset, length) as part:
+            body = ThrottledPart(part, limiter) if limiter else part
+            etag = s3_client.upload_part(Bucket=bucket, Key=key, UploadId=upload_id,
+                                         PartNumber=part_number, Body=body)['ETag']
+        journal.record_part(key, part_number, etag)
+        callback(length)
+        return part_number, etag
+    
+    missing = [n for n in range(1, total_parts + 1) if n not in done]
+    with ThreadPoolExecutor(max_workers=TRANSFER_CONFIG['part_concurrency']) as executor:
+        for part_number, etag in executor.map(send_part, missing):
+            done[part_number] = etag
+    
+    s3_client.complete_multipart_upload(
+        Bucket=bucket, Key=key, UploadId=upload_id,
+        MultipartUpload={'Parts': [{'PartNumber': n, 'ETag': done[n]} for n in sorted(done)]}
+    )
+    journal.finish(key)
+
+def abort_stale_uploads(s3_client, bucket: str, journal: UploadJournal) -> int:
+    """
+    Abort multipart uploads that nothing will ever resume.
+    
+    An upload is stale if it is not in our journal and was started more than
+    TRANSFER_CONFIG['abort_stale_hours'] ago (the age check leaves another
+    machine's in-progress sync alone). Incomplete uploads are billed storage
+    on R2 until aborted.
+    
+    Returns:
+        Number of uploads aborted
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=TRANSFER_CONFIG['abort_stale_hours'])
+    keep = journal.upload_ids()
+    aborted = 0
+    try:
+        paginator = s3_client.get_paginator('list_multipart_uploads')
+        for page in paginator.paginate(Bucket=bucket):
+            for upload in page.get('Uploads', []):
+                if upload['UploadId'] in keep or upload['Initiated'] > cutoff:
+                    continue
+                s3_client.abort_multipart_upload(Bucket=bucket, Key=upload['Key'], UploadId=upload['UploadId'])
+                print_color(f"   🗑  Aborted stale upload: {upload['Key']} (started {upload['Initiated']:%Y-%m-%d %H:%M})", Colors.YELLOW)
+                aborted += 1
+    except Exception as e:
+        print_color(f"   ⚠️  Could not check for stale multipart uploads: {e}", Colors.YELLOW)
+    return aborted
+
+def upload_file(s3_client, bucket: str, local_path: Path, key: str, file_size: int,
+                position: Optional[int] = None, overall: Optional[tqdm] = None,
+                journal: Optional[UploadJournal] = None,
+                limiter: Optional[BandwidthLimiter] = None,
+                sha256: Optional[str] = None) -> bool:
+    """
+    Upload a file to R2 with progress bar.
+    
+    Files of at least one part size go through resumable_upload() when a
+    journal is given. Smaller files are sent as one throttled PUT when a
+    limiter is given (so they share the global cap), otherwise through
+    boto3's managed transfer.
+    
+    Args:
+        position: Fixed tqdm line for this file's bar (used by concurrent uploads)
+        overall: Aggregate progress bar that also receives this file's bytes
+        journal: Multipart resume journal
+        limiter: Shared bandwidth limiter (--max-bandwidth across all workers)
+        sha256: Content digest stored as object metadata for later comparison
+    """
     try:
-        with tqdm(total=file_size, unit='B', unit_scale=True, desc=key, leave=True) as pbar:
+        with tqdm(total=file_size, unit='B', unit_scale=True, desc=key,
+                  leave=position is None, position=position) as pbar:
             def callback(bytes_transferred):
                 pbar.update(bytes_transferred)
+                if overall is not None:
+                    overall.update(bytes_transferred)
             
-            s3_client.upload_file(
-                str(local_path),
-                bucket,
-                key,
-                Callback=callback
-            )
+            if journal is not None and file_size >= TRANSFER_CONFIG['part_size']:
+                resumable_upload(s3_client, bucket, local_path, key, file_size,
+                                 journal, limiter, callback, sha256=sha256)
+            elif limiter is not None and file_size < TRANSFER_CONFIG['part_size']:
+                with open(local_path, 'rb') as f:
+                    s3_client.put_object(Bucket=bucket, Key=key, Body=ThrottledPart(f, limiter),
+                                         Metadata={'sha256': sha256} if sha256 else {})
+                callback(file_size)
+            else:
+                s3_client.upload_file(
+                    str(local_path),
+                    bucket,
+                    key,
+                    Callback=callback,
+                    Config=build_transfer_config(),
+                    ExtraArgs={'Metadata': {'sha256': sha256}} if sha256 else None
+                )
         return True
     except Exception as e:
-        print_color(f"❌ Error uploading {key}: {e}", Colors.RED)
+        tqdm.write(f"{Colors.RED}❌ Error uploading {key}: {e}{Colors.END}")
         return False
 
+def upload_files_concurrently(s3_client, bucket: str, paths: Dict[str, Path],
+                              to_upload: List[Tuple[str, int]], jobs: int,
+                              journal: Optional[UploadJournal] = None,
+                              limiter: Optional[BandwidthLimiter] = None,
+                              checksums: Optional[Dict[str, str]] = None) -> Tuple[List[str], List[str]]:
+    """
+    Upload several files at once over the shared S3 client.
+    
+    A bounded pool of `jobs` workers pulls from `to_upload`. Each worker gets a
+    fixed progress-bar line (1..jobs) beneath an aggregate bar on line 0.
+    
+    Returns:
+        (uploaded, failed) filename lists, in the same order as `to_upload`
+        so the manifest update is deterministic regardless of finish order.
+    """
+    order = {filename: i for i, (filename, _) in enumerate(to_upload)}
+    total_size = sum(size for _, size in to_upload)
+    free_positions = list(range(jobs, 0, -1))
+    results = {}
+    
+    with tqdm(total=total_size, unit='B', unit_scale=True, desc=f"Total ({len(to_upload)} files)",
+              position=0) as overall:
+        def worker(filename: str, size: int) -> bool:
+            position = free_positions.pop()
+            try:
+                return upload_file(s3_client, bucket, paths[filename], filename, size,
+                                   position=position, overall=overall,
+                                   journal=journal, limiter=limiter,
+                                   sha256=(checksums or {}).get(filename))
+            finally:
+                free_positions.append(position)
+        
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = {executor.submit(worker, filename, size): filename for filename, size in to_upload}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+    
+    uploaded = sorted((f for f, ok in results.items() if ok), key=order.get)
+    failed = sorted((f for f, ok in results.items() if not ok), key=order.get)
+    return uploaded, failed
+
 def load_manifest(manifest_path: Path) -> Dict:
     """Load existing manifest"""
     try:
@@ -183,6 +1180,81 @@ def load_manifest(manifest_path: Path) -> Dict:
         print_color(f"❌ Error loading manifest: {e}", Colors.RED)
         return None
 
+def make_manifest_entry(filename: str, public_url: str) -> Dict:
+    """
+    Build the manifest entry for an uploaded file.
+    
+    Video Classification:
+        - Files starting with 'sww-' are background videos
+        - All other files are entity intro videos
+        - Entity ID is derived from filename (e.g., "the-eternal.mov" → "the-eternal")
+    """
+    # sww-* = background video, anything else = entity intro
+    is_intro = not filename.startswith('sww-')
+    
+    # Determine content type from extension
+    ext = filename.split('.')[-1].lower()
+    content_type = 'video/quicktime' if ext == 'mov' else 'video/mp4'
+    
+    entry = {
+        'key': filename,
+        'url': f"{public_url}/{filename}",
+        'contentType': content_type
+    }
+    
+    if is_intro:
+        # Entity intro video - add isIntro and entityId fields
+        entry['isIntro'] = True
+        entry['entityId'] = filename.rsplit('.', 1)[0]
+    
+    return entry
+
+class VideoManifest:
+    """
+    In-memory manifest with O(1) key lookup and O(1) appends.
+    
+    The videos array is held as two segments: the leading run of intro entries
+    and everything after it. New intros append to the first segment and new
+    backgrounds to the second, which reproduces the on-disk ordering (intros
+    grouped first) without ever calling list.insert. Any intro that already
+    sits further down the array stays where it is.
+    """
+    
+    def __init__(self, data: Dict):
+        self.fields = {k: v for k, v in data.items() if k != 'videos'}
+        self.field_order = list(data.keys()) if 'videos' in data else list(data.keys()) + ['videos']
+        videos = data.get('videos', [])
+        split = next((i for i, v in enumerate(videos) if not v.get('isIntro')), len(videos))
+        self.intros = videos[:split]
+        self.others = videos[split:]
+        self.index = {v['key']: v for v in videos}
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self.index
+    
+    def __len__(self) -> int:
+        return len(self.intros) + len(self.others)
+    
+    def videos(self) -> List[Dict]:
+        return self.intros + self.others
+    
+    def add(self, entry: Dict) -> bool:
+        """Add an entry; returns False if its key is already present"""
+        if entry['key'] in self.index:
+            return False
+        self.index[entry['key']] = entry
+        (self.intros if entry.get('isIntro') else self.others).append(entry)
+        return True
+    
+    def to_dict(self) -> Dict:
+        """Serialise with the original top-level field order and fresh metadata"""
+        self.fields['totalVideos'] = len(self)
+        self.fields['generated'] = datetime.utcnow().isoformat() + 'Z'
+        result = {}
+        for field in self.field_order + [k for k in self.fields if k not in self.field_order]:
+            result[field] = self.videos() if field == 'videos' else self.fields[field]
+        return result
+
 def update_manifest(manifest: Dict, uploaded_files: List[str], public_url: str) -> Dict:
     """
     Add newly uploaded files to the manifest INCREMENTALLY.
@@ -193,13 +1265,10 @@ def update_manifest(manifest: Dict, uploaded_files: List[str], public_url: str)
     The old bash script tried to regenerate the manifest by listing R2 contents,
     which failed and resulted in empty manifests. NEVER regenerate from scratch!
     
-    Video Classification:
-        - Files starting with 'sww-' are background videos
-        - All other files are entity intro videos
-        - Entity ID is derived from filename (e.g., "the-eternal.mov" → "the-eternal")
-    
-    Intro videos are inserted at the beginning of the videos array (after other intros)
-    so they appear first when the manifest is processed.
+    Intro videos are added after the existing leading intros so they appear
+    first when the manifest is processed; background videos go at the end.
+    The batch is applied through VideoManifest, so the cost is
+    O(existing + uploaded) rather than a scan per uploaded file.
     
     Args:
         manifest: The existing manifest dict (must have 'videos' array)
@@ -209,77 +1278,419 @@ def update_manifest(manifest: Dict, uploaded_files: List[str], public_url: str)
     Returns:
         Updated manifest dict
     """
+    model = VideoManifest(manifest)
+    
     for filename in uploaded_files:
+        entry = make_manifest_entry(filename, public_url)
+        
         # Skip if already in manifest (prevents duplicates)
-        if any(v['key'] == filename for v in manifest.get('videos', [])):
+        if not model.add(entry):
             print_color(f"  Already in manifest: {filename}", Colors.YELLOW)
-            continue
+        elif entry.get('isIntro'):
+            print_color(f"  ✅ Added intro: {filename} (entity: {entry['entityId']})", Colors.GREEN)
+        else:
+            print_color(f"  ✅ Added background: {filename}", Colors.GREEN)
+    
+    return model.to_dict()
+
+MANIFEST_KEY = 'video-manifest.json'
+MANIFEST_FORMATS = ('pretty', 'compact')
+
+# Content-Encoding -> sibling file suffix
+MANIFEST_ENCODINGS = {'gzip': '.gz', 'br': '.br'}
+
+def shape_manifest(manifest: Dict, fmt: str) -> Dict:
+    """
+    Return the manifest with entry URLs in the requested shape.
+    
+    compact: drop every 'url' that is just publicUrl/key
+    pretty:  restore any missing 'url' (e.g. after loading a compact manifest)
+    """
+    public_url = manifest.get('publicUrl', R2_CONFIG['public_url'])
+    videos = []
+    for video in manifest.get('videos', []):
+        derived = f"{public_url}/{video['key']}"
+        if fmt == 'compact' and video.get('url') == derived:
+            video = {k: v for k, v in video.items() if k != 'url'}
+        elif fmt == 'pretty' and 'url' not in video:
+            video = {'key': video['key'], 'url': derived, **{k: v for k, v in video.items() if k != 'key'}}
+        videos.append(video)
+    return {**manifest, 'videos': videos}
+
+def compress_manifest(body: bytes, encoding: str) -> bytes:
+    """Apply a MANIFEST_ENCODINGS Content-Encoding to an encoded manifest body"""
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=9, mtime=0)
+    return brotli.compress(body, quality=11)
+
+def encode_manifest(manifest: Dict, fmt: str = 'pretty', encoding: Optional[str] = None) -> bytes:
+    """Manifest body bytes in the given format, compressed if encoding is set"""
+    if fmt == 'compact':
+        body = json.dumps(shape_manifest(manifest, fmt), separators=(',', ':')).encode('utf-8')
+    else:
+        body = json.dumps(shape_manifest(manifest, fmt), indent=2).encode('utf-8')
+    return compress_manifest(body, encoding) if encoding else body
+
+def save_manifest(manifest: Dict, manifest_path: Path, fmt: str = 'pretty',
+                  encodings: Tuple[str, ...] = ()) -> List[Path]:
+    """
+    Save manifest to file, plus a sibling (manifest.json.gz / .br) per
+    requested encoding.
+    
+    The body is encoded once by encode_manifest() - the same bytes a
+    conditional publish sends - and each sibling is compressed from it.
+    Files are written to .tmp names and renamed into place, so a crash never
+    leaves a half-written manifest.
+    
+    Returns:
+        Paths written, plain file first
+    """
+    body = encode_manifest(manifest, fmt)
+    outputs = [(manifest_path, body)] + [
+        (manifest_path.with_name(manifest_path.name + MANIFEST_ENCODINGS[e]), compress_manifest(body, e))
+        for e in encodings
+    ]
+    for target, data in outputs:
+        tmp_path = target.with_name(target.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, target)
+    return [target for target, _ in outputs]
+
+def upload_manifest_to_r2(s3_client, bucket: str, manifest_path: Path, encoding: Optional[str] = None) -> bool:
+    """
+    Upload manifest to R2.
+    
+    Args:
+        encoding: 'gzip' or 'br' to upload the precompressed sibling written by
+            save_manifest() with the matching Content-Encoding
+    """
+    extra_args = {'ContentType': 'application/json'}
+    source = manifest_path
+    if encoding:
+        source = manifest_path.with_name(manifest_path.name + MANIFEST_ENCODINGS[encoding])
+        extra_args['ContentEncoding'] = encoding
+    try:
+        s3_client.upload_file(
+            str(source),
+            bucket,
+            MANIFEST_KEY,
+            ExtraArgs=extra_args
+        )
+        return True
+    except Exception as e:
+        print_color(f"❌ Error uploading manifest: {e}", Colors.RED)
+        return False
+
+DELTA_KEY_TEMPLATE = 'manifest-delta-{version}.json'
+DEFAULT_PUBLISH_RETRIES = 5
+
+def fetch_remote_manifest(s3_client, bucket: str) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Read the live manifest and its ETag, undoing any Content-Encoding.
+    
+    Returns:
+        (manifest, etag), or (None, None) if the object doesn't exist
+    """
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=MANIFEST_KEY)
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+            return None, None
+        raise
+    body = response['Body'].read()
+    encoding = response.get('ContentEncoding')
+    if encoding == 'gzip':
+        body = gzip.decompress(body)
+    elif encoding == 'br':
+        if brotli is None:
+            raise RuntimeError("Remote manifest is brotli-encoded: pip install brotli")
+        body = brotli.decompress(body)
+    return json.loads(body), response['ETag']
+
+def is_precondition_failure(error: ClientError) -> bool:
+    """True if a conditional write lost the race (412, or R2's 409 conflict)"""
+    status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+    code = error.response.get('Error', {}).get('Code')
+    return status in (409, 412) or code in ('PreconditionFailed', 'ConditionalRequestConflict')
+
+def merge_local_entries(published: Dict, local: Dict) -> Dict:
+    """
+    The published manifest plus any entries only the local copy has.
+    
+    A conditional publish merges our uploads onto the live manifest, which may
+    lack entries the local file holds (e.g. added by a non --delta run that
+    never reached R2); writing the published manifest alone would drop them.
+    """
+    model = VideoManifest(json.loads(json.dumps(published)))
+    kept = [v['key'] for v in local.get('videos', []) if model.add(v)]
+    if kept:
+        print_color(f"   Kept {len(kept)} local-only manifest entr{'y' if len(kept) == 1 else 'ies'}", Colors.YELLOW)
+    return model.to_dict()
+
+def publish_manifest_delta(s3_client, bucket: str, fallback: Dict, uploaded_files: List[str],
+                           public_url: str, fmt: str = 'pretty', encoding: Optional[str] = None,
+                           retries: int = DEFAULT_PUBLISH_RETRIES) -> Optional[Dict]:
+    """
+    Merge our uploads into the LIVE manifest and publish it conditionally.
+    
+    Each attempt reads the remote manifest + ETag, adds our files through
+    VideoManifest (entries another sync already added are skipped), and PUTs
+    with If-Match. A 412/409 means someone published in between, so we back
+    off and merge again on top of their version.
+    
+    Only after the manifest PUT wins do we write manifest-delta-<version>.json
+    with If-None-Match: *, so a version number is only ever claimed by the
+    sync that actually published it, and deltas are never overwritten.
+    
+    The local manifest is only used as the base when the remote one doesn't
+    exist - never regenerate from a listing!
+    
+    Returns:
+        The manifest that was published, or None on failure
+    """
+    for attempt in range(1, retries + 1):
+        remote, etag = fetch_remote_manifest(s3_client, bucket)
+        base = remote if remote is not None else fallback
+        base_version = base.get('manifestVersion', 0)
         
-        # Classify video type based on filename prefix
-        # sww-* = background video, anything else = entity intro
-        is_intro = not filename.startswith('sww-')
-        entity_id = filename.rsplit('.', 1)[0] if is_intro else None
+        model = VideoManifest(json.loads(json.dumps(base)))
+        added = [entry for entry in (make_manifest_entry(f, public_url) for f in uploaded_files) if model.add(entry)]
+        if not added:
+            print_color("   Remote manifest already contains every uploaded file", Colors.YELLOW)
+            return remote if remote is not None else model.to_dict()
         
-        # Determine content type from extension
-        ext = filename.split('.')[-1].lower()
-        content_type = 'video/quicktime' if ext == 'mov' else 'video/mp4'
+        model.fields['manifestVersion'] = base_version + 1
+        manifest = model.to_dict()
         
-        # Build manifest entry
-        entry = {
-            'key': filename,
-            'url': f"{public_url}/{filename}",
-            'contentType': content_type
+        put_args = {
+            'Bucket': bucket,
+            'Key': MANIFEST_KEY,
+            'Body': encode_manifest(manifest, fmt, encoding),
+            'ContentType': 'application/json',
         }
+        if encoding:
+            put_args['ContentEncoding'] = encoding
+        if etag:
+            put_args['IfMatch'] = etag
+        else:
+            put_args['IfNoneMatch'] = '*'
         
-        if is_intro:
-            # Entity intro video - add isIntro and entityId fields
-            entry['isIntro'] = True
-            entry['entityId'] = entity_id
-            
-            # Insert intro videos near the beginning (after existing intros)
-            # This ensures intro videos are grouped together in the manifest
-            insert_idx = 0
-            for i, v in enumerate(manifest['videos']):
-                if v.get('isIntro'):
-                    insert_idx = i + 1
-                else:
-                    break
-            manifest['videos'].insert(insert_idx, entry)
-            print_color(f"  ✅ Added intro: {filename} (entity: {entity_id})", Colors.GREEN)
+        try:
+            s3_client.put_object(**put_args)
+        except ClientError as e:
+            if not is_precondition_failure(e):
+                print_color(f"❌ Error uploading manifest: {e}", Colors.RED)
+                return None
+            wait = min(8.0, 0.5 * 2 ** (attempt - 1))
+            print_color(f"   ↻ Manifest changed remotely (attempt {attempt}/{retries}), re-merging in {wait:.1f}s", Colors.YELLOW)
+            time.sleep(wait)
+            continue
+        
+        version = manifest['manifestVersion']
+        delta = {
+            'fromVersion': base_version,
+            'version': version,
+            'generated': manifest['generated'],
+            'added': shape_manifest({'publicUrl': manifest.get('publicUrl', public_url), 'videos': added}, fmt)['videos']
+        }
+        try:
+            s3_client.put_object(
+                Bucket=bucket,
+                Key=DELTA_KEY_TEMPLATE.format(version=version),
+                Body=json.dumps(delta, separators=(',', ':')).encode('utf-8'),
+                ContentType='application/json',
+                CacheControl='public, max-age=31536000, immutable',
+                IfNoneMatch='*'
+            )
+            print_color(f"   ✅ Published manifest v{version} (+{len(added)}) and {DELTA_KEY_TEMPLATE.format(version=version)}", Colors.GREEN)
+        except ClientError as e:
+            # Manifest is live; clients missing this delta fall back to a full fetch
+            print_color(f"   ⚠️  Manifest v{version} published but delta write failed: {e}", Colors.YELLOW)
+        return manifest
+    
+    print_color(f"❌ Gave up publishing manifest after {retries} conflicting attempts", Colors.RED)
+    return None
+
+SHARD_PREFIX = 'manifest/'
+SHARD_INDEX_KEY = SHARD_PREFIX + 'index.json'
+DEFAULT_SHARD_SIZE = 250
+
+def build_sharded_manifest(manifest: Dict, shard_size: int) -> Tuple[Dict, Dict[str, bytes]]:
+    """
+    Split a manifest into a small index document plus background shards.
+    
+    Backgrounds are cut into fixed-size shards in manifest order. Because new
+    backgrounds are appended, earlier shards never change and keep their
+    content-hashed key (and therefore stay cached on clients and the CDN).
+    
+    Index layout:
+        {"version", "generated", "publicUrl", "totalVideos", "introCount",
+         "backgroundCount", "shardSize",
+         "intros": {entityId: {"key", "contentType"}},
+         "shards": [{"key": "manifest/backgrounds-0000.<hash>.json", "count": 250}]}
+    
+    Returns:
+        (index dict, {shard key: compact JSON bytes})
+    """
+    compact = shape_manifest(manifest, 'compact')
+    intros = {}
+    backgrounds = []
+    for video in compact['videos']:
+        if video.get('isIntro'):
+            # First intro for an entity wins, matching VideoPlayer's find()
+            intros.setdefault(video['entityId'], {'key': video['key'], 'contentType': video['contentType']})
         else:
-            # Background video - append at end
-            manifest['videos'].append(entry)
-            print_color(f"  ✅ Added background: {filename}", Colors.GREEN)
+            backgrounds.append(video)
     
-    # Update manifest metadata
-    manifest['totalVideos'] = len(manifest['videos'])
-    manifest['generated'] = datetime.utcnow().isoformat() + 'Z'
+    shards = {}
+    shard_list = []
+    for number, start in enumerate(range(0, len(backgrounds), shard_size)):
+        chunk = backgrounds[start:start + shard_size]
+        body = json.dumps({'shard': number, 'videos': chunk}, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.md5(body).hexdigest()[:12]
+        key = f"{SHARD_PREFIX}backgrounds-{number:04d}.{digest}.json"
+        shards[key] = body
+        shard_list.append({'key': key, 'count': len(chunk)})
     
-    return manifest
+    index = {
+        'version': '3.0.0',
+        'generated': manifest.get('generated', datetime.utcnow().isoformat() + 'Z'),
+        'publicUrl': manifest.get('publicUrl', R2_CONFIG['public_url']),
+        'totalVideos': len(compact['videos']),
+        'introCount': len(intros),
+        'backgroundCount': len(backgrounds),
+        'shardSize': shard_size,
+        'intros': intros,
+        'shards': shard_list
+    }
+    return index, shards
 
-def save_manifest(manifest: Dict, manifest_path: Path):
-    """Save manifest to file"""
-    with open(manifest_path, 'w') as f:
-        json.dump(manifest, f, indent=2)
+def save_sharded_manifest(index: Dict, shards: Dict[str, bytes], out_dir: Path):
+    """
+    Write index and shards under out_dir, removing shard files the new index
+    no longer references.
+    """
+    index_path = out_dir / 'index.json'
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for key, body in shards.items():
+        shard_path = out_dir / key[len(SHARD_PREFIX):]
+        if not shard_path.exists():
+            shard_path.write_bytes(body)
+    for stale in out_dir.glob('backgrounds-*.json'):
+        if SHARD_PREFIX + stale.name not in shards:
+            stale.unlink()
+    
+    tmp_path = index_path.with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, separators=(',', ':'))
+    os.replace(tmp_path, index_path)
 
-def upload_manifest_to_r2(s3_client, bucket: str, manifest_path: Path) -> bool:
-    """Upload manifest to R2"""
+def fetch_remote_shard_index(s3_client, bucket: str) -> Optional[Dict]:
+    """The index currently published in R2, or None if there is none"""
     try:
-        s3_client.upload_file(
-            str(manifest_path),
-            bucket,
-            'video-manifest.json',
-            ExtraArgs={'ContentType': 'application/json'}
+        response = s3_client.get_object(Bucket=bucket, Key=SHARD_INDEX_KEY)
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+            return None
+        raise
+    try:
+        return json.loads(response['Body'].read())
+    except json.JSONDecodeError:
+        return None
+
+def upload_sharded_manifest(s3_client, bucket: str, index: Dict, shards: Dict[str, bytes]) -> Tuple[int, int]:
+    """
+    Upload shards the published index doesn't reference, then the index.
+    
+    Shards go first so a client never sees an index pointing at a missing
+    shard. The diff is taken against the index in R2, not the local copy:
+    that index is only written once its shards are up, so a run that failed
+    part-way simply re-sends whatever it didn't finish. Shards are immutable
+    (content-hashed names) and cached for a year; the index must be
+    revalidated on every fetch.
+    
+    Returns:
+        (shards uploaded, shards unchanged); raises on failure
+    """
+    published = fetch_remote_shard_index(s3_client, bucket)
+    known = {shard['key'] for shard in (published or {}).get('shards', [])}
+    changed = [key for key in shards if key not in known]
+    
+    for key in changed:
+        s3_client.put_object(
+            Bucket=bucket, Key=key, Body=shards[key],
+            ContentType='application/json',
+            CacheControl='public, max-age=31536000, immutable'
         )
+    s3_client.put_object(
+        Bucket=bucket, Key=SHARD_INDEX_KEY,
+        Body=json.dumps(index, separators=(',', ':')).encode('utf-8'),
+        ContentType='application/json',
+        CacheControl='no-cache'
+    )
+    return len(changed), len(shards) - len(changed)
+
+def publish_sharded_manifest(s3_client, bucket: str, manifest: Dict, shard_size: int, shard_dir: Path) -> bool:
+    """Save the sharded manifest locally and upload its changed shards plus the index"""
+    print_color("\n📤 Publishing sharded manifest...", Colors.CYAN)
+    index, shards = build_sharded_manifest(manifest, shard_size)
+    save_sharded_manifest(index, shards, shard_dir)
+    print_color(f"   ✅ Saved: {shard_dir} ({len(shards)} shard(s), index {format_size((shard_dir / 'index.json').stat().st_size)})", Colors.GREEN)
+    try:
+        sent, unchanged = upload_sharded_manifest(s3_client, bucket, index, shards)
+        print_color(f"   ✅ Uploaded {sent} changed shard(s) + index ({unchanged} unchanged)", Colors.GREEN)
         return True
     except Exception as e:
-        print_color(f"❌ Error uploading manifest: {e}", Colors.RED)
+        print_color(f"   ❌ Failed to upload sharded manifest: {e}", Colors.RED)
         return False
 
 def main():
     # Parse arguments
     dry_run = '--dry-run' in sys.argv
     force = '--force' in sys.argv
+    rescan = '--rescan' in sys.argv
+    sharded = '--sharded' in sys.argv
+    delta_publish = '--delta' in sys.argv
+    full_listing = '--full-listing' in sys.argv
+    R2_CONFIG['endpoint_url'] = get_option('--endpoint-url', R2_CONFIG['endpoint_url'])
+    try:
+        jobs = max(1, int(get_option('--jobs', '1')))
+        scan_workers = max(1, int(get_option('--scan-workers', '16')))
+        shard_size = max(1, int(get_option('--shard-size', str(DEFAULT_SHARD_SIZE))))
+        publish_retries = max(1, int(get_option('--publish-retries', str(DEFAULT_PUBLISH_RETRIES))))
+        listing_ttl = float(get_option('--listing-ttl', str(DEFAULT_LISTING_TTL)))
+        remote_workers = max(1, int(get_option('--remote-workers', str(DEFAULT_REMOTE_WORKERS))))
+        TRANSFER_CONFIG['part_size'] = max(5, int(get_option('--part-size', str(TRANSFER_CONFIG['part_size'] // MB)))) * MB
+        TRANSFER_CONFIG['part_concurrency'] = max(1, int(get_option('--part-concurrency', str(TRANSFER_CONFIG['part_concurrency']))))
+        TRANSFER_CONFIG['abort_stale_hours'] = float(get_option('--abort-stale-hours', str(TRANSFER_CONFIG['abort_stale_hours'])))
+        max_bandwidth = get_option('--max-bandwidth')
+        if max_bandwidth:
+            TRANSFER_CONFIG['max_bandwidth'] = int(float(max_bandwidth) * MB)
+    except ValueError:
+        print_color("❌ --jobs, --scan-workers, --remote-workers, --listing-ttl, --shard-size, --publish-retries, --part-size, --part-concurrency, --max-bandwidth and --abort-stale-hours must be numbers", Colors.RED)
+        return 1
+    
+    manifest_format = get_option('--manifest-format', 'pretty')
+    manifest_encoding = get_option('--manifest-encoding')
+    precompress = {'gz': 'gzip', 'gzip': 'gzip', 'br': 'br'}
+    try:
+        encodings = [precompress[e.strip()] for e in get_option('--precompress', '').split(',') if e.strip()]
+    except KeyError:
+        print_color("❌ --precompress accepts gz and/or br", Colors.RED)
+        return 1
+    if manifest_format not in MANIFEST_FORMATS:
+        print_color(f"❌ --manifest-format must be one of: {', '.join(MANIFEST_FORMATS)}", Colors.RED)
+        return 1
+    if manifest_encoding and manifest_encoding not in MANIFEST_ENCODINGS:
+        print_color(f"❌ --manifest-encoding must be one of: {', '.join(MANIFEST_ENCODINGS)}", Colors.RED)
+        return 1
+    if manifest_encoding and manifest_encoding not in encodings:
+        encodings.append(manifest_encoding)
+    if 'br' in encodings and brotli is None:
+        print_color("❌ Brotli output needs: pip install brotli", Colors.RED)
+        return 1
+    encodings = tuple(dict.fromkeys(encodings))
     
     # Paths
     script_dir = Path(__file__).parent
@@ -287,18 +1698,28 @@ def main():
     videos_folder = project_root / 'videos-to-upload'
     manifest_path = project_root / 'public' / 'r2-video-manifest.json'
     manifest_cf_path = project_root / 'public' / 'cloudflare' / 'video-manifest.json'
+    shard_dir = project_root / 'public' / 'video-manifest'
+    state_dir = videos_folder / '.sync-state'
     
     print_color("\n═══════════════════════════════════════════════════════════════", Colors.CYAN)
     print_color("            Cloudflare R2 Video Sync (Python)                   ", Colors.CYAN + Colors.BOLD)
     print_color("═══════════════════════════════════════════════════════════════", Colors.CYAN)
     print_color(f"Source:     {videos_folder}", Colors.GREEN)
     print_color(f"Bucket:     {R2_CONFIG['bucket_name']}", Colors.GREEN)
+    print_color(f"Endpoint:   {R2_CONFIG['endpoint_url']}", Colors.GREEN)
     print_color(f"Public URL: {R2_CONFIG['public_url']}", Colors.GREEN)
     
     if dry_run:
         print_color("MODE: DRY RUN (no changes will be made)", Colors.YELLOW)
     if force:
         print_color("MODE: FORCE (re-upload all files)", Colors.YELLOW)
+    if rescan:
+        print_color("MODE: RESCAN (ignore scan index)", Colors.YELLOW)
+    if jobs > 1:
+        print_color(f"MODE: CONCURRENT ({jobs} parallel uploads)", Colors.YELLOW)
+    print_color(f"Multipart:  {TRANSFER_CONFIG['part_size'] // MB}MB parts × {TRANSFER_CONFIG['part_concurrency']} per file"
+                + (f", capped at {format_size(TRANSFER_CONFIG['max_bandwidth'])}/s" if TRANSFER_CONFIG['max_bandwidth'] else ""),
+                Colors.GREEN)
     
     # Check videos folder exists
     if not videos_folder.exists():
@@ -307,8 +1728,13 @@ def main():
     
     # Scan local videos
     print_color("\n📁 Scanning local videos...", Colors.CYAN)
-    local_videos = scan_local_videos(videos_folder)
-    print_color(f"   Found {len(local_videos)} video(s) locally", Colors.GREEN)
+    scan_start = time.time()
+    scan_index = ScanIndex(state_dir / 'scan-index.sqlite')
+    try:
+        local_videos, local_paths = scan_local_videos(videos_folder, scan_index, scan_workers, rescan)
+    finally:
+        scan_index.close()
+    print_color(f"   Found {len(local_videos)} video(s) locally ({time.time() - scan_start:.2f}s)", Colors.GREEN)
     
     if not local_videos:
         print_color("   No videos to sync. Add videos to videos-to-upload/ folder.", Colors.YELLOW)
@@ -316,22 +1742,45 @@ def main():
     
     # Connect to R2
     print_color("\n🔧 Connecting to Cloudflare R2...", Colors.CYAN)
-    s3_client = get_s3_client()
+    # Each file keeps up to part_concurrency requests in flight
+    s3_client = get_s3_client(max_pool_connections=max(10, jobs * TRANSFER_CONFIG['part_concurrency']))
     if not s3_client:
         return 1
     print_color("   ✅ Connected", Colors.GREEN)
     
-    # List R2 videos
-    print_color("\n📥 Scanning R2 bucket...", Colors.CYAN)
-    remote_videos = list_r2_videos(s3_client, R2_CONFIG['bucket_name'])
-    print_color(f"   Found {len(remote_videos)} video(s) in R2", Colors.GREEN)
+    # Look up R2 state for the local files
+    remote_cache = RemoteStateCache(
+        state_dir / 'remote-state.json',
+        f"{R2_CONFIG['endpoint_url']}/{R2_CONFIG['bucket_name']}",
+        listing_ttl
+    )
+    if full_listing:
+        print_color("\n📥 Scanning R2 bucket...", Colors.CYAN)
+        remote_videos = list_r2_videos(s3_client, R2_CONFIG['bucket_name'])
+        print_color(f"   Found {len(remote_videos)} video(s) in R2", Colors.GREEN)
+    else:
+        print_color("\n📥 Checking R2 for local videos...", Colors.CYAN)
+        remote_videos, remote_stats = fetch_remote_state(
+            s3_client, R2_CONFIG['bucket_name'], list(local_videos), remote_cache, remote_workers
+        )
+        print_color(f"   {len(remote_videos)}/{len(local_videos)} already in R2 "
+                    f"({remote_stats['cached']} cached, {remote_stats['listed']} listed, {remote_stats['head']} HEAD)", Colors.GREEN)
+        if remote_stats['errors']:
+            print_color(f"   ⚠️  {remote_stats['errors']} key(s) could not be checked and will be uploaded", Colors.YELLOW)
     
     # Compare
+    hash_cache = HashCache(state_dir / 'hash-cache.json')
     if force:
         to_upload = [(f, s) for f, s in local_videos.items()]
         already_synced = []
     else:
-        to_upload, already_synced = compare_files(local_videos, remote_videos)
+        # Only same-size files need a content check
+        same_size = [f for f, s in local_videos.items()
+                     if f in remote_videos and remote_videos[f]['size'] == s]
+        hashes = hash_local_videos(videos_folder, {f: local_paths[f] for f in same_size}, hash_cache)
+        to_upload, already_synced = compare_files(
+            local_videos, remote_videos, hashes, s3_client, R2_CONFIG['bucket_name']
+        )
     
     print_color(f"\n═══ Analysis ═══", Colors.CYAN)
     print_color(f"   To upload: {len(to_upload)}", Colors.GREEN if to_upload else Colors.YELLOW)
@@ -339,6 +1788,13 @@ def main():
     
     if not to_upload:
         print_color("\n✅ All videos already synced!", Colors.GREEN + Colors.BOLD)
+        if sharded and not dry_run:
+            # Shards are derived from the manifest, not the uploads: keep them current regardless
+            manifest = load_manifest(manifest_path)
+            if not manifest:
+                print_color("❌ Could not load manifest", Colors.RED)
+                return 1
+            publish_sharded_manifest(s3_client, R2_CONFIG['bucket_name'], manifest, shard_size, shard_dir)
         return 0
     
     # Show what will be uploaded
@@ -359,12 +1815,32 @@ def main():
     uploaded = []
     failed = []
     
-    for filename, size in to_upload:
-        local_path = videos_folder / filename
-        if upload_file(s3_client, R2_CONFIG['bucket_name'], local_path, filename, size):
-            uploaded.append(filename)
-        else:
-            failed.append(filename)
+    # Digests are stored as object metadata so the next run can compare content
+    hashes = hash_local_videos(videos_folder, {f: local_paths[f] for f, _ in to_upload}, hash_cache)
+    checksums = {f: h['sha256'] for f, h in hashes.items()}
+    
+    journal = UploadJournal(state_dir / 'upload-journal.json')
+    limiter = BandwidthLimiter(TRANSFER_CONFIG['max_bandwidth']) if TRANSFER_CONFIG['max_bandwidth'] else None
+    abort_stale_uploads(s3_client, R2_CONFIG['bucket_name'], journal)
+    
+    if jobs > 1:
+        # Manifest is only touched below, after every worker has finished
+        uploaded, failed = upload_files_concurrently(
+            s3_client, R2_CONFIG['bucket_name'], local_paths, to_upload, jobs,
+            journal=journal, limiter=limiter, checksums=checksums
+        )
+    else:
+        for filename, size in to_upload:
+            local_path = local_paths[filename]
+            if upload_file(s3_client, R2_CONFIG['bucket_name'], local_path, filename, size,
+                           journal=journal, limiter=limiter, sha256=checksums.get(filename)):
+                uploaded.append(filename)
+            else:
+                failed.append(filename)
+    
+    # Their ETags changed; look them up again next run
+    remote_cache.forget(uploaded + failed)
+    remote_cache.save()
     
     print_color(f"\n   ✅ Uploaded: {len(uploaded)}", Colors.GREEN)
     if failed:
@@ -383,26 +1859,53 @@ def main():
         
         print_color(f"   Loaded manifest with {manifest.get('totalVideos', 0)} videos", Colors.GREEN)
         
-        manifest = update_manifest(manifest, uploaded, R2_CONFIG['public_url'])
+        published = None
+        if delta_publish:
+            # Merge onto the live manifest first so the local copy picks up
+            # anything another sync published since our last run
+            print_color("\n📤 Publishing manifest to R2 (conditional)...", Colors.CYAN)
+            published = publish_manifest_delta(
+                s3_client, R2_CONFIG['bucket_name'], manifest, uploaded, R2_CONFIG['public_url'],
+                manifest_format, manifest_encoding, publish_retries
+            )
+        
+        if published:
+            manifest = merge_local_entries(published, manifest)
+        else:
+            manifest = update_manifest(manifest, uploaded, R2_CONFIG['public_url'])
         
-        # Save locally
-        save_manifest(manifest, manifest_path)
-        print_color(f"   ✅ Saved: {manifest_path}", Colors.GREEN)
+        # Save locally (encoded once, then copied)
+        written = save_manifest(manifest, manifest_path, manifest_format, encodings)
+        for path in written:
+            print_color(f"   ✅ Saved: {path} ({format_size(path.stat().st_size)})", Colors.GREEN)
         
         # Also save to cloudflare folder
         manifest_cf_path.parent.mkdir(parents=True, exist_ok=True)
-        save_manifest(manifest, manifest_cf_path)
-        print_color(f"   ✅ Saved: {manifest_cf_path}", Colors.GREEN)
+        for path in written:
+            cf_path = manifest_cf_path.with_name(manifest_cf_path.name + path.name[len(manifest_path.name):])
+            shutil.copyfile(path, cf_path)
+            print_color(f"   ✅ Saved: {cf_path}", Colors.GREEN)
         
         # Upload to R2
-        print_color("\n📤 Uploading manifest to R2...", Colors.CYAN)
-        if upload_manifest_to_r2(s3_client, R2_CONFIG['bucket_name'], manifest_path):
-            print_color("   ✅ Manifest uploaded to R2", Colors.GREEN)
+        if delta_publish:
+            if not published:
+                print_color("   ❌ Failed to publish manifest to R2 (local copy updated)", Colors.RED)
         else:
-            print_color("   ❌ Failed to upload manifest to R2", Colors.RED)
+            print_color("\n📤 Uploading manifest to R2...", Colors.CYAN)
+            if upload_manifest_to_r2(s3_client, R2_CONFIG['bucket_name'], manifest_path, manifest_encoding):
+                print_color("   ✅ Manifest uploaded to R2", Colors.GREEN)
+            else:
+                print_color("   ❌ Failed to upload manifest to R2", Colors.RED)
         
         print_color(f"\n   Total videos in manifest: {manifest['totalVideos']}", Colors.GREEN)
     
+    if sharded:
+        manifest = manifest if uploaded else load_manifest(manifest_path)
+        if manifest:
+            publish_sharded_manifest(s3_client, R2_CONFIG['bucket_name'], manifest, shard_size, shard_dir)
+        else:
+            print_color("❌ Could not load manifest for the sharded publish", Colors.RED)
+    
     # Summary
     print_color("\n═══════════════════════════════════════════════════════════════", Colors.CYAN)
     print_color("            ✅ Sync Complete!                                   ", Colors.GREEN + Colors.BOLD)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+DO Snapshot Export Test
+Checks that do-snapshot.py stores every message of a conversation
+
+Seeds an in-process DO stand-in with one conversation holding more
+messages than /api/conversation returns by default (100), exports a
+snapshot of it and compares the row counts with what was seeded.
+
+Usage:
+    python3 test-do-snapshot.py
+    python3 test-do-snapshot.py --messages 5000
+
+Options:
+    --messages N    Messages seeded into the single conversation (default: 250)
+"""
+
+import importlib.util
+import sqlite3
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+TEST_SCRIPTS = Path(__file__).resolve().parent.parent / 'TEST-SCRIPTS'
+
+def load_script(name, path):
+    """Import a hyphenated script as a module"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+standin = load_script('do_standin_server', TEST_SCRIPTS / 'do-standin-server.py')
+snapshot = load_script('do_snapshot', TEST_SCRIPTS / 'do-snapshot.py')
+
+def main():
+    messages = int(snapshot.get_option('--messages', 250))
+
+    print(f"🌱 Seeding one conversation with {messages} messages...")
+    server = standin.make_server(port=0, messages=messages, conversations=1, entities=1,
+                                 godmode_share=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    snapshot.do.API_BASE = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / 'snapshot.sqlite'
+            snapshot.export_snapshot(db_path, 2, 0)
+
+            conn = sqlite3.connect(db_path)
+            stored, = conn.execute('SELECT COUNT(*) FROM messages').fetchone()
+            conversations = conn.execute('SELECT conv_key, message_count FROM conversations').fetchall()
+            conn.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    ok = True
+    if stored != messages:
+        print(f"❌ Snapshot holds {stored} of {messages} messages")
+        ok = False
+    if len(conversations) != 1 or conversations[0][1] != messages:
+        print(f"❌ Expected one conversation of {messages} messages, got {conversations}")
+        ok = False
+    if ok:
+        print(f"✅ All {messages} messages exported from {conversations[0][0]}")
+    return ok
+
+if __name__ == "__main__":
+    exit(0 if main() else 1)
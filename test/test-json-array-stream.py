@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+JSON Array Stream Test
+Checks find-latest-do-message.py's incremental JsonArrayStream parser
+
+Feeds JSON arrays of awkward messages - escaped quotes and backslashes,
+braces and brackets inside strings, nested botParams/context, multi-byte
+UTF-8 - split at every byte offset and in random chunk sizes, with and
+without a --fields projection, and compares the result with json.loads.
+Finally fetches a seeded stand-in conversation with --fields and checks it
+against the full fetch.
+
+Usage:
+    python3 test-json-array-stream.py
+    python3 test-json-array-stream.py --rounds 2000
+
+Options:
+    --rounds N    Random chunkings per document (default: 300)
+"""
+
+import importlib.util
+import json
+import random
+import threading
+from pathlib import Path
+
+TEST_SCRIPTS = Path(__file__).resolve().parent.parent / 'TEST-SCRIPTS'
+
+def load_script(name, path):
+    """Import a hyphenated script as a module"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+finder = load_script('find_latest_do_message', TEST_SCRIPTS / 'find-latest-do-message.py')
+standin = load_script('do_standin_server', TEST_SCRIPTS / 'do-standin-server.py')
+
+FIELDS = ['id', 'timestamp', 'botParams']
+
+MESSAGES = [
+    {'id': 'a1', 'timestamp': 1, 'text': 'plain'},
+    {'id': 'a2', 'timestamp': 2, 'text': 'she said "hi" and left \\ twice \\\\', 'username': 'Q"uote'},
+    {'id': 'a3', 'timestamp': 3, 'text': '{not an object} [nor an array] , : "', 'color': '}{]['},
+    {'id': 'a4', 'timestamp': 4, 'context': ['{"id": "fake", "timestamp": 99}', {'nested': [1, {'x': '}'}]}],
+     'botParams': {'entity': 'e-"1"', 'ais': 'Bot:123', 'extra': {'deep': ['[', ']']}}},
+    {'timestamp': 5, 'text': 'ünïcödé — 漢字 🎬', 'id': 'a5', 'botParams': None},
+    {'id': 'a6', 'timestamp': 6, 'text': '', 'empty': {}, 'none': [], 'flag': True, 'n': -1.5e3},
+    {'id': 'a7', 'timestamp': 7, 'text': '\\"', 'botParams': {'ais': '\\'}},
+]
+
+def project(message, fields):
+    return {k: v for k, v in message.items() if k in fields}
+
+def expected(messages, fields):
+    return [project(m, fields) for m in messages] if fields else messages
+
+def parse(body, cuts, fields):
+    """Feed body split at the given offsets"""
+    parser = finder.JsonArrayStream(fields)
+    out, prev = [], 0
+    for cut in list(cuts) + [len(body)]:
+        out += parser.feed(body[prev:cut])
+        prev = cut
+    return out
+
+def check_splits(name, body, messages, fields, rng, rounds):
+    want = expected(messages, fields)
+    label = f"{name}{' --fields ' + ','.join(fields) if fields else ''}"
+    for cut in range(len(body) + 1):
+        got = parse(body, [cut], fields)
+        if got != want:
+            print(f"❌ {label}: split at byte {cut}: {got!r}")
+            return False
+    for _ in range(rounds):
+        cuts = sorted(rng.sample(range(1, len(body)), min(len(body) - 1, rng.randint(1, 40))))
+        got = parse(body, cuts, fields)
+        if got != want:
+            print(f"❌ {label}: cuts {cuts}: {got!r}")
+            return False
+    single = parse(body, range(1, len(body)), fields)
+    if single != want:
+        print(f"❌ {label}: byte-at-a-time: {single!r}")
+        return False
+    print(f"✅ {label}: every split point, {rounds} random chunkings and byte-at-a-time")
+    return True
+
+def check_standin_fields():
+    """fetch_conversation with fields returns the same messages, reduced"""
+    server = standin.make_server(port=0, messages=300, conversations=1, entities=1, godmode_share=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    finder.API_BASE = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        session = finder.make_session(1)
+        key, = finder.get_json(session, f"{finder.API_BASE}/api/admin/list-keys").get('keys', [])
+        full = list(finder.fetch_conversation(session, key, finder.DEFAULT_RETRIES, limit=finder.FULL_CONVERSATION_LIMIT))
+        reduced = list(finder.fetch_conversation(session, key, finder.DEFAULT_RETRIES,
+                                                 limit=finder.FULL_CONVERSATION_LIMIT, fields=FIELDS))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    if len(full) != 300 or reduced != [project(m, FIELDS) for m in full]:
+        print(f"❌ Stand-in conversation with --fields: {len(reduced)} of {len(full)} messages match")
+        return False
+    print(f"✅ Stand-in conversation: {len(full)} messages, --fields {','.join(FIELDS)} matches the full fetch")
+    return True
+
+def main():
+    rounds = int(finder.get_option('--rounds', 300))
+    rng = random.Random(1)
+
+    documents = {
+        'compact': json.dumps(MESSAGES, separators=(',', ':'), ensure_ascii=False).encode(),
+        'pretty': json.dumps(MESSAGES, indent=2).encode(),
+        'empty': b'[]',
+        'one': json.dumps(MESSAGES[3:4]).encode(),
+    }
+
+    ok = True
+    for name, body in documents.items():
+        messages = json.loads(body)
+        for fields in (None, FIELDS):
+            ok &= check_splits(name, body, messages, fields, rng, rounds)
+    ok &= check_standin_fields()
+    return ok
+
+if __name__ == "__main__":
+    exit(0 if main() else 1)
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+LM Studio Concurrency Sweep
+Measures how many parallel chat completions an LM Studio host sustains
+before latency collapses
+
+For every host × model it steps through increasing load and reports
+throughput (requests/s, generated tokens/s) and latency percentiles per
+step, using the same chat payload as test-lmstudio-direct.py.
+
+    closed loop - N workers each send their next request as soon as the
+                  previous one returns: N requests always in flight
+    open loop   - requests arrive at a fixed Poisson rate whether or not
+                  earlier ones have finished, so queueing shows up in latency
+
+Usage:
+    python3 test-lmstudio-concurrency.py --hosts 10.0.0.100,10.0.0.102 --levels 1,2,4,8
+    python3 test-lmstudio-concurrency.py --mode open --rates 0.5,1,2,4 --duration 120
+
+Options:
+    --hosts H[:P],...     LM Studio hosts (default: LM_STUDIO_HOST from test-lmstudio-direct.py)
+    --models a,b          Models to sweep (default: TEST_MODEL)
+    --mode MODE           closed | open | both (default: closed)
+    --levels 1,2,4,8      Closed-loop in-flight requests per step (default: 1,2,4,8,16)
+    --rates 0.5,1,2       Open-loop arrival rates in requests/s (default: 0.25,0.5,1,2,4)
+    --duration S          Seconds per step (default: 60)
+    --timeout S           Per-request timeout (default: 300)
+    --stop-p95 S          Stop escalating a sweep once p95 latency exceeds S seconds
+    --stop-errors F       ...or once more than this fraction of requests fail (default: 0.5)
+    --seed N              RNG seed for open-loop arrivals (default: 1)
+    --json PATH           Also write every step's results as JSON
+"""
+
+import importlib.util
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+DIRECT_SCRIPT = Path(__file__).resolve().parent / 'test-lmstudio-direct.py'
+MODEL_LOADING_SCRIPT = Path(__file__).resolve().parent / 'test-model-loading.py'
+
+OPEN_LOOP_MAX_THREADS = 512
+
+def load_script(name, path):
+    """Import a hyphenated script as a module"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+direct = load_script('test_lmstudio_direct', DIRECT_SCRIPT)
+log = direct.log
+get_option = direct.get_option
+
+# Latency summaries and pooled sessions shared with the other load tests
+model_loading = load_script('test_model_loading', MODEL_LOADING_SCRIPT)
+summarize_latencies = model_loading.summarize_latencies
+make_session = model_loading.make_session
+
+def open_loop_threads(rate, timeout):
+    """Enough threads that a send is never held back by earlier slow requests"""
+    return max(1, min(int(rate * timeout) + 1, OPEN_LOOP_MAX_THREADS))
+
+class Step:
+    """Results of one load step against one host/model"""
+
+    def __init__(self, host, model, mode, load):
+        self.host = host
+        self.model = model
+        self.mode = mode
+        self.load = load
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.tokens = 0
+        self.errors = 0
+        self.error_samples = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.started = None
+        self.finished = None
+
+    def begin(self):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def record(self, latency, tokens, error):
+        with self.lock:
+            self.in_flight -= 1
+            if error:
+                self.errors += 1
+                if len(self.error_samples) < 3:
+                    self.error_samples.append(error)
+            else:
+                self.latencies.append(latency)
+                self.tokens += tokens or 0
+
+    def results(self):
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        completed = len(self.latencies)
+        attempted = completed + self.errors
+        return {
+            'host': self.host,
+            'model': self.model,
+            'mode': self.mode,
+            'load': self.load,
+            'seconds': round(elapsed, 2),
+            'completed': completed,
+            'errors': self.errors,
+            'errorRate': round(self.errors / attempted, 3) if attempted else 0,
+            'errorSamples': self.error_samples,
+            'maxInFlight': self.max_in_flight,
+            'requestsPerSecond': round(completed / elapsed, 3) if elapsed else 0,
+            'tokensPerSecond': round(self.tokens / elapsed, 1) if elapsed else 0,
+            'latencySeconds': {k: round(v, 3) if isinstance(v, float) else v
+                               for k, v in summarize_latencies(self.latencies).items()},
+        }
+
+class HostSweep:
+    def __init__(self, host, model, timeout, max_in_flight):
+        self.host = host
+        self.model = model
+        self.timeout = timeout
+        name, port = direct.parse_host(host)
+        self.url = f"http://{name}:{port}/v1/chat/completions"
+        self.session = make_session(max_in_flight + 1)
+        self.body = direct.build_chat_payload(model, direct.BENCHMARK_PROMPT)
+
+    def request(self, step):
+        step.begin()
+        start = time.perf_counter()
+        try:
+            response = self.session.post(self.url, json=self.body, timeout=self.timeout)
+            latency = time.perf_counter() - start
+            if response.status_code != 200:
+                step.record(latency, 0, f"HTTP {response.status_code}: {response.text[:120]}")
+                return
+            result = response.json()
+            if not result.get('choices'):
+                step.record(latency, 0, 'no choices in response')
+                return
+            step.record(latency, (result.get('usage') or {}).get('completion_tokens'), None)
+        except Exception as e:
+            step.record(time.perf_counter() - start, 0, str(e))
+
+    def warm_up(self):
+        """One unmeasured request so the first step does not pay for a model load"""
+        step = Step(self.host, self.model, 'warmup', 1)
+        step.started = time.perf_counter()
+        self.request(step)
+        return step.errors == 0, step.error_samples
+
+    def closed_loop(self, workers, duration):
+        step = Step(self.host, self.model, 'closed', workers)
+        step.started = time.perf_counter()
+        deadline = step.started + duration
+
+        def worker():
+            while time.perf_counter() < deadline:
+                self.request(step)
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        step.finished = time.perf_counter()
+        return step.results()
+
+    def open_loop(self, rate, duration, rng):
+        """Poisson arrivals at `rate`/s for `duration`s, then wait for stragglers"""
+        step = Step(self.host, self.model, 'open', rate)
+        arrivals = []
+        t = rng.expovariate(rate)
+        while t < duration:
+            arrivals.append(t)
+            t += rng.expovariate(rate)
+
+        pool_size = max(1, min(len(arrivals), open_loop_threads(rate, self.timeout)))
+        step.started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=pool_size) as pool:
+            for at in arrivals:
+                delay = step.started + at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self.request, step)
+        step.finished = time.perf_counter()
+        return step.results()
+
+def fmt_s(value):
+    return '-' if value is None else f"{value:.2f}s"
+
+def print_step(r):
+    lat = r['latencySeconds']
+    unit = 'in flight' if r['mode'] == 'closed' else 'req/s offered'
+    log(f"{r['mode']:<6} {r['load']:>6g} {unit:<13} done={r['completed']:<5} err={r['errors']:<4} "
+        f"{r['requestsPerSecond']:>7.2f} req/s {r['tokensPerSecond']:>8.1f} tok/s  "
+        f"p50={fmt_s(lat['p50']):>8} p95={fmt_s(lat['p95']):>8} p99={fmt_s(lat['p99']):>8} "
+        f"max={fmt_s(lat['max']):>8} (peak {r['maxInFlight']} in flight)", "SWEEP")
+    for sample in r['errorSamples']:
+        log(f"   ❌ {sample}", "SWEEP")
+
+def collapsed(r, stop_p95, stop_errors):
+    if r['errorRate'] > stop_errors:
+        return f"error rate {r['errorRate']:.0%}"
+    p95 = r['latencySeconds']['p95']
+    if stop_p95 and p95 is not None and p95 > stop_p95:
+        return f"p95 {p95:.1f}s > {stop_p95:g}s"
+    return None
+
+def sweep(host, model, mode, levels, rates, duration, timeout, stop_p95, stop_errors, rng):
+    log("=" * 80)
+    log(f"🖥  {host}  model={model}", "SWEEP")
+    plan = []
+    if mode in ('closed', 'both'):
+        plan += [('closed', n) for n in levels]
+    if mode in ('open', 'both'):
+        plan += [('open', r) for r in rates]
+
+    # One pooled connection per thread any step can run, or requests queue for a connection
+    max_in_flight = max(n if kind == 'closed' else open_loop_threads(n, timeout) for kind, n in plan)
+    runner = HostSweep(host, model, timeout, max_in_flight)
+    ok, errors = runner.warm_up()
+    if not ok:
+        log(f"❌ Warm-up request failed, skipping: {errors[0]}", "SWEEP")
+        return []
+
+    results = []
+    stopped = set()
+    for kind, load in plan:
+        if kind in stopped:
+            continue
+        if kind == 'closed':
+            r = runner.closed_loop(load, duration)
+        else:
+            r = runner.open_loop(load, duration, rng)
+        print_step(r)
+        results.append(r)
+        reason = collapsed(r, stop_p95, stop_errors)
+        if reason:
+            log(f"⛔ {kind} loop stopped escalating: {reason}", "SWEEP")
+            stopped.add(kind)
+    return results
+
+def main():
+    hosts = get_option('--hosts', f"{direct.LM_STUDIO_HOST}:{direct.LM_STUDIO_PORT}").split(',')
+    models = get_option('--models', direct.TEST_MODEL).split(',')
+    mode = get_option('--mode', 'closed')
+    levels = [int(n) for n in get_option('--levels', '1,2,4,8,16').split(',')]
+    rates = [float(r) for r in get_option('--rates', '0.25,0.5,1,2,4').split(',')]
+    duration = float(get_option('--duration', 60))
+    timeout = float(get_option('--timeout', 300))
+    stop_p95 = float(get_option('--stop-p95', 0)) or None
+    stop_errors = float(get_option('--stop-errors', 0.5))
+    rng = random.Random(int(get_option('--seed', 1)))
+
+    if mode not in ('closed', 'open', 'both'):
+        print(__doc__)
+        log(f"❌ Unknown --mode {mode}", "MAIN")
+        return False
+
+    log("🚀 LM Studio Concurrency Sweep", "MAIN")
+    log(f"Hosts: {', '.join(hosts)}", "MAIN")
+    log(f"Models: {', '.join(models)}", "MAIN")
+    log(f"Mode: {mode}  levels={levels}  rates={rates}  {duration:g}s per step", "MAIN")
+
+    results = []
+    for host in hosts:
+        for model in models:
+            results += sweep(host, model, mode, levels, rates, duration, timeout,
+                             stop_p95, stop_errors, rng)
+
+    # Best sustained throughput per host/model, for sizing the bot's parallelism
+    log("=" * 80)
+    log("📊 PEAK THROUGHPUT", "RESULT")
+    best = {}
+    for r in results:
+        key = (r['host'], r['model'], r['mode'])
+        if r['errorRate'] <= stop_errors and r['requestsPerSecond'] > best.get(key, {}).get('requestsPerSecond', -1):
+            best[key] = r
+    for (host, model, kind), r in best.items():
+        log(f"{host:<22} {model:<40} {kind:<6} {r['requestsPerSecond']:.2f} req/s "
+            f"{r['tokensPerSecond']:.1f} tok/s at load {r['load']:g} "
+            f"(p95 {fmt_s(r['latencySeconds']['p95'])})", "RESULT")
+
+    json_path = get_option('--json')
+    if json_path:
+        Path(json_path).write_text(json.dumps(results, indent=2))
+        log(f"💾 Results written to {json_path}", "MAIN")
+
+    return bool(results)
+
+if __name__ == "__main__":
+    try:
+        success = main()
+        exit(0 if success else 1)
+    except KeyboardInterrupt:
+        log("\n⚠️  Sweep interrupted by user", "MAIN")
+        exit(1)
@@ -5,11 +5,54 @@ Tests LM Studio's behavior when sending chat completion while model is loading
 
 Bypasses: Queue, Bot, KV entirely
 Tests: LM Studio model loading + chat completion directly
+
+Options:
+    --lmstudio-host H[:P]   LM Studio server (default: LM_STUDIO_HOST:LM_STUDIO_PORT);
+                            TEST-SCRIPTS/lmstudio-mock-server.py serves the same API offline
+
+Streaming:
+    --stream                Send completions as SSE streams and report
+                            time-to-first-token, inter-token latency and tokens/sec
+    --stall-timeout S       Fail a stream that goes S seconds without a chunk
+                            once tokens are flowing (default: 10)
+    --first-token-timeout S Give up waiting for the first token (model load +
+                            prompt processing) after S seconds (default: 300)
+
+Benchmark mode:
+    python3 test-lmstudio-direct.py --benchmark [options]
+
+    Sweeps every model@quantization through cold, JIT and warm starts and
+    records load time, time-to-first-token, total latency and tokens/sec
+    for each repeat:
+        cold  - unload all, load, then request
+        jit   - unload all, then request (LM Studio loads on demand)
+        warm  - model resident and already served a request
+
+    --models a,b          Model names without quantization (default: TEST_MODEL's)
+    --quants f32,q8_0     Quantizations to sweep (default: TEST_MODEL's)
+    --states cold,jit,warm
+    --repeats N           Repeats per cell (default: 3)
+    --out PATH            Results table, .csv or .json (default: lmstudio-benchmark-<time>.csv)
+    With --stream, TTFT is measured client-side (so a JIT cell includes the load)
+    and inter-token latency is recorded as well.
+
+Model control (LM Studio REST API, no lms CLI):
+    python3 test-lmstudio-direct.py --control list|load|unload|unload-all|wait [--model M] [--hosts a,b:1234]
+
+    Runs the operation on every host concurrently and prints how long each took.
 """
 
+import csv
+import http.client
+import statistics
 import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import time
 import json
+import queue
 import urllib.request
 from datetime import datetime
 
@@ -18,15 +61,36 @@ LM_STUDIO_HOST = "10.0.0.100"
 LM_STUDIO_PORT = 1234
 TEST_MODEL = "dystopian-survival-guide@f32"
 
+USE_STREAMING = False
+STALL_TIMEOUT = 10
+FIRST_TOKEN_TIMEOUT = 300
+
+BENCHMARK_PROMPT = [
+    {"role": "system", "content": "You provide survival advice."},
+    {"role": "user", "content": "Give me survival tips."}
+]
+BENCHMARK_STATES = ('cold', 'jit', 'warm')
+BENCHMARK_FIELDS = ['model', 'state', 'repeat', 'ok', 'load_s', 'ttft_s', 'total_s',
+                    'tokens_per_s', 'completion_tokens', 'itl_median_s', 'itl_max_s', 'error']
+
+def get_option(name, default=None):
+    """Read a value option from argv, accepting both '--name value' and '--name=value'"""
+    for i, arg in enumerate(sys.argv):
+        if arg == name and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+        if arg.startswith(name + '='):
+            return arg.split('=', 1)[1]
+    return default
+
 def log(msg, level="INFO"):
     timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
     print(f"[{timestamp}] [{level}] {msg}")
 
-def run_cli(cmd):
+def run_cli(cmd, timeout=10):
     """Execute CLI command"""
     log(f"CLI: {cmd}", "CMD")
     try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=10)
+        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=timeout)
         if result.returncode == 0:
             log(f"✅ {result.stdout.strip()}", "CMD")
             return True
@@ -37,13 +101,351 @@ def run_cli(cmd):
         log(f"❌ {e}", "CMD")
         return False
 
+class ModelStateWatcher:
+    """
+    Shared, event-driven view of the model states on one LM Studio host.
+
+    Every caller goes through one keep-alive connection and one cached copy
+    of /api/v0/models (refetched only when older than `ttl`). A background
+    thread, started on first use, polls every `fast_interval` while a
+    transition is expected - someone is waiting on one, or a model is
+    loading - easing off to `settle_interval` while nothing changes, and
+    drops to `idle_interval` otherwise. Each observed state change goes to
+    the subscribed callbacks as a dict:
+
+        model, old, new, at (time.time()), perf (time.perf_counter()),
+        window (seconds since the previous observation - the change
+        happened somewhere inside it)
+    """
+
+    def __init__(self, host, port, ttl=0.2, fast_interval=0.1, settle_interval=0.25,
+                 idle_interval=2.0, timeout=5):
+        self.host = host
+        self.port = port
+        self.ttl = ttl
+        self.fast_interval = fast_interval
+        self.settle_interval = settle_interval
+        self.idle_interval = idle_interval
+        self.timeout = timeout
+        self.cond = threading.Condition()       # guards the cache; notified after every fetch
+        self.fetch_lock = threading.Lock()      # one request at a time on the shared connection
+        self.conn = None
+        self.models = {}
+        self.fetched_at = None
+        self.observed = {}                      # model id → (state, perf time last seen)
+        self.last_changes = {}                  # model id → latest change
+        self.change_count = 0
+        self.listeners = []
+        self.expecting = 0
+        self.wake = threading.Event()
+        self.thread = None
+
+    def _get(self):
+        """GET /api/v0/models on the shared connection, reconnecting once if it went stale"""
+        for attempt in (1, 2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.conn.request('GET', '/api/v0/models')
+                response = self.conn.getresponse()
+                body = response.read()
+                if response.status != 200:
+                    raise RuntimeError(f"HTTP {response.status}")
+                return json.loads(body).get('data', [])
+            except (http.client.HTTPException, OSError):
+                self.conn.close()
+                self.conn = None
+                if attempt == 2:
+                    raise
+
+    def refresh(self, max_age=None):
+        """Models by id, fetched anew if the cache is older than max_age (default: ttl)"""
+        max_age = self.ttl if max_age is None else max_age
+        with self.fetch_lock:
+            with self.cond:
+                if self.fetched_at is not None and time.perf_counter() - self.fetched_at <= max_age:
+                    return self.models
+            data = self._get()
+            now, wall = time.perf_counter(), time.time()
+            changes = []
+            with self.cond:
+                models = {m['id']: m for m in data}
+                for model_id in set(models) | set(self.observed):
+                    state = models[model_id].get('state', 'unknown') if model_id in models else 'not-found'
+                    previous = self.observed.get(model_id)
+                    if previous and previous[0] != state:
+                        change = {'model': model_id, 'old': previous[0], 'new': state,
+                                  'at': wall, 'perf': now, 'window': now - previous[1]}
+                        self.last_changes[model_id] = change
+                        self.change_count += 1
+                        changes.append(change)
+                    self.observed[model_id] = (state, now)
+                self.models = models
+                self.fetched_at = now
+                self.cond.notify_all()
+                listeners = list(self.listeners)
+        for change in changes:
+            for callback in listeners:
+                callback(change)
+        return models
+
+    def state(self, model_id, max_age=None):
+        model = self.refresh(max_age).get(model_id)
+        return model.get('state', 'unknown') if model else 'not-found'
+
+    def loaded(self, max_age=None):
+        return [m['id'] for m in self.refresh(max_age).values() if m.get('state') == 'loaded']
+
+    def last_change(self, model_id):
+        with self.cond:
+            return self.last_changes.get(model_id)
+
+    def subscribe(self, callback):
+        """Call callback(change) on every state change; returns an unsubscribe function"""
+        with self.cond:
+            self.listeners.append(callback)
+        self.start()
+        return lambda: self.listeners.remove(callback) if callback in self.listeners else None
+
+    def start(self):
+        with self.cond:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        interval = self.fast_interval
+        seen = 0
+        while True:
+            try:
+                self.refresh(max_age=0)
+            except Exception:
+                pass
+            with self.cond:
+                changed = self.change_count != seen
+                seen = self.change_count
+                busy = self.expecting or any(m.get('state') == 'loading' for m in self.models.values())
+            if changed:
+                interval = self.fast_interval
+            elif busy:
+                interval = min(self.settle_interval, max(interval, self.fast_interval) * 1.25)
+            else:
+                interval = self.idle_interval
+            if self.wake.wait(interval):
+                self.wake.clear()
+                interval = self.fast_interval
+
+    @contextmanager
+    def expect(self):
+        """Poll fast for the duration of the block - a transition is expected"""
+        with self.cond:
+            self.expecting += 1
+        self.start()
+        self.wake.set()
+        try:
+            yield self
+        finally:
+            with self.cond:
+                self.expecting -= 1
+
+    def wait_until(self, predicate, timeout):
+        """
+        Block until predicate(models by id) holds, polling fast meanwhile;
+        returns False on timeout. The cache is refreshed first, so a stale
+        copy cannot satisfy it.
+        """
+        deadline = time.perf_counter() + timeout
+        with self.expect():
+            try:
+                self.refresh(max_age=0)
+            except Exception:
+                pass
+            with self.cond:
+                while not predicate(self.models):
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        return False
+                    self.cond.wait(remaining)
+                return True
+
+    def wait_for(self, model_id, states, timeout):
+        """Wait for model_id to reach one of `states`; returns the state, or None on timeout"""
+        states = (states,) if isinstance(states, str) else tuple(states)
+
+        def reached(models):
+            model = models.get(model_id)
+            return (model.get('state', 'unknown') if model else 'not-found') in states
+
+        return self.state(model_id, max_age=float('inf')) if self.wait_until(reached, timeout) else None
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+def model_watcher(host=None, port=None):
+    """The process-wide watcher for a host (default: LM_STUDIO_HOST:LM_STUDIO_PORT)"""
+    key = (host or LM_STUDIO_HOST, port or LM_STUDIO_PORT)
+    with _watchers_lock:
+        if key not in _watchers:
+            _watchers[key] = ModelStateWatcher(*key)
+        return _watchers[key]
+
+class ModelControl:
+    """
+    Load / unload / list / wait-until-loaded for one LM Studio host, over the
+    server's REST API instead of the `lms` CLI.
+
+    Every operation returns a result dict - op, host, model, ok, seconds
+    (perf_counter around the whole operation), error - plus
+    server_seconds where LM Studio reports its own load time. Load requests
+    block until the model is resident, so no spawn overhead or CLI timeout
+    sits between the test and the server. Each call opens its own
+    connection, so one instance can be driven from several threads, and
+    control_hosts() runs an operation on many hosts at once.
+
+    Servers without the /api/v1 model endpoints fall back to JIT (a 1-token
+    completion) for load. There is no REST fallback for unload, so there it
+    fails with an error naming the missing endpoint; use `lms unload` on the
+    host itself.
+    """
+
+    def __init__(self, host, port, timeout=600):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.watcher = model_watcher(host, port)
+
+    def _post(self, path, body, timeout=None):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=timeout or self.timeout)
+        try:
+            conn.request('POST', path, json.dumps(body), {'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            raw = response.read()
+        finally:
+            conn.close()
+        try:
+            payload = json.loads(raw) if raw else {}
+        except ValueError:
+            payload = {'error': raw.decode('utf-8', 'replace')[:200]}
+        return response.status, payload
+
+    def _endpoint_missing(self, status, model_id):
+        """A 404 for a model the server does list means the endpoint itself is missing"""
+        return status == 404 and model_id in self.watcher.refresh()
+
+    def _result(self, op, model, start, ok, error=None, **extra):
+        return dict({'op': op, 'host': f"{self.host}:{self.port}", 'model': model, 'ok': ok,
+                     'seconds': time.perf_counter() - start, 'error': error}, **extra)
+
+    def list(self):
+        """Fresh model list: [{id, state, ...}]"""
+        return list(self.watcher.refresh(max_age=0).values())
+
+    def loaded(self):
+        return self.watcher.loaded(max_age=0)
+
+    def load(self, model_id, timeout=None):
+        start = time.perf_counter()
+        try:
+            with self.watcher.expect():
+                status, payload = self._post('/api/v1/models/load', {'model': model_id}, timeout)
+                if self._endpoint_missing(status, model_id):
+                    return self._load_jit(model_id, start, timeout)
+        except Exception as e:
+            return self._result('load', model_id, start, False, str(e))
+        if status != 200:
+            return self._result('load', model_id, start, False, f"HTTP {status}: {payload.get('error', payload)}")
+        return self._result('load', model_id, start, True, server_seconds=payload.get('load_time_seconds'),
+                            instance_id=payload.get('instance_id', model_id))
+
+    def _load_jit(self, model_id, start, timeout):
+        """No load endpoint: a 1-token completion makes LM Studio load the model on demand"""
+        body = build_chat_payload(model_id, [{"role": "user", "content": "hi"}])
+        body['max_tokens'] = 1
+        status, payload = self._post('/v1/chat/completions', body, timeout)
+        if status != 200:
+            return self._result('load', model_id, start, False, f"JIT load HTTP {status}: {payload.get('error', payload)}")
+        return self._result('load', model_id, start, True, via='jit')
+
+    def unload(self, model_id):
+        start = time.perf_counter()
+        try:
+            status, payload = self._post('/api/v1/models/unload', {'instance_id': model_id}, 60)
+        except Exception as e:
+            return self._result('unload', model_id, start, False, str(e))
+        if self._endpoint_missing(status, model_id):
+            return self._result('unload', model_id, start, False,
+                                "server has no /api/v1/models/unload endpoint (unload it with `lms unload` on the host)")
+        if status != 200:
+            return self._result('unload', model_id, start, False, f"HTTP {status}: {payload.get('error', payload)}")
+        return self._result('unload', model_id, start, True)
+
+    def unload_all(self, timeout=30):
+        """Unload every loaded model and wait until the list shows none loaded"""
+        start = time.perf_counter()
+        try:
+            loaded = self.loaded()
+        except Exception as e:
+            return self._result('unload-all', None, start, False, str(e))
+        failed = [r for r in (self.unload(model_id) for model_id in loaded) if not r['ok']]
+        settled = self.watcher.wait_until(
+            lambda models: not any(m.get('state') in ('loaded', 'loading') for m in models.values()), timeout)
+        error = '; '.join(f"{r['model']}: {r['error']}" for r in failed) or (
+            None if settled else f"models still loaded after {timeout}s: {self.watcher.loaded()}")
+        return self._result('unload-all', None, start, not error, error, unloaded=loaded)
+
+    def wait_until_loaded(self, model_id, timeout=None):
+        """Wait for 'loaded' (e.g. after a JIT request); seconds is when it was first seen"""
+        start = time.perf_counter()
+        try:
+            state = self.watcher.wait_for(model_id, 'loaded', timeout or self.timeout)
+        except Exception as e:
+            return self._result('wait', model_id, start, False, str(e))
+        result = self._result('wait', model_id, start, state is not None,
+                              None if state else f"not loaded after {timeout or self.timeout}s")
+        change = self.watcher.last_change(model_id)
+        if state and change and change['new'] == 'loaded' and change['perf'] >= start:
+            result['seconds'] = change['perf'] - start
+            result['resolution'] = change['window']
+        return result
+
+_controls = {}
+_controls_lock = threading.Lock()
+
+def model_control(host=None, port=None):
+    """The process-wide ModelControl for a host (default: LM_STUDIO_HOST:LM_STUDIO_PORT)"""
+    key = (host or LM_STUDIO_HOST, port or LM_STUDIO_PORT)
+    with _controls_lock:
+        if key not in _controls:
+            _controls[key] = ModelControl(*key)
+    return _controls[key]
+
+def parse_host(host):
+    name, _, port = host.partition(':')
+    return name, int(port or LM_STUDIO_PORT)
+
+def control_hosts(hosts, op, *args):
+    """Run ModelControl.<op>(*args) on every 'host[:port]' concurrently; results in host order"""
+    controls = [model_control(*parse_host(h)) for h in hosts]
+    with ThreadPoolExecutor(max_workers=max(1, len(controls))) as pool:
+        return list(pool.map(lambda c: getattr(c, op)(*args), controls))
+
+def log_control_result(result, level="CTRL"):
+    what = ' '.join(filter(None, (result['op'], result['model'])))
+    if result['ok']:
+        detail = f" (server {result['server_seconds']:.2f}s)" if result.get('server_seconds') is not None else ''
+        if result.get('via'):
+            detail += f" via {result['via']}"
+        if result.get('unloaded') is not None:
+            detail += f" - unloaded {result['unloaded'] or 'nothing'}"
+        log(f"✅ {what} on {result['host']}: {result['seconds']:.3f}s{detail}", level)
+    else:
+        log(f"❌ {what} on {result['host']}: {result['error']} "
+            f"({result['seconds']:.3f}s)", level)
+
 def get_models():
     """Get model list from LM Studio"""
     try:
-        url = f"http://{LM_STUDIO_HOST}:{LM_STUDIO_PORT}/api/v0/models"
-        with urllib.request.urlopen(url, timeout=5) as response:
-            data = json.loads(response.read())
-            return data.get('data', [])
+        return list(model_watcher().refresh().values())
     except Exception as e:
         log(f"Failed to get models: {e}", "API")
         return []
@@ -56,19 +458,177 @@ def check_model_state(model_name):
             return m.get('state', 'unknown')
     return 'not-found'
 
-def send_chat_completion(model_name, messages):
-    """Send chat completion request to LM Studio"""
-    log(f"📤 Sending chat completion request...", "CHAT")
-    log(f"Model: {model_name}", "CHAT")
-    log(f"Messages: {len(messages)}", "CHAT")
-    
+def log_state_changes(model_name, since, level):
+    """Subscribe a logger for model_name's transitions, timed from `since` (perf_counter)"""
+    def on_change(change):
+        if change['model'] == model_name:
+            log(f"Model state: {change['old']} → {change['new']} at t={change['perf'] - since:.2f}s "
+                f"(±{change['window']:.2f}s)", level)
+    return model_watcher().subscribe(on_change)
+
+def build_chat_payload(model_name, messages, stream=False):
+    """Chat completion body used by every request in these tests"""
     payload = {
         "model": model_name,
         "messages": messages,
         "temperature": 0.6,
         "max_tokens": 200,
-        "stream": False
+        "stream": stream
     }
+    if stream:
+        payload["stream_options"] = {"include_usage": True}
+    return payload
+
+def read_sse_lines(req, timeout, lines):
+    """
+    Reader thread: open the stream and push each SSE line onto `lines`, then
+    None (or the exception) at the end. Opening happens here too, since
+    LM Studio may hold back the response headers for the whole model load.
+    """
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            for raw in response:
+                lines.put(raw.decode('utf-8').strip())
+        lines.put(None)
+    except urllib.error.HTTPError as e:
+        lines.put(RuntimeError(f"HTTP {e.code}: {e.read().decode('utf-8')[:200]}"))
+    except Exception as e:
+        lines.put(e)
+
+def stream_chat_completion(model_name, messages, stall_timeout=None, first_token_timeout=None):
+    """
+    Streamed chat completion.
+
+    Chunks are read on a separate thread, so the caller notices within
+    stall_timeout seconds when a stream that was producing tokens goes
+    quiet, instead of waiting on a socket timeout. Until the first token
+    arrives the model state is logged every 5s, which tells a model that
+    is still loading apart from one that is slow to generate.
+
+    Returns (success, content, elapsed, metrics) with metrics:
+        ttft_s, total_s, tokens_per_s, completion_tokens,
+        itl_median_s, itl_p95_s, itl_max_s, stalled, error
+    """
+    stall_timeout = stall_timeout or STALL_TIMEOUT
+    first_token_timeout = first_token_timeout or FIRST_TOKEN_TIMEOUT
+    log(f"📤 Streaming chat completion request...", "STREAM")
+    log(f"Model: {model_name}", "STREAM")
+
+    payload = build_chat_payload(model_name, messages, stream=True)
+    req = urllib.request.Request(
+        f"http://{LM_STUDIO_HOST}:{LM_STUDIO_PORT}/v1/chat/completions",
+        data=json.dumps(payload).encode('utf-8'),
+        headers={"Content-Type": "application/json", "Accept": "text/event-stream"}
+    )
+    metrics = {'ttft_s': None, 'total_s': None, 'tokens_per_s': None, 'completion_tokens': None,
+               'itl_median_s': None, 'itl_p95_s': None, 'itl_max_s': None,
+               'stalled': False, 'error': None}
+    parts = []
+    token_times = []
+    usage = None
+
+    # The socket timeout only has to cover a wedged connection; stalls are caught below.
+    # A stalled stream is abandoned to its daemon reader rather than closed from here,
+    # since close() would block behind the reader's pending read.
+    lines = queue.Queue()
+    start = time.perf_counter()
+    threading.Thread(target=read_sse_lines, args=(req, first_token_timeout + stall_timeout, lines),
+                     daemon=True).start()
+    last_event = start
+    next_state_log = start + 5
+    finished = False
+    while True:
+        now = time.perf_counter()
+        if token_times:
+            wait = stall_timeout - (now - last_event)
+        else:
+            wait = min(first_token_timeout - (now - start), next_state_log - now)
+        try:
+            line = lines.get(timeout=max(0.01, wait))
+        except queue.Empty:
+            now = time.perf_counter()
+            if token_times:
+                metrics['stalled'] = True
+                metrics['error'] = f"stream stalled: no chunk for {now - last_event:.1f}s after {len(token_times)} tokens"
+                break
+            if now - start >= first_token_timeout:
+                metrics['stalled'] = True
+                metrics['error'] = (f"no first token after {now - start:.1f}s "
+                                    f"(model state: {check_model_state(model_name)})")
+                break
+            log(f"⏳ No token yet after {now - start:.0f}s - model state: {check_model_state(model_name)}", "STREAM")
+            next_state_log = now + 5
+            continue
+
+        if line is None:
+            if not finished:
+                metrics['error'] = f"stream ended without finishing after {len(token_times)} tokens"
+            break
+        if isinstance(line, Exception):
+            metrics['error'] = str(line)
+            break
+        last_event = time.perf_counter()
+        if not line.startswith('data:'):
+            continue
+        data = line[5:].strip()
+        if data == '[DONE]':
+            finished = True
+            break
+        try:
+            chunk = json.loads(data)
+        except ValueError:
+            continue
+        if chunk.get('error'):
+            metrics['error'] = str(chunk['error'])
+            break
+        usage = chunk.get('usage') or usage
+        for choice in chunk.get('choices') or []:
+            finished = finished or bool(choice.get('finish_reason'))
+            content = (choice.get('delta') or {}).get('content')
+            if content:
+                if not token_times:
+                    log(f"⚡ First token after {last_event - start:.2f}s", "STREAM")
+                token_times.append(last_event)
+                parts.append(content)
+
+    end = time.perf_counter()
+    metrics['total_s'] = end - start
+    if token_times:
+        metrics['ttft_s'] = token_times[0] - start
+        gaps = sorted(b - a for a, b in zip(token_times, token_times[1:]))
+        if gaps:
+            metrics['itl_median_s'] = statistics.median(gaps)
+            metrics['itl_p95_s'] = gaps[max(0, -(-len(gaps) * 95 // 100) - 1)]
+            metrics['itl_max_s'] = gaps[-1]
+        # usage counts real tokens; chunk count is the fallback when the server omits it
+        tokens = (usage or {}).get('completion_tokens') or len(token_times)
+        metrics['completion_tokens'] = tokens
+        generation = token_times[-1] - token_times[0]
+        if generation > 0 and tokens > 1:
+            metrics['tokens_per_s'] = (tokens - 1) / generation
+
+    content = ''.join(parts)
+    success = bool(content) and not metrics['error']
+    if success:
+        log(f"✅ Stream finished in {metrics['total_s']:.1f}s: ttft={metrics['ttft_s']:.2f}s "
+            f"tokens={metrics['completion_tokens']} tok/s={metrics['tokens_per_s'] or 0:.1f} "
+            f"itl p50={(metrics['itl_median_s'] or 0) * 1000:.0f}ms "
+            f"p95={(metrics['itl_p95_s'] or 0) * 1000:.0f}ms "
+            f"max={(metrics['itl_max_s'] or 0) * 1000:.0f}ms", "STREAM")
+        log(f"Response: {content[:100]}...", "STREAM")
+    else:
+        log(f"❌ {metrics['error'] or 'empty response'} ({metrics['total_s']:.1f}s)", "STREAM")
+    return (success, content or None, metrics['total_s'], metrics)
+
+def send_chat_completion(model_name, messages):
+    """Send chat completion request to LM Studio"""
+    if USE_STREAMING:
+        return stream_chat_completion(model_name, messages)[:3]
+    log(f"📤 Sending chat completion request...", "CHAT")
+    log(f"Model: {model_name}", "CHAT")
+    log(f"Messages: {len(messages)}", "CHAT")
+    
+    payload = build_chat_payload(model_name, messages)
     
     try:
         data = json.dumps(payload).encode('utf-8')
@@ -116,8 +676,7 @@ def test_scenario_1():
     
     # Unload all
     log("Step 1: Unload all models", "TEST")
-    run_cli(f"lms unload --all --host {LM_STUDIO_HOST}")
-    time.sleep(2)
+    log_control_result(model_control().unload_all(), "TEST")
     
     # Verify unloaded
     state = check_model_state(TEST_MODEL)
@@ -125,22 +684,20 @@ def test_scenario_1():
     
     # Load model
     log("Step 2: Load model explicitly", "TEST")
-    run_cli(f"lms load {TEST_MODEL} --host {LM_STUDIO_HOST}")
+    start = time.perf_counter()
+    unsubscribe = log_state_changes(TEST_MODEL, start, "TEST")
+    result = model_control().load(TEST_MODEL, timeout=300)  # 5 minute max
+    log_control_result(result, "TEST")
     
-    # Wait for model to load
+    # Confirm the model list agrees
     log("Step 3: Wait for model to reach 'loaded' state", "TEST")
-    for i in range(60):  # 5 minute max
-        time.sleep(5)
-        state = check_model_state(TEST_MODEL)
-        log(f"Poll {i+1}: Model state = {state}", "TEST")
-        
-        if state == 'loaded':
-            log(f"✅ Model loaded after {(i+1)*5}s", "TEST")
-            break
+    loaded = result['ok'] and wait_for_state(TEST_MODEL, 'loaded', 30)
+    unsubscribe()
     
-    if state != 'loaded':
+    if not loaded:
         log(f"❌ Model never reached 'loaded' state", "TEST")
         return False
+    log(f"✅ Model loaded after {result['seconds']:.2f}s", "TEST")
     
     # Send request
     log("Step 4: Send chat completion request", "TEST")
@@ -169,8 +726,7 @@ def test_scenario_2():
     
     # Unload all
     log("Step 1: Unload all models", "TEST")
-    run_cli(f"lms unload --all --host {LM_STUDIO_HOST}")
-    time.sleep(2)
+    log_control_result(model_control().unload_all(), "TEST")
     
     # Verify unloaded
     state = check_model_state(TEST_MODEL)
@@ -189,25 +745,17 @@ def test_scenario_2():
         {"role": "user", "content": "Give me survival tips."}
     ]
     
-    # Monitor model state in parallel
-    import threading
-    
-    def monitor_model_state():
-        log("👀 Starting model state monitor thread...", "MONITOR")
-        for i in range(60):
-            time.sleep(5)
-            state = check_model_state(TEST_MODEL)
-            log(f"Model state: {state} (t={i*5}s)", "MONITOR")
-            if state == 'loaded':
-                log(f"✅ Model reached 'loaded' at t={i*5}s", "MONITOR")
-                break
-    
-    # Start monitoring thread
-    monitor_thread = threading.Thread(target=monitor_model_state, daemon=True)
-    monitor_thread.start()
+    # Monitor model state in parallel - every transition is logged as it is seen
+    log("👀 Watching model state...", "MONITOR")
+    start = time.perf_counter()
+    unsubscribe = log_state_changes(TEST_MODEL, start, "MONITOR")
     
-    # Send request (will block until response or timeout)
-    success, response, elapsed = send_chat_completion(TEST_MODEL, messages)
+    # Send request (will block until response or timeout), polling fast throughout
+    try:
+        with model_watcher().expect():
+            success, response, elapsed = send_chat_completion(TEST_MODEL, messages)
+    finally:
+        unsubscribe()
     
     if success:
         log(f"✅ SCENARIO 2 PASSED - Response in {elapsed:.1f}s", "TEST")
@@ -218,7 +766,234 @@ def test_scenario_2():
         log("❌ LM Studio DROPS requests sent during loading", "TEST")
         return False
 
+def wait_for_state(model_name, wanted, timeout):
+    """Wait (via the shared watcher) until the model reaches `wanted`; returns False on timeout"""
+    try:
+        return model_watcher().wait_for(model_name, wanted, timeout) is not None
+    except Exception as e:
+        log(f"Failed to watch model state: {e}", "API")
+        return False
+
+def measure_completion(model_name, messages, timeout=300):
+    """
+    One non-streaming request through LM Studio's REST API, whose `stats`
+    block reports the server's own time-to-first-token (prompt processing,
+    excluding any model load) and generation tokens/sec. With --stream,
+    a streamed request measured client-side instead.
+    """
+    if USE_STREAMING:
+        success, _, _, metrics = stream_chat_completion(model_name, messages)
+        metrics['ok'] = success
+        return {k: v for k, v in metrics.items() if k in BENCHMARK_FIELDS}
+    payload = build_chat_payload(model_name, messages)
+    req = urllib.request.Request(
+        f"http://{LM_STUDIO_HOST}:{LM_STUDIO_PORT}/api/v0/chat/completions",
+        data=json.dumps(payload).encode('utf-8'),
+        headers={"Content-Type": "application/json"}
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            result = json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return {'ok': False, 'total_s': time.perf_counter() - start,
+                'error': f"HTTP {e.code}: {e.read().decode('utf-8')[:200]}"}
+    except Exception as e:
+        return {'ok': False, 'total_s': time.perf_counter() - start, 'error': str(e)}
+    total = time.perf_counter() - start
+
+    stats = result.get('stats') or {}
+    tokens = (result.get('usage') or {}).get('completion_tokens')
+    return {
+        'ok': bool(result.get('choices')),
+        'total_s': total,
+        'ttft_s': stats.get('time_to_first_token'),
+        'tokens_per_s': stats.get('tokens_per_second') or (tokens / total if tokens else None),
+        'completion_tokens': tokens,
+        'error': None if result.get('choices') else 'no choices in response',
+    }
+
+def unload_all_and_wait(model_name):
+    result = model_control().unload_all()
+    if not result['ok']:
+        log(f"⚠️  Unload incomplete: {result['error']} - {model_name} is {check_model_state(model_name)}", "BENCH")
+
+def load_and_wait(model_name, timeout=600):
+    """Load over REST; returns seconds until the server reported it loaded, or None"""
+    result = model_control().load(model_name, timeout=timeout)
+    if not result['ok']:
+        log(f"❌ Load failed: {result['error']}", "BENCH")
+        return None
+    return result['seconds']
+
+def benchmark_cold(model_name):
+    unload_all_and_wait(model_name)
+    load_s = load_and_wait(model_name)
+    if load_s is None:
+        return {'ok': False, 'error': 'model never reached loaded'}
+    return dict(measure_completion(model_name, BENCHMARK_PROMPT), load_s=load_s)
+
+def benchmark_jit(model_name):
+    """Request against an unloaded model; a watcher times LM Studio's on-demand load"""
+    unload_all_and_wait(model_name)
+    start = time.perf_counter()
+    loaded_at = []
+
+    def on_change(change):
+        if change['model'] == model_name and change['new'] == 'loaded' and not loaded_at:
+            loaded_at.append(change['perf'])
+
+    watcher = model_watcher()
+    unsubscribe = watcher.subscribe(on_change)
+    try:
+        with watcher.expect():
+            result = measure_completion(model_name, BENCHMARK_PROMPT)
+    finally:
+        unsubscribe()
+    result['load_s'] = loaded_at[0] - start if loaded_at else None
+    return result
+
+def benchmark_warm(model_name, warmed):
+    """Request against a resident model that has already served one (unmeasured) request"""
+    if check_model_state(model_name) != 'loaded':
+        warmed.discard(model_name)
+        if load_and_wait(model_name) is None:
+            return {'ok': False, 'error': 'model never reached loaded'}
+    if model_name not in warmed:
+        measure_completion(model_name, BENCHMARK_PROMPT)
+        warmed.add(model_name)
+    return dict(measure_completion(model_name, BENCHMARK_PROMPT), load_s=0.0)
+
+def write_benchmark(rows, path):
+    if path.endswith('.json'):
+        with open(path, 'w') as f:
+            json.dump(rows, f, indent=2)
+        return
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=BENCHMARK_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def print_benchmark_summary(rows):
+    log("="*80, "BENCH")
+    log("📊 BENCHMARK (medians of successful repeats)", "BENCH")
+    log(f"{'model':<44} {'state':<5} {'ok':>5} {'load s':>8} {'ttft s':>8} {'total s':>8} {'tok/s':>8}", "BENCH")
+    cells = {}
+    for row in rows:
+        cells.setdefault((row['model'], row['state']), []).append(row)
+
+    def median(cell, field):
+        values = [r[field] for r in cell if r['ok'] and r.get(field) is not None]
+        return f"{statistics.median(values):.2f}" if values else "-"
+
+    for (model, state), cell in cells.items():
+        ok = sum(1 for r in cell if r['ok'])
+        log(f"{model:<44} {state:<5} {f'{ok}/{len(cell)}':>5} {median(cell, 'load_s'):>8} "
+            f"{median(cell, 'ttft_s'):>8} {median(cell, 'total_s'):>8} {median(cell, 'tokens_per_s'):>8}", "BENCH")
+
+def run_benchmark():
+    base, _, quant = TEST_MODEL.partition('@')
+    models = get_option('--models', base).split(',')
+    quants = get_option('--quants', quant).split(',')
+    states = get_option('--states', ','.join(BENCHMARK_STATES)).split(',')
+    repeats = int(get_option('--repeats', 3))
+    out = get_option('--out', f"lmstudio-benchmark-{datetime.now().strftime('%Y%m%d-%H%M%S')}.csv")
+    configure_lmstudio_host()
+    configure_streaming()
+
+    unknown = [s for s in states if s not in BENCHMARK_STATES]
+    if unknown:
+        log(f"❌ Unknown states {unknown} - choose from {', '.join(BENCHMARK_STATES)}", "BENCH")
+        return False
+
+    matrix = [f"{m}@{q}" if q else m for m in models for q in quants]
+    log(f"🧪 Benchmark: {len(matrix)} models × {states} × {repeats} repeats", "BENCH")
+    log(f"Server: {LM_STUDIO_HOST}:{LM_STUDIO_PORT}", "BENCH")
+
+    runners = {'cold': benchmark_cold, 'jit': benchmark_jit}
+    warmed = set()
+    rows = []
+    try:
+        for model_name in matrix:
+            for state in states:
+                for repeat in range(1, repeats + 1):
+                    log(f"▶ {model_name} [{state}] repeat {repeat}/{repeats}", "BENCH")
+                    if state == 'warm':
+                        result = benchmark_warm(model_name, warmed)
+                    else:
+                        warmed.discard(model_name)
+                        result = runners[state](model_name)
+                    row = dict.fromkeys(BENCHMARK_FIELDS)
+                    row.update({k: round(v, 3) if isinstance(v, float) else v for k, v in result.items()},
+                               model=model_name, state=state, repeat=repeat)
+                    rows.append(row)
+                    if row['ok']:
+                        load = '-' if row['load_s'] is None else f"{row['load_s']:.2f}s"
+                        ttft = '-' if row['ttft_s'] is None else f"{row['ttft_s']:.2f}s"
+                        tps = '-' if row['tokens_per_s'] is None else f"{row['tokens_per_s']:.1f}"
+                        log(f"   load={load} ttft={ttft} total={row['total_s']:.2f}s tok/s={tps}", "BENCH")
+                    else:
+                        log(f"   ❌ {row['error']}", "BENCH")
+    finally:
+        if rows:
+            write_benchmark(rows, out)
+            print_benchmark_summary(rows)
+            log(f"Results written to {out}", "BENCH")
+
+    return all(r['ok'] for r in rows)
+
+def configure_lmstudio_host():
+    """--lmstudio-host HOST[:PORT] points the test at another server, e.g. TEST-SCRIPTS/lmstudio-mock-server.py"""
+    global LM_STUDIO_HOST, LM_STUDIO_PORT
+    host = get_option('--lmstudio-host')
+    if host:
+        LM_STUDIO_HOST, LM_STUDIO_PORT = parse_host(host)
+
+def configure_streaming():
+    global USE_STREAMING, STALL_TIMEOUT, FIRST_TOKEN_TIMEOUT
+    USE_STREAMING = '--stream' in sys.argv
+    STALL_TIMEOUT = float(get_option('--stall-timeout', STALL_TIMEOUT))
+    FIRST_TOKEN_TIMEOUT = float(get_option('--first-token-timeout', FIRST_TOKEN_TIMEOUT))
+
+def run_control():
+    """--control OP: model control across --hosts (default: the --lmstudio-host server)"""
+    configure_lmstudio_host()
+    op = get_option('--control')
+    model = get_option('--model', TEST_MODEL)
+    hosts = get_option('--hosts', f"{LM_STUDIO_HOST}:{LM_STUDIO_PORT}").split(',')
+
+    if op == 'list':
+        for host in hosts:
+            try:
+                models = model_control(*parse_host(host)).list()
+            except Exception as e:
+                log(f"❌ {host}: {e}", "CTRL")
+                continue
+            log(f"🖥  {host}: {len(models)} models", "CTRL")
+            for m in models:
+                log(f"   {m['id']:<44} {m.get('state', 'unknown')}", "CTRL")
+        return True
+
+    operations = {
+        'load': ('load', (model,)),
+        'unload': ('unload', (model,)),
+        'unload-all': ('unload_all', ()),
+        'wait': ('wait_until_loaded', (model,)),
+    }
+    if op not in operations:
+        log(f"❌ Unknown --control {op} - choose from list, {', '.join(operations)}", "CTRL")
+        return False
+    method, args = operations[op]
+    start = time.perf_counter()
+    results = control_hosts(hosts, method, *args)
+    for result in results:
+        log_control_result(result)
+    log(f"{op} on {len(hosts)} hosts in {time.perf_counter() - start:.3f}s", "CTRL")
+    return all(r['ok'] for r in results)
+
 def main():
+    configure_lmstudio_host()
+    configure_streaming()
     log("🧪 LM Studio Direct Test Suite", "MAIN")
     log(f"Testing: {TEST_MODEL}", "MAIN")
     log(f"Server: {LM_STUDIO_HOST}:{LM_STUDIO_PORT}", "MAIN")
@@ -261,7 +1036,12 @@ def main():
 
 if __name__ == "__main__":
     try:
-        success = main()
+        if get_option('--control'):
+            success = run_control()
+        elif '--benchmark' in sys.argv:
+            success = run_benchmark()
+        else:
+            success = main()
         exit(0 if success else 1)
     except KeyboardInterrupt:
         log("\n⚠️  Test interrupted", "MAIN")
@@ -4,14 +4,42 @@ Model Loading Test Script
 Tests the complete flow: unload model → post message → monitor loading → verify response
 
 Does NOT modify production code - pure testing
+
+Options:
+    --api-url URL         Comments API (default: KV_API_URL; polled every 2s if it turns out
+                          to be the legacy KV API, which ignores ?after=), e.g. a local
+                          TEST-SCRIPTS/do-standin-server.py at http://127.0.0.1:8788/api/comments
+    --lmstudio-host H[:P] LM Studio server (default: LM_STUDIO_HOST:LM_STUDIO_PORT), e.g. a local
+                          TEST-SCRIPTS/lmstudio-mock-server.py
+    --websocket-url URL   Bot dashboard websocket used to detect replies instantly
+                          (default: WEBSOCKET_URL; needs pip3 install websocket-client)
+    --no-websocket        Detect replies by polling only
+    --runs N              Test cycles to run (default: 3)
+    --pause S             Seconds between cycles (default: 30)
+    --trace               Per-stage timeline of each round trip (queue wait, claim,
+                          model load, generation + post-back, completion, detection)
+                          from the DO's botParams stamps and LM Studio state
+                          transitions, plus p50/p95/p99 per stage across runs
+    --json PATH           With --trace, also write every trace to PATH
+    --offline             No PM2 bot or deployed DO: skip the PM2 check, start
+                          TEST-SCRIPTS/do-standin-server.py in-process (unless --api-url
+                          is given) and answer with test-queue-load.py's simulated bot,
+                          generating each reply through --lmstudio-host, e.g.
+                          TEST-SCRIPTS/lmstudio-mock-server.py
 """
 
+import importlib.util
+import math
 import subprocess
+import sys
+import threading
 import time
 import json
 import urllib.request
 import urllib.parse
+from contextlib import ExitStack
 from datetime import datetime
+from pathlib import Path
 
 # Configuration
 LM_STUDIO_HOST = "10.0.0.100"
@@ -19,64 +47,73 @@ LM_STUDIO_PORT = 1234
 KV_API_URL = "https://sww-comments.bootloaders.workers.dev/api/comments"
 WEBSOCKET_URL = "ws://localhost:4002"
 
+# The legacy KV comments API ignores ?after= and answers every poll with its
+# newest 500 comments, so once it is detected polling slows to the old 2s
+LEGACY_POLL_INTERVAL = 2.0
+
 TEST_ENTITY = "dystopian-survival-guide"
 TEST_MODEL = "dystopian-survival-guide@f32"
 TEST_USERNAME = "TestBot"
 TEST_COLOR = "080219215"
+TEST_AIS = f"SurvivalGuide:{TEST_COLOR}"
+TEST_AI_USERNAME = "DystopianSurvival"      # entity's own username, when ais is not applied
+
+LMSTUDIO_DIRECT_SCRIPT = Path(__file__).resolve().parent / 'test-lmstudio-direct.py'
+QUEUE_LOAD_SCRIPT = Path(__file__).resolve().parent / 'test-queue-load.py'
+STANDIN_SCRIPT = Path(__file__).resolve().parent.parent / 'TEST-SCRIPTS' / 'do-standin-server.py'
+
+def load_script(name, path):
+    """Import a hyphenated script as a module"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# Shared LM Studio model-state watcher and REST model control
+lmstudio = load_script('test_lmstudio_direct', LMSTUDIO_DIRECT_SCRIPT)
+
+def model_watcher():
+    return lmstudio.model_watcher(LM_STUDIO_HOST, LM_STUDIO_PORT)
+
+def get_option(name, default=None):
+    """Read a value option from argv, accepting both '--name value' and '--name=value'"""
+    for i, arg in enumerate(sys.argv):
+        if arg == name and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+        if arg.startswith(name + '='):
+            return arg.split('=', 1)[1]
+    return default
+
+def configure_lmstudio_host():
+    """--lmstudio-host HOST[:PORT] points the test at another server, e.g. TEST-SCRIPTS/lmstudio-mock-server.py"""
+    global LM_STUDIO_HOST, LM_STUDIO_PORT
+    host = get_option('--lmstudio-host')
+    if host:
+        name, _, port = host.partition(':')
+        LM_STUDIO_HOST = name
+        LM_STUDIO_PORT = int(port or LM_STUDIO_PORT)
 
 def log(msg, level="INFO"):
     timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
     print(f"[{timestamp}] [{level}] {msg}")
 
-def run_cli_command(cmd):
-    """Execute LM Studio CLI command"""
-    log(f"Executing: {cmd}", "CLI")
-    try:
-        result = subprocess.run(
-            cmd, 
-            shell=True, 
-            capture_output=True, 
-            text=True, 
-            timeout=10
-        )
-        if result.returncode == 0:
-            log(f"✅ Success: {result.stdout.strip()}", "CLI")
-            return True
-        else:
-            log(f"❌ Error: {result.stderr.strip()}", "CLI")
-            return False
-    except subprocess.TimeoutExpired:
-        log("❌ Command timed out", "CLI")
-        return False
-    except Exception as e:
-        log(f"❌ Exception: {e}", "CLI")
-        return False
-
 def check_model_loaded(model_name):
     """Check if model is loaded via LM Studio API"""
     try:
-        url = f"http://{LM_STUDIO_HOST}:{LM_STUDIO_PORT}/api/v0/models"
-        with urllib.request.urlopen(url, timeout=5) as response:
-            data = json.loads(response.read())
-            for model in data.get('data', []):
-                if model['id'] == model_name:
-                    state = model.get('state', 'unknown')
-                    log(f"Model {model_name}: state={state}", "API")
-                    return state == 'loaded'
-            log(f"Model {model_name}: not found in model list", "API")
-            return False
+        state = model_watcher().state(model_name)
     except Exception as e:
         log(f"Failed to check model status: {e}", "API")
         return False
+    if state == 'not-found':
+        log(f"Model {model_name}: not found in model list", "API")
+    else:
+        log(f"Model {model_name}: state={state}", "API")
+    return state == 'loaded'
 
 def get_loaded_models():
     """Get list of all loaded models"""
     try:
-        url = f"http://{LM_STUDIO_HOST}:{LM_STUDIO_PORT}/api/v0/models"
-        with urllib.request.urlopen(url, timeout=5) as response:
-            data = json.loads(response.read())
-            loaded = [m['id'] for m in data.get('data', []) if m.get('state') == 'loaded']
-            return loaded
+        return model_watcher().loaded()
     except Exception as e:
         log(f"Failed to get loaded models: {e}", "API")
         return []
@@ -91,10 +128,10 @@ def unload_all_models():
     else:
         log("No models currently loaded", "SETUP")
     
-    success = run_cli_command(f"lms unload --all --host {LM_STUDIO_HOST}")
+    result = lmstudio.model_control(LM_STUDIO_HOST, LM_STUDIO_PORT).unload_all()
+    lmstudio.log_control_result(result, "SETUP")
     
-    if success:
-        time.sleep(2)
+    if result['ok'] or result.get('unloaded'):
         loaded_after = get_loaded_models()
         if not loaded_after:
             log("✅ All models unloaded successfully", "SETUP")
@@ -104,25 +141,30 @@ def unload_all_models():
             return False
     return False
 
-def post_test_message(text):
-    """Post a message to KV"""
-    log(f"📤 Posting message: '{text}'", "KV")
-    
-    message = {
+def build_test_message(text, username=TEST_USERNAME, color=TEST_COLOR, entity=TEST_ENTITY,
+                       ais=TEST_AIS, priority=5):
+    """Human message in the shape the frontend posts (botParams routes it to the bot)"""
+    return {
         "text": text,
-        "username": TEST_USERNAME,
-        "color": TEST_COLOR,
+        "username": username,
+        "color": color,
         "domain": "saywhatwant.app",
         "language": "en",
         "message-type": "human",
         "misc": "",
         "context": [],
         "botParams": {
-            "entity": TEST_ENTITY,
-            "priority": 5,
-            "ais": f"SurvivalGuide:{TEST_COLOR}"
+            "entity": entity,
+            "priority": priority,
+            "ais": ais
         }
     }
+
+def post_test_message(text):
+    """Post a message to KV"""
+    log(f"📤 Posting message: '{text}'", "KV")
+    
+    message = build_test_message(text)
     
     try:
         data = json.dumps(message).encode('utf-8')
@@ -132,28 +174,340 @@ def post_test_message(text):
             headers={"Content-Type": "application/json"}
         )
         
+        sent_at = int(time.time() * 1000)
         with urllib.request.urlopen(req, timeout=10) as response:
             result = json.loads(response.read())
             message_id = result.get('id', 'unknown')
+            # The server's timestamp is what replies are compared against
+            timestamp = result.get('timestamp') or sent_at
             log(f"✅ Message posted successfully", "KV")
             log(f"Message ID: {message_id}", "KV")
-            return message_id
+            return message_id, timestamp
     except Exception as e:
         log(f"❌ Exception posting message: {e}", "KV")
+        return None, None
+
+def fetch_messages_after(after):
+    """
+    (messages newer than `after` ms, legacy) - legacy is True when the answer
+    came in the legacy KV shape {comments} rather than the DO's {messages}
+    """
+    url = f"{KV_API_URL}?{urllib.parse.urlencode({'after': after})}"
+    with urllib.request.urlopen(url, timeout=10) as response:
+        data = json.loads(response.read())
+    legacy = not (isinstance(data, dict) and 'messages' in data)
+    messages = data.get('messages', data.get('comments', [])) if isinstance(data, dict) else data
+    # A server that ignores ?after= still works, just less cheaply
+    return [m for m in messages if m.get('timestamp', 0) > after], legacy
+
+def comments_poll_interval(interval, legacy):
+    """`interval`, or LEGACY_POLL_INTERVAL if longer and the comments API is legacy KV"""
+    return max(interval, LEGACY_POLL_INTERVAL) if legacy else interval
+
+class ReplyWatcher:
+    """
+    Waits for the AI reply to one posted message.
+
+    The posted message's own timestamp is the starting cursor; each poll only
+    asks for messages after the newest one already seen (minus a small
+    overlap for bot clocks), so nothing is missed however busy the channel
+    is. Polling starts fast and backs off while nothing happens (never
+    faster than LEGACY_POLL_INTERVAL against the legacy KV API). With
+    websocket-client installed, the bot's dashboard websocket (WEBSOCKET_URL)
+    wakes the watcher the moment our queue item completes.
+
+    A reply is an AI message with replyTo == our id, or - since the bot does
+    not set replyTo - an AI message from one of `ai_usernames` newer than ours.
+    """
+
+    OVERLAP_MS = 2000
+
+    def __init__(self, message_id, posted_timestamp, ai_usernames, websocket_url=None,
+                 min_interval=0.25, max_interval=4.0):
+        self.message_id = message_id
+        self.posted_timestamp = posted_timestamp
+        self.ai_usernames = set(ai_usernames)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.cursor = posted_timestamp
+        self.seen = set()
+        self.polls = 0
+        self.legacy_api = False     # set by poll() once the API answers in the legacy KV shape
+        self.wake = threading.Event()
+        self.queue_item_id = None
+        self.ws = None
+        self.ws_connected = False
+        if websocket_url:
+            self._subscribe(websocket_url)
+
+    def _subscribe(self, websocket_url):
+        try:
+            import websocket
+        except ImportError:
+            log("websocket-client not installed - polling only (pip3 install websocket-client)", "MONITOR")
+            return
+
+        def on_open(ws):
+            self.ws_connected = True
+            log(f"🔌 Subscribed to bot websocket {websocket_url}", "MONITOR")
+
+        def on_message(ws, raw):
+            try:
+                event = json.loads(raw)
+            except ValueError:
+                return
+            data = event.get('data') or {}
+            if event.get('type') == 'queued':
+                item = data.get('item') or {}
+                if (item.get('message') or {}).get('id') == self.message_id:
+                    self.queue_item_id = item.get('id')
+                    log(f"Queued by bot as {self.queue_item_id}", "MONITOR")
+            elif event.get('type') == 'claimed' and data.get('itemId') == self.queue_item_id:
+                log(f"Claimed by {data.get('serverId')}", "MONITOR")
+            elif event.get('type') == 'completed' and self.queue_item_id in (None, data.get('itemId')):
+                # Reply is posted just before completion - look now (any completion
+                # counts if we joined too late to see our item being queued)
+                self.wake.set()
+
+        self.ws = websocket.WebSocketApp(websocket_url, on_open=on_open, on_message=on_message)
+        threading.Thread(target=self.ws.run_forever, daemon=True).start()
+
+    def close(self):
+        if self.ws:
+            self.ws.close()
+
+    def is_reply(self, msg):
+        if msg.get('message-type') != 'AI':
+            return False
+        if msg.get('replyTo'):
+            return msg['replyTo'] == self.message_id
+        return msg.get('username') in self.ai_usernames and msg.get('timestamp', 0) > self.posted_timestamp
+
+    def poll(self):
+        """One incremental poll; returns the reply if it has arrived"""
+        self.polls += 1
+        messages, legacy = fetch_messages_after(self.cursor)
+        if legacy and not self.legacy_api:
+            log(f"Legacy KV comments API (ignores ?after=) - polling every {LEGACY_POLL_INTERVAL:g}s", "KV")
+        self.legacy_api = legacy
+        reply = None
+        for msg in messages:
+            if msg['id'] in self.seen:
+                continue
+            self.seen.add(msg['id'])
+            if self.is_reply(msg) and (reply is None or msg['timestamp'] < reply['timestamp']):
+                reply = msg
+        if messages:
+            newest = max(m.get('timestamp', 0) for m in messages)
+            self.cursor = max(self.cursor, newest - self.OVERLAP_MS)
+        return reply
+
+    def wait(self, deadline, on_tick=None):
+        """Poll until the reply arrives or time.time() passes deadline"""
+        interval = self.min_interval
+        while time.time() < deadline:
+            try:
+                reply = self.poll()
+            except Exception as e:
+                log(f"Failed to fetch messages: {e}", "KV")
+                reply = None
+            if reply:
+                return reply
+            if on_tick:
+                on_tick()
+
+            # Fast right after posting and after any websocket nudge, slower while idle
+            woke = self.wake.wait(min(comments_poll_interval(interval, self.legacy_api), max(0, deadline - time.time())))
+            if woke:
+                self.wake.clear()
+                interval = self.min_interval
+            else:
+                interval = min(self.max_interval, interval * 1.5)
         return None
 
-def get_recent_messages(limit=10):
-    """Get recent messages from KV"""
-    try:
-        url = f"{KV_API_URL}?limit={limit}&domain=all&sort=timestamp&order=desc"
-        with urllib.request.urlopen(url, timeout=10) as response:
-            data = json.loads(response.read())
-            return data.get('comments', [])
-    except Exception as e:
-        log(f"Failed to fetch messages: {e}", "KV")
-        return []
+def percentile(values, pct):
+    """Nearest-rank percentile (None for no samples)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = min(max(1, math.ceil(pct * len(ordered) / 100)), len(ordered))
+    return ordered[rank - 1]
+
+def summarize_latencies(values):
+    """Sample count, p50/p95/p99 and max of a list of latencies"""
+    return {
+        'count': len(values),
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+        'max': max(values) if values else None,
+    }
+
+def make_session(pool_size):
+    """requests session that keeps up to pool_size connections per host alive"""
+    import requests  # only the load tests use it; this script itself sticks to urllib
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+class RoundTripTrace:
+    """
+    Per-stage timeline of one bot round trip.
+
+    A sampler thread follows the test message through the DO queue - the
+    botParams status / claimedBy / claimedAt / completedAt the DO stamps on
+    it - while the shared model watcher, kept polling fast for the length
+    of the trace, reports every LM Studio state transition of the model.
+    Claim, reply and completion times are exact DO timestamps; model
+    transitions are as precise as the watcher's fast interval (~0.1s).
+    DO times come from the worker's
+    clock and model/detection times from ours, so stages that cross the two
+    carry any clock skew between them.
+    """
+
+    STAGES = ('queue_wait', 'model_load', 'generate_and_post', 'complete', 'detect', 'total')
+    COMPLETION_GRACE = 5
+
+    def __init__(self, message_id, posted_timestamp, model_name, interval=0.25):
+        self.message_id = message_id
+        self.posted_timestamp = posted_timestamp
+        self.model_name = model_name
+        self.interval = interval
+        self.legacy_api = False             # only the sampler thread reads or writes it
+        self.queue = {}
+        self.status_transitions = []        # (observed ms, botParams.status)
+        self.model_transitions = []         # (observed ms, model state)
+        self.reply = None
+        self.detected_at = None
+        self.completed = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.watching = ExitStack()
+
+    def start(self):
+        watcher = model_watcher()
+        try:
+            state = watcher.state(self.model_name, max_age=0)
+            self.model_transitions.append((int(time.time() * 1000), state))
+        except Exception as e:
+            log(f"Failed to read model state: {e}", "TRACE")
+        self.watching.callback(watcher.subscribe(self._on_model_change))
+        self.watching.enter_context(watcher.expect())
+        self.thread.start()
+        return self
+
+    def _on_model_change(self, change):
+        if change['model'] == self.model_name:
+            self.model_transitions.append((int(change['at'] * 1000), change['new']))
+
+    def _sample(self):
+        now = int(time.time() * 1000)
+        if self.completed.is_set():
+            return
+        try:
+            messages, self.legacy_api = fetch_messages_after(self.posted_timestamp - 1)
+        except Exception:
+            return
+        for msg in messages:
+            if msg.get('id') != self.message_id:
+                continue
+            bp = msg.get('botParams') or {}
+            if bp.get('status') != self.queue.get('status'):
+                self.status_transitions.append((now, bp.get('status')))
+            self.queue = {k: bp.get(k) for k in ('status', 'claimedBy', 'claimedAt', 'completedAt')}
+            if bp.get('status') == 'complete':
+                self.completed.set()
+
+    def _run(self):
+        while not self.stopped.is_set():
+            self._sample()
+            self.stopped.wait(comments_poll_interval(self.interval, self.legacy_api))
+
+    def finish(self, reply):
+        """Record the reply (None on timeout), give the DO a moment to mark completion, stop sampling"""
+        self.detected_at = int(time.time() * 1000)
+        self.reply = reply
+        if reply:
+            self.completed.wait(self.COMPLETION_GRACE)
+        self.stopped.set()
+        self.thread.join()
+        self.watching.close()
+
+    def loaded_at(self):
+        """When the model was first seen loaded (posted time if it already was)"""
+        for i, (ms, state) in enumerate(self.model_transitions):
+            if state == 'loaded':
+                return self.posted_timestamp if i == 0 else ms
+        return None
+
+    def stages(self):
+        """Stage durations in ms (None where the trace never got that far)"""
+        claimed = self.queue.get('claimedAt')
+        completed = self.queue.get('completedAt')
+        loaded = self.loaded_at()
+        replied = self.reply['timestamp'] if self.reply else None
+
+        def span(start, end):
+            return max(0, end - start) if start is not None and end is not None else None
+
+        ready = max(claimed, loaded) if claimed is not None and loaded is not None else None
+        return {
+            'queue_wait': span(self.posted_timestamp, claimed),
+            'model_load': span(claimed, loaded) if claimed is not None and loaded is not None else None,
+            'generate_and_post': span(ready, replied),
+            'complete': span(replied, completed),
+            'detect': span(replied, self.detected_at if replied else None),
+            'total': span(self.posted_timestamp, self.detected_at if replied else None),
+        }
+
+    def timeline(self):
+        """(ms, event) pairs in time order"""
+        events = [(self.posted_timestamp, 'posted to DO')]
+        if self.queue.get('claimedAt') is not None:
+            events.append((self.queue['claimedAt'], f"claimed by {self.queue.get('claimedBy')}"))
+        events += [(ms, f"model {state}") for ms, state in self.model_transitions]
+        if self.reply:
+            events.append((self.reply['timestamp'], f"AI reply posted ({self.reply.get('username')})"))
+        if self.queue.get('completedAt') is not None:
+            events.append((self.queue['completedAt'], 'marked complete'))
+        if self.detected_at is not None:
+            events.append((self.detected_at, 'reply detected' if self.reply else 'gave up'))
+        return sorted(events, key=lambda e: e[0])
+
+    def as_dict(self):
+        return {
+            'messageId': self.message_id,
+            'postedAt': self.posted_timestamp,
+            'queue': self.queue,
+            'statusTransitions': self.status_transitions,
+            'modelTransitions': self.model_transitions,
+            'replyId': self.reply['id'] if self.reply else None,
+            'replyAt': self.reply['timestamp'] if self.reply else None,
+            'detectedAt': self.detected_at,
+            'stagesMs': self.stages(),
+            'timeline': self.timeline(),
+        }
+
+def print_trace(trace):
+    log(f"⏱  Round trip timeline for {trace.message_id}", "TRACE")
+    for ms, event in trace.timeline():
+        log(f"   +{(ms - trace.posted_timestamp) / 1000:8.3f}s  {event}", "TRACE")
+    stages = trace.stages()
+    log("   " + "  ".join(f"{name}={'-' if stages[name] is None else f'{stages[name]}ms'}"
+                          for name in RoundTripTrace.STAGES), "TRACE")
+
+def print_stage_percentiles(traces):
+    log("⏱  Per-stage latency across runs (ms)", "TRACE")
+    log(f"   {'stage':<18} {'n':>3} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}", "TRACE")
+    for name in RoundTripTrace.STAGES:
+        values = sorted(v for v in (t.stages()[name] for t in traces) if v is not None)
+        cells = [percentile(values, p) for p in (50, 95, 99)] + [values[-1] if values else None]
+        log(f"   {name:<18} {len(values):>3} " + " ".join(f"{'-' if c is None else c:>8}" for c in cells), "TRACE")
 
-def find_ai_response(test_message_id, timeout=180):
+def find_ai_response(test_message_id, posted_timestamp, timeout=180, trace=None):
     """
     Monitor KV for AI response to our test message
     Returns: (success, response_text, elapsed_time)
@@ -161,14 +515,17 @@ def find_ai_response(test_message_id, timeout=180):
     log(f"👀 Monitoring for AI response (timeout: {timeout}s)...", "MONITOR")
     
     start_time = time.time()
-    last_check = 0
-    
-    while (time.time() - start_time) < timeout:
+    last_check = [0]
+    watcher = ReplyWatcher(test_message_id, posted_timestamp,
+                           ai_usernames={TEST_AI_USERNAME, TEST_AIS.split(':')[0]},
+                           websocket_url=WEBSOCKET_URL)
+
+    def on_tick():
         elapsed = int(time.time() - start_time)
         
         # Log every 10 seconds
-        if elapsed > last_check + 10:
-            log(f"Waiting for response... ({elapsed}s elapsed)", "MONITOR")
+        if elapsed > last_check[0] + 10:
+            log(f"Waiting for response... ({elapsed}s elapsed, {watcher.polls} polls)", "MONITOR")
             
             # Check model status
             is_loaded = check_model_loaded(TEST_MODEL)
@@ -177,29 +534,21 @@ def find_ai_response(test_message_id, timeout=180):
             else:
                 log(f"⏳ Model still loading...", "MONITOR")
             
-            last_check = elapsed
-        
-        # Check for response
-        messages = get_recent_messages(20)
-        
-        for msg in messages:
-            # Look for AI response that came after our test message
-            if (msg.get('message-type') == 'AI' and 
-                msg.get('username') == 'DystopianSurvival'):
-                # Check if this is a response to our message
-                # (AI messages appear after human messages they respond to)
-                msg_timestamp = msg.get('timestamp', 0)
-                
-                # Get our test message to compare timestamps
-                for human_msg in messages:
-                    if human_msg.get('id') == test_message_id:
-                        if msg_timestamp > human_msg.get('timestamp', 0):
-                            elapsed = int(time.time() - start_time)
-                            log(f"✅ AI RESPONSE FOUND! (after {elapsed}s)", "MONITOR")
-                            log(f"Response: {msg.get('text', '')[:100]}...", "MONITOR")
-                            return (True, msg.get('text'), elapsed)
-        
-        time.sleep(2)  # Check every 2 seconds
+            last_check[0] = elapsed
+
+    try:
+        reply = watcher.wait(start_time + timeout, on_tick)
+    finally:
+        watcher.close()
+        if trace:
+            trace.finish(reply)
+
+    if reply:
+        elapsed = round(time.time() - start_time, 1)
+        log(f"✅ AI RESPONSE FOUND! (after {elapsed}s, {watcher.polls} polls)", "MONITOR")
+        log(f"Reply timestamp is {reply['timestamp'] - posted_timestamp}ms after our message", "MONITOR")
+        log(f"Response: {reply.get('text', '')[:100]}...", "MONITOR")
+        return (True, reply.get('text'), elapsed)
     
     log(f"❌ TIMEOUT: No response after {timeout}s", "MONITOR")
     return (False, None, timeout)
@@ -228,14 +577,51 @@ def check_pm2_status():
         log(f"Failed to check PM2: {e}", "PM2")
     return False
 
-def run_test(test_number):
-    """Run a complete test cycle"""
+def start_offline_pipeline(stack):
+    """
+    --offline: stand in for the DO worker (unless --api-url is given) and the
+    PM2 bot. The simulated bot claims each message and generates its reply
+    with TEST_MODEL on LM Studio, so the JIT load still happens on the
+    request path as it would in the real bot. Cleanup is pushed onto stack.
+    """
+    global KV_API_URL
+    if not get_option('--api-url'):
+        standin = load_script('do_standin_server', STANDIN_SCRIPT)
+        server = standin.make_server(port=0, messages=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        stack.callback(server.server_close)
+        stack.callback(server.shutdown)
+        KV_API_URL = f"http://127.0.0.1:{server.server_address[1]}/api/comments"
+        log(f"DO stand-in listening on {KV_API_URL}", "OFFLINE")
+
+    # Loaded here rather than at import: test-queue-load.py imports this script
+    queue_load = load_script('test_queue_load', QUEUE_LOAD_SCRIPT)
+
+    class LMStudioBot(queue_load.SimulatedBot):
+        def generate(self, human, bp):
+            payload = lmstudio.build_chat_payload(TEST_MODEL, [{"role": "user", "content": human.get('text', '')}])
+            req = urllib.request.Request(
+                f"http://{LM_STUDIO_HOST}:{LM_STUDIO_PORT}/v1/chat/completions",
+                data=json.dumps(payload).encode('utf-8'),
+                headers={"Content-Type": "application/json"}
+            )
+            with urllib.request.urlopen(req, timeout=300) as response:
+                return json.loads(response.read())['choices'][0]['message']['content']
+
+    api_base = KV_API_URL[:-len('/api/comments')] if KV_API_URL.endswith('/api/comments') else KV_API_URL
+    bot = LMStudioBot(api_base, workers=1, think_ms=0, jitter_ms=0, seed=1)
+    bot.start()
+    stack.callback(bot.shutdown)
+    log(f"Simulated bot answering from {api_base} with {TEST_MODEL}", "OFFLINE")
+
+def run_test(test_number, traces=None, offline=False):
+    """Run a complete test cycle (appending a RoundTripTrace to traces when given)"""
     log("="*80)
     log(f"🧪 STARTING TEST #{test_number}", "TEST")
     log("="*80)
     
-    # Step 1: Check PM2 is running
-    if not check_pm2_status():
+    # Step 1: Check PM2 is running (the simulated bot replaces it offline)
+    if not offline and not check_pm2_status():
         log("❌ PM2 bot not online!", "TEST")
         return False
     
@@ -243,29 +629,32 @@ def run_test(test_number):
     if not unload_all_models():
         log("⚠️  Failed to unload models, continuing anyway...", "TEST")
     
-    time.sleep(3)
-    
-    # Step 3: Verify model is unloaded
+    # Step 3: Verify model is unloaded (unload_all_models already waited for it)
     if check_model_loaded(TEST_MODEL):
         log("❌ Model still loaded after unload!", "TEST")
         return False
     
     log("✅ Model confirmed unloaded", "TEST")
-    time.sleep(2)
     
     # Step 4: Post test message
     test_text = f"test message {test_number} at {datetime.now().strftime('%H:%M:%S')}"
-    message_id = post_test_message(test_text)
+    message_id, posted_timestamp = post_test_message(test_text)
     
     if not message_id:
         log("❌ Failed to post message", "TEST")
         return False
     
     log(f"✅ Message posted: ID={message_id}", "TEST")
-    time.sleep(5)  # Give bot time to poll
+    
+    trace = None
+    if traces is not None:
+        trace = RoundTripTrace(message_id, posted_timestamp, TEST_MODEL).start()
+        traces.append(trace)
     
     # Step 5: Monitor for response
-    success, response_text, elapsed = find_ai_response(message_id, timeout=180)
+    success, response_text, elapsed = find_ai_response(message_id, posted_timestamp, timeout=180, trace=trace)
+    if trace:
+        print_trace(trace)
     
     if success:
         log(f"✅✅✅ TEST #{test_number} PASSED! Response received in {elapsed}s", "TEST")
@@ -286,6 +675,17 @@ def run_test(test_number):
 
 def main():
     """Run the test suite"""
+    global KV_API_URL, WEBSOCKET_URL
+    configure_lmstudio_host()
+    KV_API_URL = get_option('--api-url', KV_API_URL)
+    WEBSOCKET_URL = None if '--no-websocket' in sys.argv else get_option('--websocket-url', WEBSOCKET_URL)
+    offline = '--offline' in sys.argv
+    offline_stack = ExitStack()
+    if offline:
+        # No bot dashboard offline unless one is named explicitly
+        WEBSOCKET_URL = get_option('--websocket-url')
+        start_offline_pipeline(offline_stack)
+    
     log("🚀 Model Loading Test Suite", "MAIN")
     log(f"Entity: {TEST_ENTITY}", "MAIN")
     log(f"Model: {TEST_MODEL}", "MAIN")
@@ -293,21 +693,35 @@ def main():
     log(f"KV API: {KV_API_URL}", "MAIN")
     print()
     
-    # Run test 3 times for reliability
+    runs = int(get_option('--runs', 3))
+    pause = float(get_option('--pause', 30))
+    traces = [] if '--trace' in sys.argv else None
+    
+    # Run test several times for reliability
     results = []
-    for i in range(1, 4):
-        success = run_test(i)
-        results.append(success)
-        
-        if success:
-            log(f"✅ Test {i}/3 passed", "MAIN")
-        else:
-            log(f"❌ Test {i}/3 failed", "MAIN")
-        
-        if i < 3:
-            log("⏸  Waiting 30 seconds before next test...", "MAIN")
-            time.sleep(30)
-        
+    with offline_stack:
+        for i in range(1, runs + 1):
+            success = run_test(i, traces, offline)
+            results.append(success)
+            
+            if success:
+                log(f"✅ Test {i}/{runs} passed", "MAIN")
+            else:
+                log(f"❌ Test {i}/{runs} failed", "MAIN")
+            
+            if i < runs:
+                log(f"⏸  Waiting {pause:g} seconds before next test...", "MAIN")
+                time.sleep(pause)
+            
+            print()
+    
+    if traces:
+        print_stage_percentiles(traces)
+        json_path = get_option('--json')
+        if json_path:
+            with open(json_path, 'w') as f:
+                json.dump([t.as_dict() for t in traces], f, indent=2)
+            log(f"Traces written to {json_path}", "TRACE")
         print()
     
     # Summary
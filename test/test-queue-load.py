@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+"""
+Comments/Queue Load Test
+Drives the DO comments → queue → bot → reply pipeline with many synthetic humans
+
+Posts human messages (same schema as test-model-loading.py) at a fixed
+open-loop rate - sends follow the schedule whether or not earlier ones were
+answered - then reports throughput, queue depth over time, and post-to-reply
+latency percentiles.
+
+Replies are matched to posts by the AI message's replyTo field when it is
+set (the simulated bot does). The real bot never sets it, so any other AI
+message posted as one of the test entities' ais username:color is paired
+with the oldest unanswered post to that entity sent before it.
+
+Usage:
+    # Fully offline: in-process DO stand-in plus simulated bot workers
+    python3 test-queue-load.py --standin --rate 20 --duration 30 --users 50
+
+    # Against a deployed/staging DO worker with the real bot running (it only
+    # answers entities it knows, so name real ones)
+    python3 test-queue-load.py --api-base https://staging-do-worker.example.dev --rate 2 --duration 120 \
+        --entities dystopian-survival-guide=SurvivalGuide:080219215
+
+Options:
+    --api-base URL        DO worker base URL (required unless --standin)
+    --standin             Start TEST-SCRIPTS/do-standin-server.py in-process
+    --standin-messages N  Messages to pre-seed the stand-in with (default: 0)
+    --simulate-bot N      Run N simulated bot workers (claim-next → reply → complete);
+                          defaults to 4 with --standin, 0 otherwise
+    --bot-think-ms N      Simulated generation time per reply (default: 800)
+    --bot-jitter-ms N     Uniform +/- jitter on that time (default: 400)
+    --rate R              Human messages per second (default: 5)
+    --duration S          Seconds to keep posting (default: 30)
+    --arrival MODE        uniform | poisson inter-arrival times (default: poisson)
+    --users N             Synthetic human usernames (default: 50)
+    --entities N|LIST     Synthetic bot entities (default: 5), or real entity ids to post
+                          to, each optionally with the ais to request, e.g.
+                          dystopian-survival-guide=SurvivalGuide:080219215,the-eternal
+    --drain S             Seconds to wait for outstanding replies after posting stops (default: 60)
+    --poll-ms N           Reply poll interval (default: 250)
+    --sample-ms N         Queue-depth sample interval (default: 1000)
+    --senders N           Concurrent POSTs in flight (default: 32)
+    --seed N              RNG seed for users, entities and arrivals (default: 1)
+    --json PATH           Also write the full results as JSON
+"""
+
+import importlib.util
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+MODEL_LOADING_SCRIPT = Path(__file__).resolve().parent / 'test-model-loading.py'
+STANDIN_SCRIPT = Path(__file__).resolve().parent.parent / 'TEST-SCRIPTS' / 'do-standin-server.py'
+
+POLL_OVERLAP_MS = 2000      # re-read this much behind the cursor: bot timestamps can land out of order
+
+def load_script(name, path):
+    """Import a hyphenated script as a module"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+model_loading = load_script('test_model_loading', MODEL_LOADING_SCRIPT)
+log = model_loading.log
+build_test_message = model_loading.build_test_message
+percentile = model_loading.percentile
+summarize_latencies = model_loading.summarize_latencies
+make_session = model_loading.make_session
+
+def get_option(name, default=None):
+    """Read a value option from argv, accepting both '--name value' and '--name=value'"""
+    for i, arg in enumerate(sys.argv):
+        if arg == name and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+        if arg.startswith(name + '='):
+            return arg.split('=', 1)[1]
+    return default
+
+def random_color(rng):
+    return f"{rng.randint(0, 255):03d}{rng.randint(0, 255):03d}{rng.randint(0, 255):03d}"
+
+def parse_entities(value):
+    """
+    --entities: a count of synthetic load-entity-NN entities, or a
+    comma-separated list of real entity ids, each optionally followed by
+    =username:color to use as its ais (the real bot rejects unknown entities)
+    """
+    if value.isdigit():
+        return int(value)
+    entities = []
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        entity, _, ais = item.partition('=')
+        entities.append((entity, ais or None))
+    return entities
+
+class LoadTest:
+    def __init__(self, api_base, rate, duration, users, entities, arrival, seed,
+                 poll_ms, sample_ms, senders):
+        self.api_base = api_base.rstrip('/')
+        self.rate = rate
+        self.duration = duration
+        self.arrival = arrival
+        self.poll_interval = poll_ms / 1000
+        self.sample_interval = sample_ms / 1000
+        self.rng = random.Random(seed)
+        self.session = make_session(senders + 8)
+        self.senders = senders
+
+        self.users = [(f"LoadUser{i}", random_color(self.rng)) for i in range(users)]
+        # entities: a count of synthetic ones, or [(entity id, ais or None)] from parse_entities
+        if isinstance(entities, int):
+            entities = [(f"load-entity-{i:02d}", None) for i in range(entities)]
+        self.entities = []
+        for i, (entity, ais) in enumerate(entities):
+            self.entities.append((entity, ais or f"LoadEntity{i:02d}:{random_color(self.rng)}"))
+
+        self.lock = threading.Lock()
+        self.posts = {}             # message id → post record
+        self.post_errors = 0
+        self.post_rtts = []
+        self.replies = {}           # human message id → reply record
+        self.ais_replies = {}       # ais → replies without replyTo, waiting to be paired
+        self.unmatched_replies = 0
+        self.samples = []           # (elapsed, pendingQueue, outstanding)
+        self.stop = threading.Event()
+        self.started = None
+
+    def url(self, path):
+        return f"{self.api_base}{path}"
+
+    # --------------------------------------------------------------
+    # Posting (open loop)
+    # --------------------------------------------------------------
+
+    def schedule(self):
+        """(send offset in seconds, entity) per message - all drawn before the run begins"""
+        plan = []
+        t = 0.0
+        while True:
+            t += self.rng.expovariate(self.rate) if self.arrival == 'poisson' else 1 / self.rate
+            if t >= self.duration:
+                return plan
+            plan.append((t, self.entities[self.rng.randrange(len(self.entities))]))
+
+    def post_one(self, seq, intended, entity, ais):
+        username, color = self.users[seq % len(self.users)]
+        message = build_test_message(f"load message {seq}", username=username, color=color,
+                                     entity=entity, ais=ais)
+        sent = time.time()
+        try:
+            response = self.session.post(self.url('/api/comments'), json=message, timeout=30)
+            response.raise_for_status()
+            result = response.json()
+        except Exception as e:
+            with self.lock:
+                self.post_errors += 1
+            log(f"❌ POST failed: {e}", "LOAD")
+            return
+
+        acked = time.time()
+        with self.lock:
+            self.post_rtts.append((acked - sent) * 1000)
+            self.posts[result['id']] = {
+                'seq': seq,
+                'user': username,
+                'entity': entity,
+                'ais': ais,
+                'intended': self.started + intended,
+                'sent': sent,
+                'acked': acked,
+                'server_ts': result.get('timestamp'),
+            }
+
+    def run_posts(self):
+        plan = self.schedule()
+        log(f"📤 {len(plan)} messages scheduled over {self.duration}s "
+            f"({self.arrival}, {self.rate}/s, {len(self.users)} users, {len(self.entities)} entities)", "LOAD")
+
+        with ThreadPoolExecutor(max_workers=self.senders) as executor:
+            for seq, (offset, (entity, ais)) in enumerate(plan):
+                delay = self.started + offset - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self.post_one, seq, offset, entity, ais)
+
+    # --------------------------------------------------------------
+    # Observation
+    # --------------------------------------------------------------
+
+    def pair_ais_replies(self):
+        """
+        Pair replies that carry no replyTo with posts (caller holds the lock).
+
+        Per ais, each reply goes to the oldest unanswered post with a server
+        timestamp before it; a reply whose post is not acknowledged yet waits
+        for a later call.
+        """
+        for ais, waiting in self.ais_replies.items():
+            if not waiting:
+                continue
+            open_posts = sorted((p['server_ts'] or 0, pid) for pid, p in self.posts.items()
+                                if p['ais'] == ais and pid not in self.replies)
+            still_waiting = []
+            for reply in sorted(waiting, key=lambda r: r['server_ts'] or 0):
+                if open_posts and open_posts[0][0] <= (reply['server_ts'] or 0):
+                    self.replies[open_posts.pop(0)[1]] = reply
+                else:
+                    still_waiting.append(reply)
+            self.ais_replies[ais] = still_waiting
+
+    def answered(self):
+        """Posts that have a reply (caller holds the lock)"""
+        self.pair_ais_replies()
+        return sum(1 for pid in self.replies if pid in self.posts)
+
+    def poll_replies(self):
+        """Cursor-based poll of /api/comments, matching AI replies via replyTo or ais"""
+        our_ais = {ais for _, ais in self.entities}
+        cursor = int(self.started * 1000)
+        seen = set()
+        while not self.stop.is_set():
+            try:
+                response = self.session.get(self.url('/api/comments'),
+                                            params={'after': cursor - POLL_OVERLAP_MS}, timeout=30)
+                messages = response.json().get('messages', [])
+            except Exception as e:
+                log(f"⚠️  Poll failed: {e}", "POLL")
+                messages = []
+
+            now = time.time()
+            with self.lock:
+                for msg in messages:
+                    if msg['id'] in seen:
+                        continue
+                    seen.add(msg['id'])
+                    cursor = max(cursor, msg.get('timestamp', 0))
+                    if msg.get('message-type') != 'AI':
+                        continue
+                    # A fast reply can arrive before its POST is acknowledged, so
+                    # replies are matched to posts only when results are computed
+                    parent = msg.get('replyTo')
+                    reply = {'seen': now, 'server_ts': msg.get('timestamp')}
+                    ais = f"{msg.get('username')}:{msg.get('color')}"
+                    if parent:
+                        self.replies.setdefault(parent, reply)
+                    elif ais in our_ais:
+                        self.ais_replies.setdefault(ais, []).append(reply)
+                    else:
+                        self.unmatched_replies += 1
+
+            self.stop.wait(self.poll_interval)
+
+    def sample_queue(self):
+        while not self.stop.is_set():
+            try:
+                pending = self.session.get(self.url('/api/admin/stats'), timeout=10).json().get('pendingQueue')
+            except Exception:
+                pending = None
+            with self.lock:
+                outstanding = len(self.posts) - self.answered()
+                self.samples.append((round(time.time() - self.started, 3), pending, outstanding))
+            self.stop.wait(self.sample_interval)
+
+    # --------------------------------------------------------------
+    # Run
+    # --------------------------------------------------------------
+
+    def run(self, drain):
+        self.started = time.time()
+        observers = [threading.Thread(target=self.poll_replies, daemon=True),
+                     threading.Thread(target=self.sample_queue, daemon=True)]
+        for t in observers:
+            t.start()
+
+        self.run_posts()
+        posting_done = time.time()
+        log(f"⏳ Posting finished - draining for up to {drain}s...", "LOAD")
+
+        deadline = posting_done + drain
+        while time.time() < deadline:
+            with self.lock:
+                if self.answered() >= len(self.posts):
+                    break
+            time.sleep(0.2)
+
+        self.stop.set()
+        for t in observers:
+            t.join(timeout=5)
+        return self.results(posting_done - self.started, time.time() - self.started)
+
+    def results(self, posting_seconds, total_seconds):
+        with self.lock:
+            self.pair_ais_replies()
+            matched = {pid: r for pid, r in self.replies.items() if pid in self.posts}
+            server_latency = [r['server_ts'] - self.posts[pid]['server_ts']
+                              for pid, r in matched.items()
+                              if r['server_ts'] and self.posts[pid]['server_ts']]
+            observed_latency = [(r['seen'] - self.posts[pid]['intended']) * 1000
+                                for pid, r in matched.items()]
+            pending_samples = [p for _, p, _ in self.samples if p is not None]
+
+            return {
+                'config': {
+                    'apiBase': self.api_base,
+                    'rate': self.rate,
+                    'duration': self.duration,
+                    'arrival': self.arrival,
+                    'users': len(self.users),
+                    'entities': len(self.entities),
+                },
+                'posted': len(self.posts),
+                'postErrors': self.post_errors,
+                'replied': len(matched),
+                'unmatchedReplies': (self.unmatched_replies + len(self.replies) - len(matched)
+                                     + sum(len(waiting) for waiting in self.ais_replies.values())),
+                'postingSeconds': round(posting_seconds, 3),
+                'totalSeconds': round(total_seconds, 3),
+                'postThroughput': round(len(self.posts) / posting_seconds, 3) if posting_seconds else None,
+                'replyThroughput': round(len(matched) / total_seconds, 3) if total_seconds else None,
+                'postRttMs': summarize_latencies(self.post_rtts),
+                'replyLatencyMs': summarize_latencies(server_latency),
+                'observedReplyLatencyMs': summarize_latencies(observed_latency),
+                'queueDepth': {
+                    'max': max(pending_samples) if pending_samples else None,
+                    'mean': round(sum(pending_samples) / len(pending_samples), 2) if pending_samples else None,
+                },
+                'samples': [{'t': t, 'pending': p, 'outstanding': o} for t, p, o in self.samples],
+            }
+
+class SimulatedBot:
+    """
+    Stand-in for the PM2 bot: claim-next, "generate", post the AI reply with
+    replyTo, then complete - the same endpoint sequence the real bot uses.
+    """
+
+    def __init__(self, api_base, workers, think_ms, jitter_ms, seed):
+        self.api_base = api_base.rstrip('/')
+        self.workers = workers
+        self.think_ms = think_ms
+        self.jitter_ms = jitter_ms
+        self.rng = random.Random(seed + 1)
+        self.rng_lock = threading.Lock()
+        self.session = make_session(workers + 1)
+        self.stop = threading.Event()
+        self.threads = []
+
+    def think_seconds(self):
+        with self.rng_lock:
+            jitter = self.rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        return max(0, self.think_ms + jitter) / 1000
+
+    def generate(self, human, bp):
+        """Reply text for a claimed message; subclasses can call a real model here"""
+        time.sleep(self.think_seconds())
+        return f"reply to {human['id']}"
+
+    def work(self, worker_id):
+        while not self.stop.is_set():
+            try:
+                claim = self.session.post(f"{self.api_base}/api/queue/claim-next",
+                                          json={'workerId': worker_id}, timeout=10).json()
+            except Exception:
+                self.stop.wait(0.2)
+                continue
+            if not claim.get('success'):
+                self.stop.wait(0.05)
+                continue
+
+            human = claim['message']
+            bp = human.get('botParams') or {}
+            ai_username, _, ai_color = (bp.get('ais') or 'LoadBot:200100080').partition(':')
+            try:
+                text = self.generate(human, bp)
+            except Exception as e:
+                log(f"⚠️  Simulated bot {worker_id}: {e}", "BOT")
+                continue
+
+            reply = {
+                'text': text,
+                'username': ai_username,
+                'color': ai_color,
+                'message-type': 'AI',
+                'replyTo': human['id'],
+                'botParams': {
+                    'entity': bp.get('entity'),
+                    'ais': bp.get('ais'),
+                    'sessionId': bp.get('sessionId'),
+                    'humanUsername': human.get('username'),
+                    'humanColor': human.get('color'),
+                },
+            }
+            try:
+                self.session.post(f"{self.api_base}/api/comments", json=reply, timeout=10)
+                self.session.post(f"{self.api_base}/api/queue/complete",
+                                  json={'messageId': human['id']}, timeout=10)
+            except Exception as e:
+                log(f"⚠️  Simulated bot {worker_id}: {e}", "BOT")
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self.work, args=(f"sim-bot-{i}",), daemon=True)
+            t.start()
+            self.threads.append(t)
+
+    def shutdown(self):
+        self.stop.set()
+        for t in self.threads:
+            t.join(timeout=5)
+
+def fmt_ms(value):
+    return f"{value:,.0f}ms" if value is not None else "-"
+
+def print_results(results):
+    log("=" * 80)
+    log("📊 LOAD TEST RESULTS", "RESULT")
+    log("=" * 80)
+    log(f"Posted: {results['posted']}  (errors: {results['postErrors']})", "RESULT")
+    log(f"Replied: {results['replied']}/{results['posted']}  (unmatched AI replies: {results['unmatchedReplies']})", "RESULT")
+    log(f"Post throughput: {results['postThroughput']}/s over {results['postingSeconds']}s", "RESULT")
+    log(f"Reply throughput: {results['replyThroughput']}/s over {results['totalSeconds']}s", "RESULT")
+
+    for label, key in (("POST round trip", 'postRttMs'),
+                       ("Post → reply (server clock)", 'replyLatencyMs'),
+                       ("Post → reply (observed)", 'observedReplyLatencyMs')):
+        s = results[key]
+        log(f"{label:<28} n={s['count']:<5} p50={fmt_ms(s['p50']):>9} p95={fmt_ms(s['p95']):>9} "
+            f"p99={fmt_ms(s['p99']):>9} max={fmt_ms(s['max']):>9}", "RESULT")
+
+    depth = results['queueDepth']
+    log(f"Queue depth: max={depth['max']} mean={depth['mean']}", "RESULT")
+
+    # Queue depth timeline, thinned to ~20 rows
+    samples = results['samples']
+    if samples:
+        log("-" * 80)
+        log("Queue depth over time (pending in DO / posted but unanswered):", "RESULT")
+        peak = max([s['outstanding'] for s in samples] + [s['pending'] or 0 for s in samples] + [1])
+        step = max(1, len(samples) // 20)
+        for s in samples[::step]:
+            bar = '█' * int(40 * (s['pending'] or 0) / peak)
+            log(f"  t={s['t']:>7.1f}s  pending={str(s['pending']):>5}  outstanding={s['outstanding']:>5}  {bar}", "RESULT")
+
+def main():
+    standin = '--standin' in sys.argv
+    api_base = get_option('--api-base')
+    seed = int(get_option('--seed', 1))
+
+    if not api_base and not standin:
+        print(__doc__)
+        log("❌ --api-base or --standin is required", "MAIN")
+        return False
+
+    server = None
+    if standin:
+        standin_module = load_script('do_standin_server', STANDIN_SCRIPT)
+        server = standin_module.make_server(port=0, messages=int(get_option('--standin-messages', 0)), seed=seed)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        api_base = f"http://127.0.0.1:{server.server_address[1]}"
+        log(f"🧪 DO stand-in listening on {api_base}", "MAIN")
+
+    bot = None
+    bot_workers = int(get_option('--simulate-bot', 4 if standin else 0))
+    if bot_workers:
+        bot = SimulatedBot(api_base, bot_workers, float(get_option('--bot-think-ms', 800)),
+                           float(get_option('--bot-jitter-ms', 400)), seed)
+        bot.start()
+        log(f"🤖 {bot_workers} simulated bot workers", "MAIN")
+
+    test = LoadTest(
+        api_base=api_base,
+        rate=float(get_option('--rate', 5)),
+        duration=float(get_option('--duration', 30)),
+        users=int(get_option('--users', 50)),
+        entities=parse_entities(get_option('--entities', '5')),
+        arrival=get_option('--arrival', 'poisson'),
+        seed=seed,
+        poll_ms=float(get_option('--poll-ms', 250)),
+        sample_ms=float(get_option('--sample-ms', 1000)),
+        senders=int(get_option('--senders', 32)),
+    )
+
+    log("🚀 Comments/Queue Load Test", "MAIN")
+    log(f"DO API: {api_base}", "MAIN")
+    try:
+        results = test.run(float(get_option('--drain', 60)))
+    finally:
+        if bot:
+            bot.shutdown()
+        if server:
+            server.shutdown()
+
+    print_results(results)
+
+    json_path = get_option('--json')
+    if json_path:
+        Path(json_path).write_text(json.dumps(results, indent=2))
+        log(f"💾 Results written to {json_path}", "MAIN")
+
+    return results['replied'] == results['posted'] and results['postErrors'] == 0
+
+if __name__ == "__main__":
+    try:
+        success = main()
+        exit(0 if success else 1)
+    except KeyboardInterrupt:
+        log("\n⚠️  Test interrupted by user", "MAIN")
+        exit(1)
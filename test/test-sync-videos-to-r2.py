@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Video Sync Resume / Delta Publish Test
+Checks scripts/sync-videos-to-r2.py against an in-memory S3 (moto)
+
+    resume   A multipart upload that fails part-way is journaled; the rerun
+             sends only the missing parts and the object matches the file.
+             Changing the file after the failure starts a fresh upload.
+    delta    --delta publishing: the first publish claims v1 with
+             If-None-Match, a publish that loses the If-Match race re-reads,
+             re-merges on top of the winner and claims the next version (its
+             delta lists only its own files), and merge_local_entries keeps
+             local-only entries.
+
+Usage:
+    python3 test-sync-videos-to-r2.py
+
+Requires boto3 and moto (pip3 install boto3 moto)
+"""
+
+import importlib.util
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import boto3
+
+SYNC_SCRIPT = Path(__file__).resolve().parent.parent / 'scripts' / 'sync-videos-to-r2.py'
+
+def load_script(name, path):
+    """Import a hyphenated script as a module"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+sync = load_script('sync_videos_to_r2', SYNC_SCRIPT)
+
+try:
+    from moto import mock_aws
+except ImportError:
+    mock_aws = None
+
+BUCKET = 'sync-test'
+PUBLIC_URL = 'https://videos.example.dev'
+
+def check(ok, message):
+    print(f"{'✅' if ok else '❌'} {message}")
+    return ok
+
+def test_resume(s3, tmp):
+    sync.TRANSFER_CONFIG['part_size'] = 5 * sync.MB     # S3's minimum part size
+    sync.TRANSFER_CONFIG['part_concurrency'] = 1        # parts in order, so the failure point is fixed
+    path = tmp / 'the-eternal.mov'
+    path.write_bytes(os.urandom(12 * sync.MB))          # 3 parts
+    size = path.stat().st_size
+    journal = sync.UploadJournal(tmp / 'upload-journal.json')
+
+    real_upload_part = s3.upload_part
+    sent = []
+
+    def upload_part(fail_on=None, **kwargs):
+        if kwargs['PartNumber'] == fail_on:
+            raise ConnectionError(f"connection lost on part {fail_on}")
+        sent.append(kwargs['PartNumber'])
+        return real_upload_part(**kwargs)
+
+    s3.upload_part = lambda **kwargs: upload_part(fail_on=3, **kwargs)
+    try:
+        sync.resumable_upload(s3, BUCKET, path, path.name, size, journal, None, lambda n: None)
+        failed = False
+    except ConnectionError:
+        failed = True
+    ok = check(failed and sorted(journal.get(path.name)['parts']) == ['1', '2'],
+               f"interrupted upload journaled parts {sorted(journal.get(path.name)['parts']) if journal.get(path.name) else None}")
+
+    # A new journal instance reads the file back, as the next run would
+    sent.clear()
+    s3.upload_part = upload_part
+    journal = sync.UploadJournal(tmp / 'upload-journal.json')
+    progress = []
+    sync.resumable_upload(s3, BUCKET, path, path.name, size, journal, None, progress.append)
+    body = s3.get_object(Bucket=BUCKET, Key=path.name)['Body'].read()
+    ok &= check(sent == [3], f"resume sent only the missing part(s): {sent}")
+    ok &= check(body == path.read_bytes(), "resumed object matches the local file")
+    ok &= check(sum(progress) == size, f"progress covers the whole file on resume ({sum(progress)}/{size} bytes)")
+    ok &= check(journal.get(path.name) is None, "journal entry cleared after completion")
+
+    # Interrupt again, then change the file: its parts no longer apply
+    sent.clear()
+    s3.upload_part = lambda **kwargs: upload_part(fail_on=2, **kwargs)
+    try:
+        sync.resumable_upload(s3, BUCKET, path, path.name, size, journal, None, lambda n: None)
+    except ConnectionError:
+        pass
+    stale_upload = journal.get(path.name)['uploadId']
+    path.write_bytes(os.urandom(11 * sync.MB))
+    size = path.stat().st_size
+    sent.clear()
+    s3.upload_part = upload_part
+    sync.resumable_upload(s3, BUCKET, path, path.name, size, journal, None, lambda n: None)
+    body = s3.get_object(Bucket=BUCKET, Key=path.name)['Body'].read()
+    open_uploads = [u['UploadId'] for u in s3.list_multipart_uploads(Bucket=BUCKET).get('Uploads', [])]
+    ok &= check(sent == [1, 2, 3] and body == path.read_bytes(),
+                f"changed file re-uploaded from scratch: parts {sent}")
+    ok &= check(stale_upload not in open_uploads, "stale multipart upload aborted")
+    s3.upload_part = real_upload_part
+    return ok
+
+def read_json(s3, key):
+    return json.loads(s3.get_object(Bucket=BUCKET, Key=key)['Body'].read())
+
+def keys(manifest):
+    return [v['key'] for v in manifest['videos']]
+
+def test_delta(s3):
+    local = {'version': '2.0.0', 'publicUrl': PUBLIC_URL, 'videos': [], 'totalVideos': 0}
+
+    first = sync.publish_manifest_delta(s3, BUCKET, local, ['sww-00001.mp4'], PUBLIC_URL)
+    ok = check(first and first['manifestVersion'] == 1 and keys(read_json(s3, sync.MANIFEST_KEY)) == ['sww-00001.mp4'],
+               "first publish creates v1 (If-None-Match: *)")
+    ok &= check(keys({'videos': read_json(s3, 'manifest-delta-1.json')['added']}) == ['sww-00001.mp4'],
+                "manifest-delta-1.json lists the first upload")
+
+    # Another sync publishes v2 between our read and our conditional PUT
+    real_put_object = s3.put_object
+    raced = []
+
+    def put_object(**kwargs):
+        if kwargs['Key'] == sync.MANIFEST_KEY and not raced:
+            raced.append(True)
+            rival = sync.update_manifest(read_json(s3, sync.MANIFEST_KEY), ['rival-entity.mov'], PUBLIC_URL)
+            rival['manifestVersion'] = 2
+            real_put_object(Bucket=BUCKET, Key=sync.MANIFEST_KEY, Body=json.dumps(rival).encode())
+            real_put_object(Bucket=BUCKET, Key='manifest-delta-2.json',
+                            Body=json.dumps({'version': 2, 'added': [sync.make_manifest_entry('rival-entity.mov', PUBLIC_URL)]}).encode())
+        return real_put_object(**kwargs)
+
+    s3.put_object = put_object
+    published = sync.publish_manifest_delta(s3, BUCKET, local, ['sww-00002.mp4'], PUBLIC_URL)
+    s3.put_object = real_put_object
+    remote = read_json(s3, sync.MANIFEST_KEY)
+    ok &= check(published and published['manifestVersion'] == 3 and remote['manifestVersion'] == 3,
+                f"losing the If-Match race re-merges and claims v{published and published['manifestVersion']}")
+    ok &= check(sorted(keys(remote)) == ['rival-entity.mov', 'sww-00001.mp4', 'sww-00002.mp4'],
+                f"published manifest keeps the rival's entry: {keys(remote)}")
+    ok &= check(keys({'videos': read_json(s3, 'manifest-delta-3.json')['added']}) == ['sww-00002.mp4'],
+                "manifest-delta-3.json lists only our upload")
+
+    again = sync.publish_manifest_delta(s3, BUCKET, local, ['sww-00002.mp4'], PUBLIC_URL)
+    ok &= check(again['manifestVersion'] == 3 and read_json(s3, sync.MANIFEST_KEY)['manifestVersion'] == 3,
+                "republishing files already live claims no new version")
+
+    local_only = sync.update_manifest(dict(local, videos=[]), ['sww-local.mp4'], PUBLIC_URL)
+    merged = sync.merge_local_entries(published, local_only)
+    ok &= check(sorted(keys(merged)) == ['rival-entity.mov', 'sww-00001.mp4', 'sww-00002.mp4', 'sww-local.mp4']
+                and merged['manifestVersion'] == 3,
+                "merge_local_entries keeps local-only entries on top of the published manifest")
+    return ok
+
+def main():
+    if mock_aws is None:
+        print("❌ moto is required: pip3 install moto")
+        return False
+
+    with mock_aws(), tempfile.TemporaryDirectory() as tmp:
+        s3 = boto3.client('s3', region_name='us-east-1')
+        s3.create_bucket(Bucket=BUCKET)
+        print("🔁 Resumable multipart upload")
+        ok = test_resume(s3, Path(tmp))
+        print("\n📤 Conditional manifest publish")
+        ok &= test_delta(s3)
+    return ok
+
+if __name__ == "__main__":
+    exit(0 if main() else 1)
@@ -43,6 +43,7 @@ export interface VideoManifest {
   videos: VideoItem[];
   lastUpdated: string;
   total: number;
+  publicUrl?: string; // Base URL for entries without a url (compact manifests)
 }
 
 export interface VideoItem {